@@ -0,0 +1,93 @@
+"""
+Streaming exports of the completed orders.
+
+Orders are read in keyset batches (id > last id) and their items with
+.iterator(), so only one batch is held in memory however many orders
+are exported. Under ASGI, Django 4.1 iterates streaming responses on the
+event loop, where the ORM cannot run, so the export is written to a
+temporary file by the view instead and the file is streamed.
+"""
+import csv
+import tempfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Order, OrderItem
+
+ORDER_FIELDS = ('id', 'transaction_id', 'code', 'user_id', 'ambassador_email', 'first_name',
+                'last_name', 'email', 'address', 'city', 'country', 'zip_code', 'created_at')
+ITEM_FIELDS = ('product_title', 'price', 'quantity', 'admin_revenue', 'ambassador_revenue')
+
+
+def get_orders(start=None, end=None):
+    """Return the completed orders created between the `start` and `end` days."""
+    orders = Order.objects.filter(complete=True)
+    if start:
+        orders = orders.filter(created_at__date__gte=start)
+    if end:
+        orders = orders.filter(created_at__date__lte=end)
+    return orders
+
+
+def iter_order_batches(orders, batch_size):
+    """Yield lists of (order, items) pairs, where orders and items are dicts."""
+    last_id = 0
+    while True:
+        batch = list(orders.filter(id__gt=last_id).order_by('id').values(*ORDER_FIELDS)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1]['id']
+
+        items = {order['id']: [] for order in batch}
+        for item in (OrderItem.objects.filter(order_id__in=items).order_by('order_id', 'id')
+                     .values('order_id', *ITEM_FIELDS).iterator(chunk_size=batch_size)):
+            items[item.pop('order_id')].append(item)
+
+        yield [(order, items[order['id']]) for order in batch]
+        if len(batch) < batch_size:
+            return
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+EMPTY_ITEM = dict.fromkeys(ITEM_FIELDS, '')
+
+
+def stream_csv(orders, batch_size):
+    """Yield CSV chunks with one row per order item. Orders without items
+       get one row with empty item columns."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_FIELDS + ITEM_FIELDS)
+    for batch in iter_order_batches(orders, batch_size):
+        yield ''.join(
+            writer.writerow([order[f] for f in ORDER_FIELDS] + [item[f] for f in ITEM_FIELDS])
+            for order, items in batch
+            for item in items or [EMPTY_ITEM]
+        )
+
+
+def stream_ndjson(orders, batch_size):
+    """Yield NDJSON chunks with one line per order and its items."""
+    encoder = DjangoJSONEncoder()
+    for batch in iter_order_batches(orders, batch_size):
+        yield ''.join(f'{encoder.encode({**order, "items": items})}\n' for order, items in batch)
+
+
+def write_export(stream, orders, batch_size):
+    """Write the chunks of `stream` to a temporary file and return it rewound."""
+    file = tempfile.TemporaryFile()
+    for chunk in stream(orders, batch_size):
+        file.write(chunk.encode('utf-8'))
+    file.seek(0)
+    return file
+
+
+EXPORTS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
@@ -1,9 +1,34 @@
 """
 Serializers for the administrator app.
 """
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework import serializers
 
+from administrator.exports import EXPORTS
 from core.models import Product, Link, OrderItem, Order
+from core.revenue import PERIODS
+
+
+class AmbassadorSerializer(serializers.ModelSerializer):
+    """Serializer for the ambassadors listed to admins. The revenue and the
+       completed orders are annotated on the queryset by AmbassadorAPIView."""
+    revenue = serializers.DecimalField(source='revenue_total', max_digits=14, decimal_places=2,
+                                       read_only=True)
+    orders = serializers.IntegerField(source='orders_total', read_only=True)
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'first_name', 'last_name', 'email', 'is_ambassador', 'revenue', 'orders']
+
+
+class AmbassadorListSerializer(serializers.Serializer):
+    """Serializer for the query parameters of the ambassador list."""
+    search = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    sort = serializers.ChoiceField(choices=['revenue-asc', 'revenue-desc'], required=False)
+    page = serializers.IntegerField(min_value=1, default=1)
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -29,8 +54,7 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_total(self, obj):
         """Get the total value."""
-        items = OrderItem.objects.filter(order__id=obj.id)
-        return sum((i.price * i.quantity for i in items))
+        return sum((i.price * i.quantity for i in obj.order_items.all()))
 
     class Meta:
         model = Order
@@ -42,9 +66,39 @@ class LinkSerializer(serializers.ModelSerializer):
     orders = serializers.SerializerMethodField('get_orders')
 
     def get_orders(self, obj):
-        return OrderSerializer(Order.objects.filter(code=obj.code), many=True).data
+        """Get the orders placed with the link. Views serializing many links
+           pass them grouped by code in the `orders_by_code` context."""
+        orders_by_code = self.context.get('orders_by_code')
+        if orders_by_code is not None:
+            orders = orders_by_code.get(obj.code, [])
+        else:
+            orders = Order.objects.filter(code=obj.code).prefetch_related('order_items')
+        return OrderSerializer(orders, many=True).data
 
     class Meta:
         model = Link
         fields = '__all__'
 
+
+class RevenueAnalyticsSerializer(serializers.Serializer):
+    """Serializer for the query parameters of the revenue analytics.
+       The range defaults to the last 30 days."""
+    period = serializers.ChoiceField(choices=list(PERIODS), default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(choices=['ambassador'], required=False)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - datetime.timedelta(days=30)
+        if start > end:
+            raise serializers.ValidationError('start must not be after end.')
+        attrs.update(start=start, end=end)
+        return attrs
+
+
+class OrderExportSerializer(serializers.Serializer):
+    """Serializer for the query parameters of the order export."""
+    type = serializers.ChoiceField(choices=list(EXPORTS), default='csv')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
@@ -2,14 +2,15 @@
 Tests for the administrator app.
 """
 from _decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Product, Link, Order
+from common.testing import query_budget, QueryBudgetMixin
+from core.models import Product, Link, Order, OrderItem, DailyRevenue
 
 AMBASSADORS_URL = reverse('ambassadors')
 PRODUCTS_URL = reverse('products')
@@ -62,6 +63,7 @@ class ApiTests(TestCase):
         )
         self.client.force_authenticate(user=self.user)
 
+    @query_budget(2)
     def test_ambassador_api_needs_auth(self):
         """Test that the Ambassador API requires authentication."""
         res_success = self.client.get(AMBASSADORS_URL)
@@ -72,6 +74,7 @@ class ApiTests(TestCase):
         self.assertEqual(res_success.status_code, status.HTTP_200_OK)
         self.assertEqual(res_failure.status_code, status.HTTP_403_FORBIDDEN)
 
+    @query_budget(2)
     def test_ambassadors_endpoint_returns_only_ambassadors(self):
         """Test that the Ambassador API returns ambassadors."""
         ambassador = create_user(is_ambassador=True)
@@ -80,9 +83,10 @@ class ApiTests(TestCase):
         res = self.client.get(AMBASSADORS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['id'], ambassador.id)
+        self.assertEqual(res.data['meta']['total'], 1)
+        self.assertEqual(res.data['data'][0]['id'], ambassador.id)
 
+    @query_budget(2)
     def test_ambassadors_endpoint_ony_get_allowed(self):
         """test that only GET method is allowed in ambassadors endpoint."""
         r1 = self.client.get(AMBASSADORS_URL)
@@ -97,6 +101,7 @@ class ApiTests(TestCase):
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r5.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(1)
     def test_retrieve_products_success(self):
         """Test retrieving products is successful."""
         product = create_product()
@@ -121,6 +126,7 @@ class ApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(r4.status_code, status.HTTP_403_FORBIDDEN)
 
+    @query_budget(1)
     def test_get_products_success(self):
         """Test retrieving product is successful."""
         product = create_product()
@@ -130,6 +136,7 @@ class ApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data['id'], product.id)
 
+    @query_budget(1)
     def test_create_product_success(self):
         """Test creating a new product is successful."""
         payload = {
@@ -143,6 +150,7 @@ class ApiTests(TestCase):
         product_exists = Product.objects.filter(title=payload['title']).exists()
         self.assertTrue(product_exists)
 
+    @query_budget(2)
     def test_update_product_success(self):
         """Test updating a product is successful."""
         title = 'Old title'
@@ -159,6 +167,7 @@ class ApiTests(TestCase):
         self.assertEqual(res.data['title'], payload['title'])
         self.assertEqual(product.title, payload['title'])
 
+    @query_budget(3)
     def test_delete_product_success(self):
         """Test deleting a product is successful."""
         product = create_product()
@@ -174,6 +183,7 @@ class ApiTests(TestCase):
         product_exist = Product.objects.filter(id=product.id).exists()
         self.assertFalse(product_exist)
 
+    @query_budget(3)
     def test_retrieve_links(self):
         """Test retrieving links is successful."""
         link = Link.objects.create(
@@ -187,6 +197,7 @@ class ApiTests(TestCase):
         self.assertEqual(Link.objects.all().count(), 1)
         self.assertEqual(res.data[0]['id'], link.id)
 
+    @query_budget(2)
     def test_retrieve_orders(self):
         """Test retrieving orders is successful."""
         order = Order.objects.create(
@@ -215,6 +226,7 @@ class ApiTests(TestCase):
         self.assertEqual(res.data[0]['address'], order.address)
         self.assertEqual(res.data[0]['ambassador_email'], order.ambassador_email)
 
+    @query_budget(2)
     def test_create_user_is_ambassador_false(self):
         """Test that creating a user via administrator app will set
            user.is_ambassador to False."""
@@ -230,6 +242,7 @@ class ApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertFalse(res.data['is_ambassador'])
 
+    @query_budget(1)
     def test_only_admin_can_login_via_admin(self):
         """Test that only user that is not an admin cannot log in via this endpoint."""
         not_admin = create_user(
@@ -245,4 +258,135 @@ class ApiTests(TestCase):
         }
         res = self.client.post('/api/admin/login/', not_amin_credentials, format='json')
 
-        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+def create_orders(user, code, count):
+    """Create `count` completed orders with two items each for a link code."""
+    for i in range(count):
+        order = Order.objects.create(user=user, code=code, ambassador_email=user.email,
+                                     first_name='First', last_name='Last',
+                                     email=f'customer{i}@example.com', complete=True)
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10,
+                                     quantity=1, admin_revenue=9, ambassador_revenue=1)
+
+
+class AmbassadorListTests(TestCase):
+    """Tests for searching, sorting and paginating the ambassador list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='user@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.ambassadors = [
+            create_user(first_name=first_name, last_name=last_name,
+                        email=f'{first_name.lower()}@example.com', is_ambassador=True)
+            for first_name, last_name in [('John', 'Doe'), ('Jane', 'Smith'), ('Bob', 'Johnson')]
+        ]
+        for ambassador, revenue in zip(self.ambassadors, (5, 30, 10)):
+            DailyRevenue.objects.create(day='2023-01-01', user=ambassador, code='abc',
+                                        orders=2, admin_revenue=100,
+                                        ambassador_revenue=revenue)
+            DailyRevenue.objects.create(day='2023-01-02', user=ambassador, code='abc',
+                                        orders=1, admin_revenue=50,
+                                        ambassador_revenue=revenue)
+
+    @query_budget(2)
+    def test_revenue_and_orders(self):
+        """Test that every ambassador is listed with their revenue and completed orders."""
+        res = self.client.get(AMBASSADORS_URL)
+
+        self.assertEqual([a['id'] for a in res.data['data']],
+                         [a.id for a in self.ambassadors])
+        self.assertEqual(res.data['data'][1]['revenue'], '60.00')
+        self.assertEqual(res.data['data'][1]['orders'], 3)
+        self.assertNotIn('password', res.data['data'][0])
+
+    def test_ambassador_without_revenue(self):
+        """Test that ambassadors without completed orders have zero revenue."""
+        create_user(email='new@example.com', is_ambassador=True)
+
+        res = self.client.get(AMBASSADORS_URL, {'sort': 'revenue-asc'})
+
+        self.assertEqual(res.data['data'][0]['email'], 'new@example.com')
+        self.assertEqual((res.data['data'][0]['revenue'], res.data['data'][0]['orders']),
+                         ('0.00', 0))
+
+    def test_sort_by_revenue(self):
+        """Test that the ambassadors can be sorted by revenue."""
+        res = self.client.get(AMBASSADORS_URL, {'sort': 'revenue-desc'})
+
+        self.assertEqual([a['first_name'] for a in res.data['data']], ['Jane', 'Bob', 'John'])
+
+    def test_search(self):
+        """Test that every word of the search is matched against the start of
+           the email, first or last name."""
+        res = self.client.get(AMBASSADORS_URL, {'search': 'jo'})
+        self.assertEqual({a['first_name'] for a in res.data['data']}, {'John', 'Bob'})
+        self.assertEqual(res.data['meta']['total'], 2)
+
+        res = self.client.get(AMBASSADORS_URL, {'search': 'john doe'})
+        self.assertEqual([a['first_name'] for a in res.data['data']], ['John'])
+
+        res = self.client.get(AMBASSADORS_URL, {'search': 'ohn'})
+        self.assertEqual(res.data['data'], [])
+
+    @override_settings(AMBASSADORS_PER_PAGE=2)
+    def test_pagination(self):
+        """Test that the ambassadors are returned one page at a time."""
+        res = self.client.get(AMBASSADORS_URL, {'sort': 'revenue-desc', 'page': 2})
+
+        self.assertEqual([a['first_name'] for a in res.data['data']], ['John'])
+        self.assertEqual(res.data['meta'], {'total': 3, 'page': 2, 'last_page': 2})
+
+    def test_invalid_params(self):
+        """Test that unknown sorts and pages below 1 are rejected."""
+        for params in ({'sort': 'name'}, {'page': 0}):
+            res = self.client.get(AMBASSADORS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QueryScalingTests(QueryBudgetMixin, TestCase):
+    """Tests that the number of queries does not grow with the data."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='user@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(user=self.user)
+        self.ambassador = create_user(is_ambassador=True)
+
+    def create_link(self, code):
+        """Create a link with a product and two orders."""
+        link = Link.objects.create(code=code, user=self.ambassador)
+        link.products.add(create_product(title=f'Product {code}'))
+        create_orders(self.ambassador, code, 2)
+
+    def test_orders_queries_do_not_scale(self):
+        """Test that listing orders runs a constant number of queries."""
+        create_orders(self.ambassador, 'abc123', 2)
+
+        with self.assertMaxQueries(2):
+            self.client.get(ORDERS_URL)
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(ORDERS_URL),
+            lambda: create_orders(self.ambassador, 'abc123', 10)
+        )
+
+    def test_links_queries_do_not_scale(self):
+        """Test that listing links with their orders runs a constant number of queries."""
+        url = get_links_url(self.ambassador.id)
+        self.create_link('code1')
+
+        with self.assertMaxQueries(4):
+            self.client.get(url)
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(url),
+            lambda: [self.create_link(f'code{i}') for i in range(2, 10)]
+        )
@@ -0,0 +1,112 @@
+"""
+Tests for the revenue analytics endpoint.
+"""
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import DailyRevenue
+
+ANALYTICS_URL = reverse('analytics-revenue')
+
+
+def create_revenue(user, day, code='abc123', orders=1, revenue=1):
+    """Create and return a daily revenue row."""
+    return DailyRevenue.objects.create(user=user, day=day, code=code, orders=orders,
+                                       admin_revenue=9 * revenue, ambassador_revenue=revenue)
+
+
+class RevenueAnalyticsTests(TestCase):
+    """Tests for the revenue analytics endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(email='admin@example.com',
+                                                               password='password123')
+        self.client.force_authenticate(self.admin)
+        self.ambassador1 = get_user_model().objects.create_user(email='a1@example.com',
+                                                                password='password123')
+        self.ambassador2 = get_user_model().objects.create_user(email='a2@example.com',
+                                                                password='password123')
+        create_revenue(self.ambassador1, datetime.date(2023, 1, 2))
+        create_revenue(self.ambassador1, datetime.date(2023, 1, 2), code='other', orders=2)
+        create_revenue(self.ambassador2, datetime.date(2023, 1, 3), revenue=2)
+        create_revenue(self.ambassador2, datetime.date(2023, 2, 1), orders=3, revenue=3)
+
+    def test_revenue_per_day(self):
+        """Test revenue and order counts bucketed by day."""
+        res = self.client.get(ANALYTICS_URL, {'start': '2023-01-01', 'end': '2023-01-31'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['period'], 'day')
+        self.assertEqual(res.data['results'], [
+            {'period': datetime.date(2023, 1, 2), 'orders': 3,
+             'admin_revenue': Decimal('18'), 'ambassador_revenue': Decimal('2')},
+            {'period': datetime.date(2023, 1, 3), 'orders': 1,
+             'admin_revenue': Decimal('18'), 'ambassador_revenue': Decimal('2')},
+        ])
+
+    def test_revenue_per_week_and_month(self):
+        """Test bucketing by week and by month."""
+        params = {'start': '2023-01-01', 'end': '2023-02-28'}
+        weeks = self.client.get(ANALYTICS_URL, {**params, 'period': 'week'}).data['results']
+        months = self.client.get(ANALYTICS_URL, {**params, 'period': 'month'}).data['results']
+
+        self.assertEqual([(r['period'], r['orders']) for r in weeks],
+                         [(datetime.date(2023, 1, 2), 4), (datetime.date(2023, 1, 30), 3)])
+        self.assertEqual([(r['period'], r['orders']) for r in months],
+                         [(datetime.date(2023, 1, 1), 4), (datetime.date(2023, 2, 1), 3)])
+
+    def test_revenue_grouped_by_ambassador(self):
+        """Test grouping the buckets by ambassador."""
+        res = self.client.get(ANALYTICS_URL, {'start': '2023-01-01', 'end': '2023-01-31',
+                                              'period': 'month', 'groupBy': 'ambassador'})
+
+        self.assertEqual(
+            [(r['ambassador_email'], r['orders'], r['ambassador_revenue'])
+             for r in res.data['results']],
+            [('a1@example.com', 3, Decimal('2')), ('a2@example.com', 1, Decimal('2'))]
+        )
+
+    def test_closed_range_is_cached(self):
+        """Test that a range that ended before today is cached."""
+        params = {'start': '2023-01-01', 'end': '2023-01-31'}
+        self.client.get(ANALYTICS_URL, params)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ANALYTICS_URL, params)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_open_range_is_not_cached(self):
+        """Test that a range including today is computed on every request."""
+        today = datetime.date.today()
+        self.client.get(ANALYTICS_URL)
+        create_revenue(self.ambassador1, today)
+
+        res = self.client.get(ANALYTICS_URL)
+
+        self.assertEqual(res.data['end'], today)
+        self.assertEqual([r['period'] for r in res.data['results']], [today])
+
+    def test_invalid_params(self):
+        """Test that invalid periods and ranges are rejected."""
+        r1 = self.client.get(ANALYTICS_URL, {'period': 'year'})
+        r2 = self.client.get(ANALYTICS_URL, {'start': '2023-02-01', 'end': '2023-01-01'})
+
+        self.assertEqual(r1.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(r2.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_auth(self):
+        """Test that the analytics require authentication."""
+        self.client.logout()
+        res = self.client.get(ANALYTICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
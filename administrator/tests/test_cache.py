@@ -9,6 +9,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from common.testing import query_budget
 from core.models import Product
 
 PRODUCTS_URL = reverse('products')
@@ -44,6 +45,7 @@ class CacheTests(TestCase):
         self.product1 = create_product(title='product1')
         self.product2 = create_product(title='product2')
 
+    @query_budget(1)
     def test_delete_cache_on_create(self):
         """Test that cache will be deleted after creating a product."""
         details = {
@@ -58,6 +60,7 @@ class CacheTests(TestCase):
         self.assertFalse(cache.get('products_frontend'))
         self.assertFalse(cache.get('products_backend'))
 
+    @query_budget(2)
     def test_delete_cache_on_update(self):
         """Test that cache will be deleted after updating a product."""
         url = get_product_url(self.product1.id)
@@ -67,6 +70,7 @@ class CacheTests(TestCase):
         self.assertFalse(cache.get('products_frontend'))
         self.assertFalse(cache.get('products_backend'))
 
+    @query_budget(3)
     def test_delete_cache_on_delete(self):
         """Test that cache will be deleted after deleting a product."""
         url = get_product_url(self.product2.id)
@@ -0,0 +1,140 @@
+"""
+Tests for the streaming order export.
+"""
+import csv
+import datetime
+import io
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Order, OrderItem
+
+EXPORT_URL = reverse('orders-export')
+
+
+def create_order(user, complete=True, day=None, items=2):
+    """Create and return an order with items."""
+    order = Order.objects.create(user=user, code='abc123', ambassador_email=user.email,
+                                 first_name='John', last_name='Doe',
+                                 email='johndoe@example.com', complete=complete)
+    if day:
+        Order.objects.filter(pk=order.pk).update(
+            created_at=datetime.datetime(day.year, day.month, day.day, 12,
+                                         tzinfo=datetime.timezone.utc)
+        )
+    for i in range(items):
+        OrderItem.objects.create(order=order, product_title=f'Product {i}', price=10,
+                                 quantity=1, admin_revenue=9, ambassador_revenue=1)
+    return order
+
+
+class OrderExportTests(TestCase):
+    """Tests for the order export endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(email='admin@example.com',
+                                                               password='password123')
+        self.client.force_authenticate(self.admin)
+
+    def test_export_csv(self):
+        """Test exporting one CSV row per order item."""
+        order = create_order(self.admin)
+        create_order(self.admin, complete=False)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['id'] for row in rows}, {str(order.id)})
+        self.assertEqual([row['product_title'] for row in rows], ['Product 0', 'Product 1'])
+
+    def test_export_csv_order_without_items(self):
+        """Test that orders without items get one CSV row with empty item columns."""
+        order = create_order(self.admin, items=0)
+
+        res = self.client.get(EXPORT_URL)
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(order.id))
+        self.assertEqual(rows[0]['product_title'], '')
+        self.assertEqual(rows[0]['quantity'], '')
+
+    def test_export_ndjson(self):
+        """Test exporting one JSON line per order with its items."""
+        orders = [create_order(self.admin, items=i) for i in range(1, 4)]
+
+        res = self.client.get(EXPORT_URL, {'type': 'ndjson'})
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in
+                 b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [o.id for o in orders])
+        self.assertEqual([len(line['items']) for line in lines], [1, 2, 3])
+        self.assertEqual(lines[0]['items'][0]['ambassador_revenue'], '1.00')
+
+    @override_settings(ORDER_EXPORT_BATCH_SIZE=2)
+    def test_export_in_batches(self):
+        """Test that the orders are read in keyset batches."""
+        orders = [create_order(self.admin, items=1) for _ in range(5)]
+
+        res = self.client.get(EXPORT_URL, {'type': 'ndjson'})
+        with self.assertNumQueries(6):
+            chunks = list(res.streaming_content)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([json.loads(line)['id'] for line in b''.join(chunks).splitlines()],
+                         [o.id for o in orders])
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_export_asgi(self):
+        """Test that under ASGI the whole export can be read on the event loop."""
+        orders = [create_order(self.admin, items=1) for _ in range(3)]
+
+        res = self.client.get(EXPORT_URL, {'type': 'ndjson'})
+
+        async def read_on_event_loop():
+            # the ASGI handler of Django 4.1 iterates the response synchronously
+            return b''.join(res)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename="orders.ndjson"')
+        lines = async_to_sync(read_on_event_loop)().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [o.id for o in orders])
+
+    def test_export_date_range(self):
+        """Test filtering the export by the order date."""
+        create_order(self.admin, day=datetime.date(2023, 1, 1))
+        order = create_order(self.admin, day=datetime.date(2023, 1, 15))
+        create_order(self.admin, day=datetime.date(2023, 2, 1))
+
+        res = self.client.get(EXPORT_URL, {'type': 'ndjson', 'start': '2023-01-10',
+                                           'end': '2023-01-31'})
+
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [order.id])
+
+    def test_export_invalid_type(self):
+        """Test that unknown export types are rejected."""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_auth(self):
+        """Test that the export requires authentication."""
+        self.client.logout()
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
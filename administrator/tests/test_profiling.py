@@ -0,0 +1,119 @@
+"""
+Tests for the on-demand request profiler.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from common.authentication import JWTAuthentication
+from common.profiling import PROFILES_KEY, get_profiles
+
+AMBASSADORS_URL = reverse('ambassadors')
+PROFILES_URL = reverse('profiles')
+
+
+def get_profile_url(pk):
+    """Return the URL for a specific profile."""
+    return reverse('profile-detail', args=[pk])
+
+
+class ProfilerTests(TestCase):
+    """Tests for the profiler middleware and the profiles endpoint."""
+
+    def setUp(self):
+        get_redis_connection('default').delete(PROFILES_KEY)
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='password123',
+        )
+        self.client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.admin.id, 'admin')
+
+    def test_profile_with_header(self):
+        """Test that an admin request with the header is profiled and stored."""
+        res = self.client.get(AMBASSADORS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        profiles = get_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(res['X-Profile-Id'], profiles[0]['id'])
+        self.assertEqual(profiles[0]['path'], AMBASSADORS_URL)
+        self.assertTrue(profiles[0]['functions'])
+        self.assertTrue(any('core_user' in q['sql'] for q in profiles[0]['queries']))
+
+    def test_profile_with_query_param(self):
+        """Test that the profile query parameter triggers profiling."""
+        res = self.client.get(f'{AMBASSADORS_URL}?profile=1')
+
+        self.assertIn('X-Profile-Id', res)
+
+    def test_not_profiled_without_request(self):
+        """Test that requests are not profiled unless asked to."""
+        res = self.client.get(AMBASSADORS_URL)
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(get_profiles(), [])
+
+    def test_not_profiled_for_ambassadors(self):
+        """Test that a JWT with the ambassador scope cannot trigger profiling."""
+        ambassador = get_user_model().objects.create_user(
+            email='ambassador@example.com',
+            password='password123',
+            is_ambassador=True
+        )
+        self.client.cookies['jwt'] = JWTAuthentication.generate_jwt(ambassador.id, 'ambassador')
+        res = self.client.get(reverse('ambassador:stats'), HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', res)
+
+    @override_settings(PROFILER_MAX_PROFILES=2)
+    def test_store_is_capped(self):
+        """Test that only the most recent profiles are kept."""
+        for _ in range(3):
+            self.client.get(AMBASSADORS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(len(get_profiles()), 2)
+
+    def test_list_and_retrieve_profiles(self):
+        """Test listing profiles and retrieving one of them."""
+        profile_id = self.client.get(AMBASSADORS_URL, HTTP_X_PROFILE='1')['X-Profile-Id']
+
+        res = self.client.get(PROFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['id'], profile_id)
+        self.assertNotIn('functions', res.data[0])
+
+        res = self.client.get(get_profile_url(profile_id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('functions', res.data)
+        self.assertIn('queries', res.data)
+
+        res = self.client.get(get_profile_url('missing'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_not_redis(self):
+        """Test that profiled requests succeed when the profile cannot be stored."""
+        with self.assertLogs('common.profiling', 'WARNING'):
+            res = self.client.get(AMBASSADORS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', res)
+
+        with self.assertLogs('common.profiling', 'WARNING'):
+            res = self.client.get(PROFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_profiles_endpoint_requires_auth(self):
+        """Test that the profiles endpoint requires authentication."""
+        self.client.cookies.clear()
+        res = self.client.get(PROFILES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
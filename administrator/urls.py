@@ -4,7 +4,8 @@ URL mappings for administrator app.
 from django.urls import path, include
 
 from .views import (AmbassadorAPIView, ProductGenericAPIView,
-                    OrderAPIView, LinkAPIView)
+                    OrderAPIView, LinkAPIView, ProfileAPIView,
+                    RevenueAnalyticsAPIView, OrderExportAPIView)
 
 urlpatterns = [
     path('', include('common.urls')),
@@ -13,5 +14,9 @@ urlpatterns = [
     path('products/<str:pk>/', ProductGenericAPIView.as_view(), name='product'),
     path('users/<str:pk>/links/', LinkAPIView.as_view(), name='links'),
     path('orders/', OrderAPIView.as_view(), name='orders'),
+    path('orders/export/', OrderExportAPIView.as_view(), name='orders-export'),
+    path('analytics/revenue/', RevenueAnalyticsAPIView.as_view(), name='analytics-revenue'),
+    path('profiles/', ProfileAPIView.as_view(), name='profiles'),
+    path('profiles/<str:pk>/', ProfileAPIView.as_view(), name='profile-detail'),
 ]
 
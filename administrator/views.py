@@ -1,32 +1,89 @@
 """
 Views for the administrator app.
 """
+import math
+from collections import defaultdict
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, generics, mixins
 
-from administrator.serializers import ProductSerializer, LinkSerializer, OrderSerializer
+from administrator.exports import EXPORTS, get_orders, write_export
+from administrator.serializers import (ProductSerializer, LinkSerializer, OrderSerializer,
+                                       RevenueAnalyticsSerializer, OrderExportSerializer,
+                                       AmbassadorSerializer, AmbassadorListSerializer)
 from common.authentication import JWTAuthentication
-from common.serializers import UserSerializer
+from common.db_router import ReplicaReadMixin
+from common.profiling import get_profiles, get_profile
 from core.models import Product, Link, Order
+from core.revenue import revenue_time_series
 
 
-class AmbassadorAPIView(APIView):
-    """API view for retrieving ambassadors."""
-    serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
-    permission_classes = (IsAuthenticated,)
+def search_ambassadors(search):
+    """Return the ambassadors whose email, first or last name starts with
+       every word of `search`. Prefix matches can use the indexes of the
+       columns, unlike matches anywhere in them."""
+    ambassadors = get_user_model().objects.filter(is_ambassador=True)
+    for term in search.split():
+        ambassadors = ambassadors.filter(Q(email__istartswith=term)
+                                         | Q(first_name__istartswith=term)
+                                         | Q(last_name__istartswith=term))
+    return ambassadors
 
-    def get(self, _):
-        ambassadors = get_user_model().objects.filter(is_ambassador=True)
-        serializer = self.serializer_class(ambassadors, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
+class AmbassadorAPIView(ReplicaReadMixin, APIView):
+    """API view for retrieving ambassadors with their revenue, one page at a time."""
+    serializer_class = AmbassadorSerializer
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
 
-class ProductGenericAPIView(generics.GenericAPIView,
+    def get(self, request):
+        serializer = AmbassadorListSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        ambassadors = search_ambassadors(params.get('search', ''))
+        total = ambassadors.count()
+
+        zero = Value(0, output_field=DecimalField())
+        ambassadors = (ambassadors
+                       .only('id', 'first_name', 'last_name', 'email', 'is_ambassador')
+                       .annotate(revenue_total=Coalesce(Sum('dailyrevenue__ambassador_revenue'),
+                                                        zero),
+                                 orders_total=Coalesce(Sum('dailyrevenue__orders'), 0)))
+        sort = params.get('sort')
+        if sort == 'revenue-asc':
+            ambassadors = ambassadors.order_by('revenue_total', 'id')
+        elif sort == 'revenue-desc':
+            ambassadors = ambassadors.order_by('-revenue_total', 'id')
+        else:
+            ambassadors = ambassadors.order_by('id')
+
+        per_page = settings.AMBASSADORS_PER_PAGE
+        page = params['page']
+        start = (page - 1) * per_page
+        data = self.serializer_class(ambassadors[start:start + per_page], many=True).data
+        return Response({
+            'data': data,
+            'meta': {
+                'total': total,
+                'page': page,
+                'last_page': math.ceil(total / per_page)
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class ProductGenericAPIView(ReplicaReadMixin,
+                            generics.GenericAPIView,
                             mixins.RetrieveModelMixin,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin,
@@ -68,25 +125,107 @@ class ProductGenericAPIView(generics.GenericAPIView,
         return response
 
 
-class LinkAPIView(APIView):
+class LinkAPIView(ReplicaReadMixin, APIView):
     """View for linking products."""
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = LinkSerializer
 
     def get(self, request, pk=None):
-        links = Link.objects.filter(user__id=pk)
-        serializer = self.serializer_class(links, many=True)
+        links = Link.objects.filter(user__id=pk).prefetch_related('products')
+        orders_by_code = defaultdict(list)
+        orders = (Order.objects.filter(code__in=[link.code for link in links])
+                  .prefetch_related('order_items'))
+        for order in orders:
+            orders_by_code[order.code].append(order)
+
+        serializer = self.serializer_class(links, many=True,
+                                           context={'orders_by_code': orders_by_code})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class OrderAPIView(APIView):
+class OrderAPIView(ReplicaReadMixin, APIView):
     """View for retrieving products."""
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = OrderSerializer
 
     def get(self, request):
-        orders = Order.objects.filter(complete=True)
+        orders = Order.objects.filter(complete=True).prefetch_related('order_items')
         serializer = self.serializer_class(orders, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class OrderExportAPIView(APIView):
+    """View for exporting the completed orders and their items as CSV or NDJSON."""
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = OrderExportSerializer
+
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        stream, content_type = EXPORTS[params['type']]
+        orders = get_orders(params.get('start'), params.get('end'))
+        filename = f'orders.{params["type"]}'
+        if settings.ASYNC_VIEWS:
+            # the view runs in a thread, the response is iterated on the event loop
+            return FileResponse(write_export(stream, orders, settings.ORDER_EXPORT_BATCH_SIZE),
+                                as_attachment=True, filename=filename,
+                                content_type=content_type)
+        response = StreamingHttpResponse(stream(orders, settings.ORDER_EXPORT_BATCH_SIZE),
+                                         content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ProfileAPIView(APIView):
+    """View for listing the stored request profiles."""
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, pk=None):
+        if pk is not None:
+            profile = get_profile(pk)
+            if profile is None:
+                raise NotFound('Profile not found.')
+            return Response(profile, status=status.HTTP_200_OK)
+
+        profiles = [
+            {key: p[key] for key in ('id', 'method', 'path', 'status', 'created_at', 'duration_ms')}
+            for p in get_profiles()
+        ]
+        return Response(profiles, status=status.HTTP_200_OK)
+
+
+class RevenueAnalyticsAPIView(APIView):
+    """View for the revenue and order counts per day, week or month.
+       Ranges that ended before today are cached."""
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = RevenueAnalyticsSerializer
+
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        group_by_ambassador = params.get('group_by') == 'ambassador'
+
+        closed = params['end'] < timezone.localdate()
+        cache_key = (f'analytics_revenue:{params["period"]}:{params["start"]}:{params["end"]}:'
+                     f'{int(group_by_ambassador)}')
+        results = cache.get(cache_key) if closed else None
+        if results is None:
+            results = revenue_time_series(params['start'], params['end'], params['period'],
+                                          group_by_ambassador)
+            if closed:
+                cache.set(cache_key, results, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+
+        return Response({
+            'period': params['period'],
+            'start': params['start'],
+            'end': params['end'],
+            'results': results,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,89 @@
+"""
+Async views for the ambassador app, served instead of the sync ones under ASGI.
+"""
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+
+from ambassador.serializers import ProductSerializer, RankingsSerializer
+from ambassador.views import search_products
+from common.async_redis import get_async_redis
+from common.async_views import AsyncAPIView
+from common.compression import precompress
+from common.metrics import track_cache
+from core.models import Product
+from core.rankings import ranking_key
+
+
+class AsyncProductFrontendView(AsyncAPIView):
+    """Async version of ProductFrontendAPIView.
+       The rendered products and their compressed variants are cached in
+       a Redis hash, which is deleted with the other products_frontend keys."""
+    cache_key = 'products_frontend_async'
+    timeout = 60 * 60 * 2
+
+    async def get(self, request):
+        con = get_async_redis()
+        key = cache.make_key(self.cache_key)
+
+        with track_cache() as result:
+            variants = await con.hgetall(key)
+            result[0 if variants else 1] += 1
+
+        if variants:
+            variants = {encoding.decode(): content for encoding, content in variants.items()}
+        else:
+            products = [product async for product in Product.objects.all()]
+            response = precompress(self.render(ProductSerializer(products, many=True).data))
+            variants = {'identity': response.content,
+                        **getattr(response, 'compressed_content', {})}
+            pipe = con.pipeline(transaction=False)
+            pipe.hset(key, mapping=variants)
+            pipe.expire(key, self.timeout)
+            with track_cache():
+                await pipe.execute()
+
+        response = HttpResponse(variants.pop('identity'), content_type='application/json')
+        response.compressed_content = variants
+        return response
+
+
+class AsyncProductBackendView(AsyncAPIView):
+    """Async version of ProductBackendAPIView, sharing its cache entry."""
+    cache_key = 'products_backend'
+    timeout = 60 * 30
+
+    async def get(self, request):
+        con = get_async_redis()
+        key = cache.make_key(self.cache_key)
+
+        with track_cache() as result:
+            value = await con.get(key)
+            result[0 if value is not None else 1] += 1
+
+        products = cache.client.decode(value) if value is not None else None
+        if not products:
+            products = [product async for product in Product.objects.all()]
+            with track_cache():
+                await con.set(key, cache.client.encode(products), ex=self.timeout)
+
+        return self.render(search_products(products, request.GET, ProductSerializer))
+
+
+class AsyncRankingsView(AsyncAPIView):
+    """Async version of RankingsAPIView."""
+    authenticated = True
+
+    async def get(self, request):
+        serializer = RankingsSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        con = get_async_redis()
+
+        with track_cache():
+            rankings = await con.zrevrange(ranking_key(serializer.validated_data['window']),
+                                           0, -1, withscores=True)
+
+        return self.render({
+            r[0].decode('utf-8'): r[1] for r in rankings
+        })
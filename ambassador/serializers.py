@@ -1,8 +1,12 @@
 """
 Serializers for the ambassador app.
 """
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
+from core.link_codes import take_codes
+from core.rankings import WINDOWS
 from core.models import Product, Link
 
 
@@ -20,3 +24,52 @@ class LinkSerializer(serializers.ModelSerializer):
     class Meta:
         model = Link
         fields = '__all__'
+
+
+class LinkProductsSerializer(serializers.Serializer):
+    """Serializer for the products of one link in a bulk request."""
+    products = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
+class BulkLinkSerializer(serializers.Serializer):
+    """Serializer for creating many links at once."""
+    links = LinkProductsSerializer(many=True, allow_empty=False)
+
+    def validate_links(self, links):
+        """Check the number of links and that all the products exist."""
+        if len(links) > settings.LINK_BULK_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'At most {settings.LINK_BULK_MAX_SIZE} links can be created at once.'
+            )
+        product_ids = {product_id for link in links for product_id in link['products']}
+        existing = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        missing = sorted(product_ids - existing)
+        if missing:
+            raise serializers.ValidationError(f'Invalid products: {missing}.')
+        return links
+
+    def create(self, validated_data):
+        """Create the links with two bulk inserts and return them in request order."""
+        links = validated_data['links']
+        codes = take_codes(len(links))
+        through = Link.products.through
+
+        with transaction.atomic():
+            Link.objects.bulk_create(Link(code=code, user=validated_data['user']) for code in codes)
+            # bulk_create does not return primary keys on MySQL
+            link_ids = dict(Link.objects.filter(code__in=codes).values_list('code', 'id'))
+            through.objects.bulk_create(
+                through(link_id=link_ids[code], product_id=product_id)
+                for code, link in zip(codes, links)
+                for product_id in dict.fromkeys(link['products'])
+            )
+
+        return [
+            {'id': link_ids[code], 'code': code, 'products': list(dict.fromkeys(link['products']))}
+            for code, link in zip(codes, links)
+        ]
+
+
+class RankingsSerializer(serializers.Serializer):
+    """Serializer for the query parameters of the rankings."""
+    window = serializers.ChoiceField(choices=WINDOWS, default='all')
@@ -2,17 +2,23 @@
 Tests for the ambassador app.
 """
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django_redis import get_redis_connection
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Product, Link
+from common.testing import query_budget, QueryBudgetMixin
+from core.link_codes import POOL_KEY, refill_pool
+from core.models import Product, Link, Order, OrderItem, LinkClicks
+from core.rankings import ranking_key
+from core.revenue import record_orders
 
 PRODUCTS_FRONTEND_URL = reverse('ambassador:products-frontend')
 PRODUCTS_BACKEND_URL = reverse('ambassador:products-backend')
 LINKS_URL = reverse('ambassador:links')
+BULK_LINKS_URL = reverse('ambassador:links-bulk')
 STATS_URL = reverse('ambassador:stats')
 RANKINGS_URL = reverse('ambassador:rankings')
 
@@ -40,6 +46,7 @@ class PublicAmbassadorApiTests(TestCase):
         create_product(title='something', price=20.00),
         create_product(title='something else', price=30.00)
 
+    @query_budget(1)
     def test_get_products(self):
         """Test getting all products."""
         res = self.client.get(PRODUCTS_BACKEND_URL)
@@ -114,7 +121,10 @@ class PrivateAmbassadorApiTests(TestCase):
         )
         self.client.force_authenticate(self.ambassador)
         self.product = create_product(title='Product 1')
+        get_redis_connection('default').delete(POOL_KEY)
+        refill_pool(5)
 
+    @query_budget(8)
     def test_create_link_success(self):
         """Test creating Link is successful."""
         product2 = create_product(title='Product 2')
@@ -127,6 +137,68 @@ class PrivateAmbassadorApiTests(TestCase):
         self.assertEqual(len(res.data['products']), 2)
         self.assertEqual(Link.objects.all().count(), 1)
 
+    def test_create_link_uses_code_pool(self):
+        """Test that the link code is taken from the code pool."""
+        con = get_redis_connection('default')
+        con.delete(POOL_KEY)
+        con.sadd(POOL_KEY, 'pool01')
+
+        res = self.client.post(LINKS_URL, {'products': [self.product.id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['code'], 'pool01')
+        self.assertFalse(con.sismember(POOL_KEY, 'pool01'))
+
+    def test_bulk_create_links(self):
+        """Test creating many links returns their codes in request order."""
+        product2 = create_product(title='Product 2')
+        payload = {'links': [
+            {'products': [self.product.id]},
+            {'products': [self.product.id, product2.id]},
+            {'products': [product2.id]},
+        ]}
+
+        with self.assertNumQueries(6):
+            res = self.client.post(BULK_LINKS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+        for link_data, link_payload in zip(res.data, payload['links']):
+            link = Link.objects.get(code=link_data['code'])
+            self.assertEqual(link.user, self.ambassador)
+            self.assertEqual(sorted(link.products.values_list('id', flat=True)),
+                             sorted(link_payload['products']))
+
+    def test_bulk_create_links_queries_do_not_scale(self):
+        """Test that the number of queries does not grow with the number of links."""
+        payload = {'links': [{'products': [self.product.id]}] * 2}
+        with self.assertNumQueries(6):
+            self.client.post(BULK_LINKS_URL, payload, format='json')
+
+        refill_pool(50)
+        payload = {'links': [{'products': [self.product.id]}] * 50}
+        with self.assertNumQueries(6):
+            res = self.client.post(BULK_LINKS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Link.objects.count(), 52)
+
+    def test_bulk_create_links_wrong_product(self):
+        """Test that no link is created when a product does not exist."""
+        payload = {'links': [{'products': [self.product.id]}, {'products': [999]}]}
+        res = self.client.post(BULK_LINKS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Link.objects.exists())
+
+    @override_settings(LINK_BULK_MAX_SIZE=2)
+    def test_bulk_create_links_too_many(self):
+        """Test that the number of links in one request is limited."""
+        payload = {'links': [{'products': [self.product.id]}] * 3}
+        res = self.client.post(BULK_LINKS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_link_requires_auth(self):
         """Test that creating Link requires authentication."""
         self.client.logout()
@@ -134,6 +206,7 @@ class PrivateAmbassadorApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    @query_budget(3)
     def test_create_link_with_wrong_product(self):
         """Test creating a link with product that does not exist."""
         payload = {
@@ -155,6 +228,7 @@ class PrivateAmbassadorApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(7)
     def test_get_stats(self):
         """Test getting stats, code, count and revenue."""
         payload = {
@@ -171,6 +245,27 @@ class PrivateAmbassadorApiTests(TestCase):
         self.assertIn('revenue', res.data[0])
         self.assertEqual(link_coed, res.data[0]['code'])
 
+    def test_stats_clicks_and_conversion_rate(self):
+        """Test that stats report the flushed clicks and the orders per click."""
+        Link.objects.create(code='abc123', user=self.ambassador)
+        Link.objects.create(code='other', user=self.ambassador)
+        LinkClicks.objects.create(code='abc123', clicks=8)
+        for _ in range(2):
+            order = Order.objects.create(user=self.ambassador, code='abc123',
+                                         ambassador_email=self.ambassador.email,
+                                         first_name='First', last_name='Last',
+                                         email='customer@example.com', complete=True)
+            OrderItem.objects.create(order=order, product_title='Product', price=10,
+                                     quantity=1, admin_revenue=9, ambassador_revenue=1)
+            record_orders([order.id])
+
+        res = self.client.get(STATS_URL)
+
+        stats = {row['code']: row for row in res.data}
+        self.assertEqual((stats['abc123']['clicks'], stats['abc123']['conversion_rate']),
+                         (8, 0.25))
+        self.assertEqual((stats['other']['clicks'], stats['other']['conversion_rate']), (0, 0))
+
     def test_stats_only_get_allowed(self):
         """Test that only GET method is allowed for this endpoint."""
         r1 = self.client.post(STATS_URL, {})
@@ -183,6 +278,7 @@ class PrivateAmbassadorApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(2)
     def test_create_user_is_ambassador_true(self):
         """Test that creating a user via ambassador app will set
            user.is_ambassador to True."""
@@ -198,6 +294,26 @@ class PrivateAmbassadorApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertTrue(res.data['is_ambassador'])
 
+    @query_budget(0)
+    def test_rankings_window(self):
+        """Test that the rankings of a window are read from Redis."""
+        con = get_redis_connection('default')
+        con.delete(ranking_key('week'))
+        con.zadd(ranking_key('week'), {'First Ambassador': 10, 'Second Ambassador': 20})
+
+        res = self.client.get(RANKINGS_URL, {'window': 'week'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data.items()),
+                         [('Second Ambassador', 20.0), ('First Ambassador', 10.0)])
+
+    def test_rankings_invalid_window(self):
+        """Test that unknown windows are rejected."""
+        res = self.client.get(RANKINGS_URL, {'window': 'year'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @query_budget(1)
     def test_only_ambassador_can_login_via_ambassador(self):
         """Test that user that is not an ambassador cannot log in via this endpoint."""
         not_ambassador = get_user_model().objects.create(
@@ -214,3 +330,40 @@ class PrivateAmbassadorApiTests(TestCase):
         res = self.client.post('/api/ambassador/login/', not_ambassador_credentials, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class StatsQueryScalingTests(QueryBudgetMixin, TestCase):
+    """Tests that the stats endpoint runs a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.ambassador = get_user_model().objects.create_user(
+            email='ambassador@example.com',
+            password='password'
+        )
+        self.client.force_authenticate(self.ambassador)
+
+    def create_link_with_orders(self, code, orders=2):
+        """Create a link with completed orders and their daily revenue."""
+        Link.objects.create(code=code, user=self.ambassador)
+        for _ in range(orders):
+            order = Order.objects.create(user=self.ambassador, code=code,
+                                         ambassador_email=self.ambassador.email,
+                                         first_name='First', last_name='Last',
+                                         email='customer@example.com', complete=True)
+            OrderItem.objects.create(order=order, product_title='Product', price=10,
+                                     quantity=1, admin_revenue=9, ambassador_revenue=1)
+            record_orders([order.id])
+
+    def test_stats_queries_do_not_scale(self):
+        """Test that stats run the same number of queries for more links and orders."""
+        self.create_link_with_orders('code1')
+
+        with self.assertMaxQueries(2):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res.data, [{'code': 'code1', 'count': 2, 'revenue': 2, 'clicks': 0,
+                                     'conversion_rate': 0}])
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(STATS_URL),
+            lambda: [self.create_link_with_orders(f'code{i}', orders=i) for i in range(2, 8)]
+        )
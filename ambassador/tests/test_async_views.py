@@ -0,0 +1,160 @@
+"""
+Tests for the async views of the ambassador app.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+from django_redis import get_redis_connection
+
+from rest_framework.test import APIClient
+
+from ambassador.async_views import (AsyncProductFrontendView, AsyncProductBackendView,
+                                    AsyncRankingsView)
+from common.authentication import JWTAuthentication
+from core.models import Product
+
+PRODUCTS_FRONTEND_URL = '/api/ambassador/products/frontend/'
+PRODUCTS_BACKEND_URL = '/api/ambassador/products/backend/'
+RANKINGS_URL = '/api/ambassador/rankings/'
+
+urlpatterns = [
+    path('api/ambassador/products/frontend/', AsyncProductFrontendView.as_view()),
+    path('api/ambassador/products/backend/', AsyncProductBackendView.as_view()),
+    path('api/ambassador/rankings/', AsyncRankingsView.as_view()),
+]
+
+
+def create_products(count):
+    """Create `count` products."""
+    for i in range(count):
+        Product.objects.create(title=f'Product {i}', description=f'Description {i}',
+                               image='https://example.com/image.png', price=10 + i)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncProductViewsTests(TestCase):
+    """Tests for the async product views, served through the async middleware."""
+
+    def setUp(self):
+        cache.clear()
+        create_products(30)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_sync(self, url, params=None):
+        """Return the content of the sync view serving `url`."""
+        with override_settings(ROOT_URLCONF='ambassador_drf.urls'):
+            return APIClient().get(url, params).content
+
+    async def test_frontend_same_as_sync(self):
+        """Test that the async frontend view returns what the sync view returns."""
+        res = await self.async_client.get(PRODUCTS_FRONTEND_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertIn('Server-Timing', res)
+        self.assertEqual(json.loads(res.content), json.loads(await sync_to_async(self.get_sync)(PRODUCTS_FRONTEND_URL)))
+
+    async def test_frontend_cached(self):
+        """Test that the products are cached with their compressed variants."""
+        await self.async_client.get(PRODUCTS_FRONTEND_URL)
+        res = await self.async_client.get(PRODUCTS_FRONTEND_URL)
+
+        self.assertIn('db;desc="0 queries"', res['Server-Timing'])
+        variants = get_redis_connection('default').hgetall(
+            cache.make_key(AsyncProductFrontendView.cache_key))
+        self.assertEqual(variants[b'identity'], res.content)
+        self.assertIn(b'gzip', variants)
+
+    def test_frontend_cache_invalidated_with_products(self):
+        """Test that changing products deletes the async cache too."""
+        admin = get_user_model().objects.create_superuser(email='admin@example.com',
+                                                          password='password123')
+        client = APIClient()
+        client.force_authenticate(admin)
+        con = get_redis_connection('default')
+        self.client.get(PRODUCTS_FRONTEND_URL)
+        key = cache.make_key(AsyncProductFrontendView.cache_key)
+        self.assertTrue(con.exists(key))
+
+        with override_settings(ROOT_URLCONF='ambassador_drf.urls'):
+            client.post('/api/admin/products/', {'title': 'New', 'description': 'New',
+                                                 'image': 'image.png', 'price': 5})
+
+        self.assertFalse(con.exists(key))
+
+    async def test_backend_same_as_sync(self):
+        """Test that search, sort and pagination match the sync view."""
+        params = {'search': 'product 1', 'sort': 'price-desc', 'page': 1}
+
+        res = await self.async_client.get(PRODUCTS_BACKEND_URL, params)
+        cached = await self.async_client.get(PRODUCTS_BACKEND_URL, {**params, 'page': 2})
+
+        self.assertEqual(res.status_code, 200)
+        sync_content = await sync_to_async(self.get_sync)(PRODUCTS_BACKEND_URL, params)
+        self.assertEqual(json.loads(res.content), json.loads(sync_content))
+        self.assertEqual(json.loads(cached.content)['meta']['page'], 2)
+
+    def test_backend_shares_sync_cache(self):
+        """Test that the async view reads the products cached by the sync view."""
+        self.get_sync(PRODUCTS_BACKEND_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(PRODUCTS_BACKEND_URL)
+
+        self.assertEqual(json.loads(res.content)['meta']['total'], 30)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncRankingsViewTests(TestCase):
+    """Tests for the async rankings view."""
+
+    def setUp(self):
+        self.ambassador = get_user_model().objects.create_user(email='ambassador@example.com',
+                                                               password='password')
+        con = get_redis_connection('default')
+        con.delete('rankings')
+        con.zadd('rankings', {'First Ambassador': 20, 'Second Ambassador': 10})
+
+    async def test_rankings(self):
+        """Test that rankings are returned from Redis."""
+        self.async_client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.ambassador.id,
+                                                                          'ambassador')
+        res = await self.async_client.get(RANKINGS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.content),
+                         {'First Ambassador': 20.0, 'Second Ambassador': 10.0})
+
+    async def test_rankings_requires_auth(self):
+        """Test that rankings require a JWT with the ambassador scope."""
+        r1 = await self.async_client.get(RANKINGS_URL)
+        self.async_client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.ambassador.id,
+                                                                          'admin')
+        r2 = await self.async_client.get(RANKINGS_URL)
+
+        self.assertEqual(r1.status_code, 403)
+        self.assertEqual(r2.status_code, 403)
+        self.assertEqual(json.loads(r2.content), {'detail': 'Invalid scope!'})
+
+    async def test_rankings_invalid_window(self):
+        """Test that unknown windows are rejected like in the sync view."""
+        self.async_client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.ambassador.id,
+                                                                          'ambassador')
+        res = await self.async_client.get(RANKINGS_URL, {'window': 'year'})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('window', json.loads(res.content))
+
+    async def test_rankings_only_get_allowed(self):
+        """Test that only GET is allowed."""
+        self.async_client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.ambassador.id,
+                                                                          'ambassador')
+        res = await self.async_client.post(RANKINGS_URL)
+
+        self.assertEqual(res.status_code, 405)
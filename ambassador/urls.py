@@ -1,19 +1,31 @@
 """
 URL mappings for ambassador app.
 """
+from django.conf import settings
 from django.urls import path, include
 
+from .async_views import AsyncProductFrontendView, AsyncProductBackendView, AsyncRankingsView
 from .views import (ProductBackendAPIView, ProductFrontendAPIView,
-                    LinkAPIView, StatsAPIView, RankingsAPIView)
+                    LinkAPIView, BulkLinkAPIView, StatsAPIView, RankingsAPIView)
 
 app_name = 'ambassador'
 
+if settings.ASYNC_VIEWS:
+    product_frontend_view = AsyncProductFrontendView
+    product_backend_view = AsyncProductBackendView
+    rankings_view = AsyncRankingsView
+else:
+    product_frontend_view = ProductFrontendAPIView
+    product_backend_view = ProductBackendAPIView
+    rankings_view = RankingsAPIView
+
 urlpatterns = [
     path('', include('common.urls')),
-    path('products/frontend/', ProductFrontendAPIView.as_view(), name='products-frontend'),
-    path('products/backend/', ProductBackendAPIView.as_view(), name='products-backend'),
+    path('products/frontend/', product_frontend_view.as_view(), name='products-frontend'),
+    path('products/backend/', product_backend_view.as_view(), name='products-backend'),
     path('links/', LinkAPIView.as_view(), name='links'),
+    path('links/bulk/', BulkLinkAPIView.as_view(), name='links-bulk'),
     path('stats/', StatsAPIView.as_view(), name='stats'),
-    path('rankings/', RankingsAPIView.as_view(), name='rankings'),
+    path('rankings/', rankings_view.as_view(), name='rankings'),
 ]
 
@@ -2,22 +2,26 @@
 Views for the ambassador app.
 """
 import math
-import random
-import string
 
 from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
-from django_redis import get_redis_connection
 
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ambassador.serializers import ProductSerializer, LinkSerializer
+from ambassador.serializers import (ProductSerializer, LinkSerializer, BulkLinkSerializer,
+                                    RankingsSerializer)
 from common.authentication import JWTAuthentication
-from core.models import Product, Link, Order
+from common.compression import precompressed
+from common.db_router import ReplicaReadMixin
+from core.link_codes import take_code
+from core.models import Product, Link, DailyRevenue, LinkClicks
+from core.rankings import get_rankings
 
 
 class ProductFrontendAPIView(APIView):
@@ -26,6 +30,7 @@ class ProductFrontendAPIView(APIView):
     serializer_class = ProductSerializer
 
     @method_decorator(cache_page(60 * 60 * 2, key_prefix='products_frontend'))
+    @method_decorator(precompressed)
     def get(self, _):
         products = Product.objects.all()
         serializer = self.serializer_class(products, many=True)
@@ -43,42 +48,48 @@ class ProductBackendAPIView(APIView):
             products = list(Product.objects.all())
             cache.set('products_backend', products, timeout=60 * 30)
 
-        search = request.query_params.get('search', '')
-        if search:
-            products = list([
-                p for p in products
-                if (search.lower() in p.title.lower()
-                    or search.lower() in p.description.lower())
-            ])
-
-        total = len(products)
-
-        sort = request.query_params.get('sort', None)
-
-        if sort is not None:
-            if sort == 'price-asc':
-                products.sort(key=lambda p: p.price)
-            elif sort == 'price-desc':
-                products.sort(key=lambda p: p.price, reverse=True)
-            elif sort == 'title-asc':
-                products.sort(key=lambda p: p.title.lower())
-            elif sort == 'title-desc':
-                products.sort(key=lambda p: p.title.lower(), reverse=True)
-
-        per_page = 12
-        page = int(request.query_params.get('page', 1))
-        start = (page - 1) * per_page
-        end = page * per_page
-
-        data = self.serializer_class(products[start:end], many=True).data
-        return Response({
-            'data': data,
-            'meta': {
-                'total': total,
-                'page': page,
-                'last_page': math.ceil(total / per_page)
-            }
-        }, status=status.HTTP_200_OK)
+        return Response(search_products(products, request.query_params, self.serializer_class),
+                        status=status.HTTP_200_OK)
+
+
+def search_products(products, params, serializer_class):
+    """Search, sort and paginate the products for ProductBackendAPIView."""
+    search = params.get('search', '')
+    if search:
+        products = list([
+            p for p in products
+            if (search.lower() in p.title.lower()
+                or search.lower() in p.description.lower())
+        ])
+
+    total = len(products)
+
+    sort = params.get('sort', None)
+
+    if sort is not None:
+        if sort == 'price-asc':
+            products.sort(key=lambda p: p.price)
+        elif sort == 'price-desc':
+            products.sort(key=lambda p: p.price, reverse=True)
+        elif sort == 'title-asc':
+            products.sort(key=lambda p: p.title.lower())
+        elif sort == 'title-desc':
+            products.sort(key=lambda p: p.title.lower(), reverse=True)
+
+    per_page = 12
+    page = int(params.get('page', 1))
+    start = (page - 1) * per_page
+    end = page * per_page
+
+    data = serializer_class(products[start:end], many=True).data
+    return {
+        'data': data,
+        'meta': {
+            'total': total,
+            'page': page,
+            'last_page': math.ceil(total / per_page)
+        }
+    }
 
 
 class LinkAPIView(APIView):
@@ -91,7 +102,7 @@ class LinkAPIView(APIView):
         user = request.user
         serializer = self.serializer_class(data={
             'user': user.id,
-            'code': ''.join(random.choices(string.ascii_lowercase + string.digits, k=6)),
+            'code': take_code(),
             'products': request.data['products']
         })
         serializer.is_valid(raise_exception=True)
@@ -100,37 +111,61 @@ class LinkAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class StatsAPIView(APIView):
-    """API View for Link stats."""
+class BulkLinkAPIView(APIView):
+    """API View for creating many links in one request."""
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BulkLinkSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        links = serializer.save(user=request.user)
+
+        return Response(links, status=status.HTTP_200_OK)
+
+
+class StatsAPIView(ReplicaReadMixin, APIView):
+    """API View for Link stats: orders, revenue, clicks and conversion rate."""
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
         user = request.user
-        links = Link.objects.filter(user__id=user.id)
+        clicks = LinkClicks.objects.filter(code=OuterRef('code')).values('clicks')
+        links = list(Link.objects.filter(user__id=user.id)
+                     .annotate(clicks=Coalesce(Subquery(clicks), 0))
+                     .values_list('code', 'clicks'))
+        totals = {
+            row['code']: row for row in
+            DailyRevenue.objects.filter(user_id=user.id)
+            .values('code')
+            .annotate(count=Sum('orders'), revenue=Sum('ambassador_revenue'))
+        }
 
-        return Response([(self._format(link)) for link in links])
+        return Response([self._format(code, clicks, totals.get(code)) for code, clicks in links])
 
     @staticmethod
-    def _format(link):
-        orders = Order.objects.filter(code=link.code, complete=1)
+    def _format(code, clicks, totals):
+        count = totals['count'] if totals else 0
         return {
-            'code': link.code,
-            'count': len(orders),
-            'revenue': sum(o.ambassador_revenue for o in orders)
+            'code': code,
+            'count': count,
+            'revenue': (totals['revenue'] or 0) if totals else 0,
+            'clicks': clicks,
+            'conversion_rate': round(count / clicks, 4) if clicks else 0
         }
 
 
 class RankingsAPIView(APIView):
-    """API View for getting ambassadors with revenues in order."""
+    """API View for getting ambassadors with revenues in order,
+       all-time or of the current day, week or month (`?window=`)."""
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    serializer_class = RankingsSerializer
 
     def get(self, request):
-        con = get_redis_connection('default')
-
-        rankings = con.zrevrangebyscore('rankings', min=0, max=10000, withscores=True)
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
 
-        return Response({
-            r[0].decode('utf-8'): r[1] for r in rankings
-        })
+        return Response(get_rankings(serializer.validated_data['window']))
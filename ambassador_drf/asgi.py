@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ambassador_drf.settings')
+# serve the async versions of the hot read endpoints, see settings.ASYNC_VIEWS
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
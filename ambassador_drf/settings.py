@@ -50,7 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'common.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +60,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'djangorestframework_camel_case.middleware.CamelCaseMiddleWare',
+    'common.middleware.ReplicaPinMiddleware',
+    'common.middleware.CamelCaseMiddleWare',
+    'common.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'ambassador_drf.urls'
@@ -98,7 +102,7 @@ DATABASES = {
 
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'common.cache.InstrumentedRedisCache',
         'LOCATION': 'redis://redis:6379/0',
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient'
@@ -153,14 +157,17 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
-        'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
+        'common.renderers.CamelCaseJSONRenderer',
+        'common.renderers.CamelCaseBrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
         'djangorestframework_camel_case.parser.CamelCaseFormParser',
         'djangorestframework_camel_case.parser.CamelCaseMultiPartParser',
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
-    )
+        'common.parsers.CamelCaseJSONParser',
+    ),
+    # reverse proxies in front of the app, their X-Forwarded-For entries identify
+    # the client when throttling, with 0 the client is REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
 CORS_ORIGIN_ALLOW_ALL = True
@@ -179,3 +186,103 @@ ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY')
 
 FRONTEND_URL = os.environ.get('FRONTEND_URL')
+
+# response compression
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# request metrics, shared through Redis unless a multiprocess directory is set
+# (kept per process when the default cache is not django-redis)
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+# bearer token the metrics are scraped with, /metrics is closed without it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# on-demand profiling of admin requests
+PROFILER_MAX_PROFILES = 50
+PROFILER_TOP_FUNCTIONS = 30
+
+# pool of pre-generated link codes, refilled by the refill_link_codes command
+LINK_CODE_LENGTH = 6
+LINK_CODE_POOL_SIZE = 10000
+
+# maximum number of links created by one bulk request
+LINK_BULK_MAX_SIZE = 1000
+
+# revenue analytics of ranges that ended before today, late confirmations
+# of orders are reflected once the cached value expires
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# orders read per batch by the streaming order export
+ORDER_EXPORT_BATCH_SIZE = 2000
+
+# async versions of the hot read endpoints, enabled by ambassador_drf/asgi.py
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+ASYNC_REDIS_URL = CACHES['default']['LOCATION']
+ASYNC_REDIS_OPTIONS = {}
+
+# read replica, see common/db_router.py
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('DB_REPLICA_HOST'),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['common.db_router.ReplicaRouter']
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+# clients read from the primary for this many seconds after they write
+REPLICA_PIN_SECONDS = 5
+# reads go to the primary while the replica lags more seconds than this
+REPLICA_MAX_LAG = 5
+REPLICA_LAG_CHECK_INTERVAL = 10
+
+# token bucket rates per throttle scope, keyed by the client IP ('ip') or a
+# field of the request data, see common/throttling.py
+THROTTLE_RATES = {
+    'login': {'ip': '30/min', 'email': '10/min'},
+    'register': {'ip': '10/min'},
+    'checkout': {'ip': '30/min', 'code': '600/min'},
+}
+
+# queue placed orders in a Redis stream for the process_order_intake worker
+# instead of writing them in the request
+ORDER_INTAKE_QUEUE = os.environ.get('ORDER_INTAKE_QUEUE') == '1'
+ORDER_INTAKE_BATCH_SIZE = 500
+# seconds after which queued orders waiting for the payment provider are retried,
+# and the deliveries after which they fail
+ORDER_INTAKE_RETRY_AFTER = 60
+ORDER_INTAKE_MAX_DELIVERIES = 10
+# seconds the status of queued orders is kept in Redis
+ORDER_STATUS_TIMEOUT = 60 * 60 * 24
+
+# payment gateway creating the payment sessions of orders, see checkout/payments.py
+PAYMENT_GATEWAY = os.environ.get('PAYMENT_GATEWAY', 'checkout.payments.FakeGateway')
+# seconds to wait for the payment provider
+PAYMENT_TIMEOUT = 5
+# failures in a row after which the provider is not called for PAYMENT_CIRCUIT_RESET seconds
+PAYMENT_CIRCUIT_FAILURES = 5
+PAYMENT_CIRCUIT_RESET = 30
+# latency of the fake gateway in seconds, to simulate the provider in benchmarks
+PAYMENT_FAKE_DELAY = float(os.environ.get('PAYMENT_FAKE_DELAY', 0))
+
+# most orders confirmed by one batch confirmation request
+ORDER_CONFIRM_BATCH_MAX_SIZE = 10000
+# bearer token the payment provider confirms batches of orders with, the batch
+# confirmation is closed without it
+ORDER_CONFIRM_TOKEN = os.environ.get('ORDER_CONFIRM_TOKEN')
+
+# completed orders older than this many days are moved to the archive tables
+# by the archive_orders command
+ORDER_ARCHIVE_AFTER_DAYS = 365
+
+# ambassadors per page of the admin ambassador list
+AMBASSADORS_PER_PAGE = 50
+
+# seconds the day, week and month rankings are kept after their window ends
+RANKINGS_EXPIRE_AFTER = 60 * 60 * 24
+
+# seconds the revenue of an ambassador is cached for the user endpoint, confirmed
+# orders invalidate the cached value
+USER_REVENUE_CACHE_TIMEOUT = 60 * 60
@@ -0,0 +1,38 @@
+"""
+Django settings for running the endpoint benchmarks.
+
+Same as ambassador_drf.settings, but backed by SQLite and the local-memory
+cache, so no MySQL or Redis is needed:
+    python manage.py benchmark_endpoints --settings=ambassador_drf.settings_benchmark
+"""
+from ambassador_drf.settings import *  # noqa: F401,F403
+from ambassador_drf.settings import BASE_DIR
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'common.cache.InstrumentedLocMemCache',
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# MD5 is only accepted here, so that fixtures seeded with
+# `populate_ambassadors --hasher md5` can log in; their hashes are upgraded
+# to PBKDF2 on the first login
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
@@ -0,0 +1,25 @@
+"""
+Django settings for testing the read replica router.
+
+Same as ambassador_drf.settings, but with two separate SQLite databases,
+a primary and a replica that nothing replicates to, so tests can tell which
+one a query went to:
+    python manage.py test common.tests.test_db_router --settings=ambassador_drf.settings_replica
+"""
+from ambassador_drf.settings import *  # noqa: F401,F403
+from ambassador_drf.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'primary.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+    },
+}
+
+REPLICA_DATABASE = 'replica'
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
@@ -18,6 +18,8 @@ from django.urls import path, include
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from common.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -29,4 +31,5 @@ urlpatterns = [
     path('api/admin/', include('administrator.urls')),
     path('api/ambassador/', include('ambassador.urls')),
     path('api/checkout/', include('checkout.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,26 @@
+"""
+Async views for the checkout app, served instead of the sync ones under ASGI.
+"""
+from redis.exceptions import RedisError
+
+from checkout.serializers import LinkSerializer
+from common.async_redis import get_async_redis
+from common.async_views import AsyncAPIView
+from common.metrics import track_cache
+from core.clicks import CLICKS_KEY
+from core.models import Link
+
+
+class AsyncLinkView(AsyncAPIView):
+    """Async version of LinkAPIView, it counts the visits like record_click()."""
+
+    async def get(self, request, code=''):
+        link = await (Link.objects.filter(code=code).select_related('user')
+                      .prefetch_related('products').afirst())
+        if link is not None:
+            try:
+                with track_cache():
+                    await get_async_redis().hincrby(CLICKS_KEY, code, 1)
+            except RedisError:
+                pass
+        return self.render(LinkSerializer(link).data)
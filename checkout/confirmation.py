@@ -0,0 +1,89 @@
+"""
+Batch confirmation of orders.
+
+confirm_orders() completes any number of orders with one UPDATE and adds
+them to the daily revenue in one batch. Their confirmation emails are queued
+in Redis once the transaction commits and sent by the send_order_emails
+command with one SMTP connection per batch, so the confirmation request does
+not wait for the mail server.
+"""
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from core.models import Order
+from core.revenue import record_orders
+
+EMAIL_QUEUE_KEY = 'order_emails'
+
+
+def confirm_orders(transaction_ids):
+    """Complete the orders with the given transaction ids that are not complete
+       yet and return the transaction ids of those confirmed by this call."""
+    with transaction.atomic():
+        # the lock makes concurrent confirmations of the same orders wait, so
+        # every order is confirmed and counted in the revenue only once
+        orders = dict(Order.objects.select_for_update()
+                      .filter(transaction_id__in=set(transaction_ids), complete=False)
+                      .values_list('id', 'transaction_id'))
+        if orders:
+            Order.objects.filter(id__in=orders, complete=False).update(complete=True)
+            record_orders(list(orders))
+            transaction.on_commit(lambda: queue_confirmation_emails(list(orders)))
+
+    confirmed = set(orders.values())
+    return [transaction_id for transaction_id in dict.fromkeys(transaction_ids)
+            if transaction_id in confirmed]
+
+
+def queue_confirmation_emails(order_ids):
+    """Queue the confirmation emails of orders, or send them if Redis is down
+       or the cache is not django-redis."""
+    try:
+        get_redis_connection('default').rpush(EMAIL_QUEUE_KEY, *order_ids)
+    except (RedisError, NotImplementedError):
+        send_confirmation_emails(order_ids)
+
+
+def confirmation_messages(order_ids):
+    """Return the (subject, message, from, recipients) of the emails to the admin
+       and the ambassador of every order."""
+    zero = Value(0, output_field=DecimalField())
+    orders = (Order.objects.filter(id__in=order_ids)
+              .annotate(admin_total=Coalesce(Sum('order_items__admin_revenue'), zero),
+                        ambassador_total=Coalesce(Sum('order_items__ambassador_revenue'), zero))
+              .values_list('id', 'code', 'ambassador_email', 'admin_total', 'ambassador_total'))
+
+    subject = 'An order has been completed.'
+    messages = []
+    for order_id, code, ambassador_email, admin_total, ambassador_total in orders:
+        messages.append((subject,
+                         f'Order #{order_id} with total of ${admin_total} has been completed.',
+                         settings.DEFAULT_FROM_EMAIL, [settings.ADMIN_EMAIL]))
+        messages.append((subject, f'You earned ${ambassador_total} from the link #{code}.',
+                         settings.DEFAULT_FROM_EMAIL, [ambassador_email]))
+    return messages
+
+
+def send_confirmation_emails(order_ids):
+    """Send the confirmation emails of orders over one connection."""
+    return send_mass_mail(confirmation_messages(order_ids))
+
+
+def send_queued_emails(batch_size=500):
+    """Send the queued confirmation emails in batches and return the number
+       of orders they were sent for. A batch is removed from the queue only
+       once it was sent, so the emails are not lost when the mail server fails."""
+    con = get_redis_connection('default')
+    sent = 0
+    while True:
+        order_ids = con.lrange(EMAIL_QUEUE_KEY, 0, batch_size - 1)
+        if not order_ids:
+            return sent
+        send_confirmation_emails([int(order_id) for order_id in order_ids])
+        con.ltrim(EMAIL_QUEUE_KEY, len(order_ids), -1)
+        sent += len(order_ids)
@@ -0,0 +1,223 @@
+"""
+Asynchronous order intake.
+
+With ORDER_INTAKE_QUEUE enabled, placed orders are validated and added to a
+Redis stream instead of being written by the request. The
+process_order_intake command reads the stream in batches with a consumer
+group and writes the orders and their items in bulk. Once a batch is
+committed, the worker creates the payment sessions of its orders; orders
+keep the transaction id they were queued with, which the provider confirms
+them with, and their session id is kept in Redis for the status endpoint.
+While the provider is unavailable the entries stay pending in the stream and
+are claimed again with XAUTOCLAIM once idle for ORDER_INTAKE_RETRY_AFTER
+seconds; orders fail after ORDER_INTAKE_MAX_DELIVERIES deliveries.
+The status of every queued order is kept in Redis until the worker has
+written it, then it is read from the database.
+"""
+import decimal
+import json
+import random
+import string
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from checkout.payments import PaymentUnavailable, get_gateway
+from core.models import Link, Order, OrderItem, Product
+
+STREAM_KEY = 'order_intake'
+GROUP = 'order_writers'
+
+QUEUED = 'queued'
+CREATED = 'created'
+FAILED = 'failed'
+COMPLETE = 'complete'
+
+
+def status_key(transaction_id):
+    return f'order_status:{transaction_id}'
+
+
+def session_key(transaction_id):
+    return f'order_session:{transaction_id}'
+
+
+def generate_transaction_id():
+    """Return a random transaction id, like the ones of orders placed synchronously."""
+    return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(20))
+
+
+def enqueue_order(data):
+    """Queue validated order data and return its transaction id."""
+    transaction_id = generate_transaction_id()
+    pipe = get_redis_connection('default').pipeline(transaction=False)
+    pipe.set(status_key(transaction_id), QUEUED, ex=settings.ORDER_STATUS_TIMEOUT)
+    pipe.xadd(STREAM_KEY, {'transaction_id': transaction_id, 'order': json.dumps(data)})
+    pipe.execute()
+    return transaction_id
+
+
+def get_order_status(transaction_id):
+    """Return the status of an order, or None if there is no such order."""
+    value = get_redis_connection('default').get(status_key(transaction_id))
+    if value is not None and value.decode() != CREATED:
+        return value.decode()
+    complete = (Order.objects.filter(transaction_id=transaction_id)
+                .values_list('complete', flat=True).first())
+    if complete is None:
+        return None
+    return COMPLETE if complete else CREATED
+
+
+def get_order_session(transaction_id):
+    """Return the payment session id of a queued order, or None until it is created."""
+    value = get_redis_connection('default').get(session_key(transaction_id))
+    return value.decode() if value is not None else None
+
+
+def ensure_group(con):
+    """Create the stream and its consumer group if they do not exist."""
+    try:
+        con.xgroup_create(STREAM_KEY, GROUP, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def read_batch(con, consumer, count, block=None, pending=False, after='0'):
+    """Return up to `count` (entry id, fields) of the stream for `consumer`.
+       With `pending`, the entries after the id `after` it read before but
+       did not acknowledge."""
+    streams = con.xreadgroup(GROUP, consumer, {STREAM_KEY: after if pending else '>'},
+                             count=count, block=None if pending else block)
+    return streams[0][1] if streams else []
+
+
+def claim_batch(con, consumer, count):
+    """Claim up to `count` entries of any consumer that were not acknowledged
+       for ORDER_INTAKE_RETRY_AFTER seconds, e.g. orders waiting for the
+       payment provider, and return them."""
+    _, entries, *_ = con.xautoclaim(STREAM_KEY, GROUP, consumer,
+                                    min_idle_time=settings.ORDER_INTAKE_RETRY_AFTER * 1000,
+                                    start_id='0-0', count=count)
+    return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+
+def get_deliveries(con, entry_ids):
+    """Return how many times the pending entries were delivered, by entry id."""
+    pipe = con.pipeline(transaction=False)
+    for entry_id in entry_ids:
+        pipe.xpending_range(STREAM_KEY, GROUP, min=entry_id, max=entry_id, count=1)
+    return {entry_id: pending[0]['times_delivered'] if pending else 0
+            for entry_id, pending in zip(entry_ids, pipe.execute())}
+
+
+def write_orders(entries):
+    """Write the orders of stream entries in bulk and return their statuses
+       by transaction id. Orders that were already written are skipped, so
+       entries can be processed again after a crash."""
+    orders = {}
+    for _, fields in entries:
+        orders[fields[b'transaction_id'].decode()] = json.loads(fields[b'order'])
+
+    existing = set(Order.objects.filter(transaction_id__in=orders)
+                   .values_list('transaction_id', flat=True))
+    links = {link.code: link for link in
+             Link.objects.filter(code__in={data['code'] for data in orders.values()})
+             .select_related('user')}
+    products = Product.objects.in_bulk({item['product_id'] for data in orders.values()
+                                        for item in data['products']})
+
+    statuses, new_orders = {}, []
+    for transaction_id, data in orders.items():
+        if transaction_id in existing:
+            statuses[transaction_id] = CREATED
+            continue
+        link = links.get(data['code'])
+        if link is None or any(item['product_id'] not in products for item in data['products']):
+            statuses[transaction_id] = FAILED
+            continue
+        statuses[transaction_id] = CREATED
+        new_orders.append(Order(
+            transaction_id=transaction_id, code=link.code, user_id=link.user_id,
+            ambassador_email=link.user.email, first_name=data['first_name'],
+            last_name=data['last_name'], email=data['email'], address=data['address'],
+            country=data['country'], city=data['city'], zip_code=data['zip_code'],
+        ))
+
+    with transaction.atomic():
+        Order.objects.bulk_create(new_orders)
+        # MySQL does not return the ids of bulk created rows
+        order_ids = dict(Order.objects.filter(transaction_id__in=[o.transaction_id
+                                                                   for o in new_orders])
+                         .values_list('transaction_id', 'id'))
+        OrderItem.objects.bulk_create(
+            OrderItem(order_id=order_ids[order.transaction_id], product_title=product.title,
+                      price=product.price, quantity=item['quantity'],
+                      ambassador_revenue=decimal.Decimal(.1) * product.price * item['quantity'],
+                      admin_revenue=decimal.Decimal(.9) * product.price * item['quantity'])
+            for order in new_orders
+            for item in orders[order.transaction_id]['products']
+            for product in [products[item['product_id']]]
+        )
+    return statuses
+
+
+def create_sessions(statuses):
+    """Create the payment sessions of the written orders. Returns their ids by
+       transaction id and the transaction ids of the orders whose session was
+       not created because the provider is unavailable."""
+    created = [transaction_id for transaction_id, order_status in statuses.items()
+               if order_status == CREATED]
+    gateway = get_gateway()
+    sessions, unavailable = {}, []
+    for order in Order.objects.filter(transaction_id__in=created).prefetch_related('order_items'):
+        line_items = [{
+            'name': item.product_title,
+            'amount': int(100 * item.price),
+            'currency': 'usd',
+            'quantity': item.quantity
+        } for item in order.order_items.all()]
+        try:
+            sessions[order.transaction_id] = gateway.create_session(order, line_items)
+        except PaymentUnavailable:
+            unavailable.append(order.transaction_id)
+    return sessions, unavailable
+
+
+def process_batch(con, entries):
+    """Write the orders of stream entries and create their payment sessions,
+       then update their statuses and remove them from the stream. Entries
+       whose session could not be created stay pending and queued, to be
+       claimed again, until they were delivered ORDER_INTAKE_MAX_DELIVERIES
+       times; their orders are then deleted and fail."""
+    statuses = write_orders(entries)
+    sessions, unavailable = create_sessions(statuses)
+    entry_ids = {fields[b'transaction_id'].decode(): entry_id for entry_id, fields in entries}
+
+    if unavailable:
+        deliveries = get_deliveries(con, [entry_ids[t] for t in unavailable])
+        failed = []
+        for transaction_id in unavailable:
+            if deliveries[entry_ids[transaction_id]] < settings.ORDER_INTAKE_MAX_DELIVERIES:
+                statuses[transaction_id] = QUEUED
+            else:
+                statuses[transaction_id] = FAILED
+                failed.append(transaction_id)
+        Order.objects.filter(transaction_id__in=failed).delete()
+
+    pipe = con.pipeline(transaction=False)
+    for transaction_id, order_status in statuses.items():
+        if order_status != QUEUED:
+            pipe.set(status_key(transaction_id), order_status, ex=settings.ORDER_STATUS_TIMEOUT)
+    for transaction_id, session_id in sessions.items():
+        pipe.set(session_key(transaction_id), session_id, ex=settings.ORDER_STATUS_TIMEOUT)
+    ids = [entry_ids[transaction_id] for transaction_id, order_status in statuses.items()
+           if order_status != QUEUED]
+    if ids:
+        pipe.xack(STREAM_KEY, GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+    pipe.execute()
+    return statuses
@@ -0,0 +1,131 @@
+"""
+Payment gateways.
+
+OrderAPIView creates the payment session of an order through the gateway
+configured in settings.PAYMENT_GATEWAY, after the order is committed, so a
+slow provider never holds a database transaction open. Calls are bounded by
+PAYMENT_TIMEOUT and go through a circuit breaker: after
+PAYMENT_CIRCUIT_FAILURES failures in a row the provider is not called for
+PAYMENT_CIRCUIT_RESET seconds and checkouts fail fast instead. Queued
+orders get their session from the process_order_intake worker, see
+checkout/intake.py.
+"""
+import threading
+import time
+
+import stripe
+from django.conf import settings
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+from rest_framework import exceptions, status
+
+
+class PaymentUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Payment provider unavailable, try again later.'
+    default_code = 'payment_unavailable'
+
+
+class CircuitBreaker:
+    """Stop calling a failing service for `reset_timeout` seconds once it
+       failed `failure_threshold` times in a row. After that one call is let
+       through to test it, which closes the circuit if it succeeds."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def call(self, func, *args, **kwargs):
+        with self.lock:
+            if self.opened_at is not None:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise PaymentUnavailable()
+                # half open, calls keep failing fast while this one is tried
+                self.opened_at = time.monotonic()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self.lock:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+            raise
+
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+        return result
+
+
+class PaymentGateway:
+    """Base class of the payment gateways."""
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(settings.PAYMENT_CIRCUIT_FAILURES,
+                                      settings.PAYMENT_CIRCUIT_RESET)
+
+    def create_session(self, order, line_items):
+        """Create the payment session of an order and return its id, which
+           becomes the transaction id the provider confirms the order with."""
+        return self.breaker.call(self._create_session, order, line_items)
+
+    def _create_session(self, order, line_items):
+        raise NotImplementedError
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe Checkout, called through one reused HTTP session."""
+
+    def __init__(self):
+        super().__init__()
+        stripe.default_http_client = stripe.http_client.RequestsClient(
+            timeout=settings.PAYMENT_TIMEOUT
+        )
+        stripe.max_network_retries = 0
+
+    def _create_session(self, order, line_items):
+        # queued orders are confirmed with the transaction id they were queued with
+        source = order.transaction_id or '{CHECKOUT_SESSION_ID}'
+        try:
+            session = stripe.checkout.Session.create(
+                api_key=settings.STRIPE_API_KEY,
+                success_url=f'{settings.FRONTEND_URL}/checkout/success?source={source}',
+                cancel_url=f'{settings.FRONTEND_URL}/checkout/error',
+                payment_method_types=['card'],
+                line_items=line_items,
+                idempotency_key=f'order-{order.id}',
+            )
+        except stripe.error.StripeError as e:
+            raise PaymentUnavailable() from e
+        return session['id']
+
+
+class FakeGateway(PaymentGateway):
+    """Local gateway for tests and benchmarks, it returns random session ids
+       after PAYMENT_FAKE_DELAY seconds."""
+
+    def _create_session(self, order, line_items):
+        if settings.PAYMENT_FAKE_DELAY:
+            time.sleep(settings.PAYMENT_FAKE_DELAY)
+        return get_random_string(20)
+
+
+_gateway = None
+
+
+def get_gateway():
+    """Return the gateway configured in the settings, created once per process
+       so its HTTP client and circuit breaker are shared by all requests."""
+    global _gateway
+    gateway_class = import_string(settings.PAYMENT_GATEWAY)
+    if type(_gateway) is not gateway_class:
+        _gateway = gateway_class()
+    return _gateway
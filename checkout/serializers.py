@@ -1,6 +1,7 @@
 """
 Serializers for the checkout app.
 """
+from django.conf import settings
 from rest_framework import serializers
 
 from common.serializers import UserSerializer
@@ -23,3 +24,46 @@ class LinkSerializer(serializers.ModelSerializer):
     class Meta:
         model = Link
         fields = '__all__'
+
+
+class OrderProductSerializer(serializers.Serializer):
+    """Serializer for a product of a placed order."""
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderIntakeSerializer(serializers.Serializer):
+    """Serializer validating orders before they are queued."""
+    code = serializers.CharField(max_length=255)
+    first_name = serializers.CharField(max_length=255)
+    last_name = serializers.CharField(max_length=255)
+    email = serializers.EmailField(max_length=255)
+    address = serializers.CharField(max_length=255)
+    country = serializers.CharField(max_length=255)
+    city = serializers.CharField(max_length=255)
+    zip_code = serializers.CharField(max_length=10)
+    products = OrderProductSerializer(many=True, allow_empty=False)
+
+    def validate_code(self, code):
+        if not Link.objects.filter(code=code).exists():
+            raise serializers.ValidationError('Invalid code.')
+        return code
+
+    def validate_products(self, products):
+        ids = {item['product_id'] for item in products}
+        if Product.objects.filter(id__in=ids).count() != len(ids):
+            raise serializers.ValidationError('Invalid products.')
+        return products
+
+
+class BatchConfirmSerializer(serializers.Serializer):
+    """Serializer for confirming many orders at once."""
+    sources = serializers.ListField(child=serializers.CharField(max_length=255),
+                                    allow_empty=False)
+
+    def validate_sources(self, sources):
+        if len(sources) > settings.ORDER_CONFIRM_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'At most {settings.ORDER_CONFIRM_BATCH_MAX_SIZE} orders can be confirmed at once.'
+            )
+        return sources
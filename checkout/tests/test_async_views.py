@@ -0,0 +1,62 @@
+"""
+Tests for the async views of the checkout app.
+"""
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import path
+from django_redis import get_redis_connection
+
+from rest_framework.test import APIClient
+
+from checkout.async_views import AsyncLinkView
+from core.clicks import CLICKS_KEY
+from core.models import Link, Product
+
+urlpatterns = [
+    path('api/checkout/links/<str:code>/', AsyncLinkView.as_view()),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncLinkViewTests(TestCase):
+    """Tests for the async link view."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='user@example.com',
+                                                    password='password')
+        self.link = Link.objects.create(user=user, code='abc123')
+        for i in range(3):
+            self.link.products.add(Product.objects.create(title=f'Product {i}', price=10))
+
+    async def test_link_same_as_sync(self):
+        """Test that the async view returns what the sync view returns."""
+        res = await self.async_client.get('/api/checkout/links/abc123/')
+
+        self.assertEqual(res.status_code, 200)
+        sync_res = await sync_to_async(self.get_sync)('/api/checkout/links/abc123/')
+        self.assertEqual(json.loads(res.content), json.loads(sync_res.content))
+        self.assertEqual(len(json.loads(res.content)['products']), 3)
+
+    def test_link_queries(self):
+        """Test that the link, its user and products are fetched in two queries."""
+        with self.assertNumQueries(2):
+            async_to_sync(self.async_client.get)('/api/checkout/links/abc123/')
+
+    async def test_link_counts_clicks(self):
+        """Test that visits are counted in the same Redis hash as in the sync view."""
+        con = get_redis_connection('default')
+        con.delete(CLICKS_KEY)
+
+        await self.async_client.get('/api/checkout/links/abc123/')
+        await self.async_client.get('/api/checkout/links/unknown/')
+
+        self.assertEqual(con.hgetall(CLICKS_KEY), {b'abc123': b'1'})
+
+    @staticmethod
+    def get_sync(url):
+        """Return the response of the sync view."""
+        with override_settings(ROOT_URLCONF='ambassador_drf.urls'):
+            return APIClient().get(url)
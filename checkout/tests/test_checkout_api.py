@@ -2,15 +2,20 @@
 Tests for the checkout API.
 """
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django_redis import get_redis_connection
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Product, Link, Order, OrderItem
+from common.testing import query_budget
+from core.clicks import CLICKS_KEY
+from core.models import Product, Link, Order, OrderItem, DailyRevenue, LinkClicks
 
 ORDERS_URL = reverse('checkout:orders')
+CONFIRM_ORDER_URL = reverse('checkout:confirm-order')
 
 
 def create_product(**params):
@@ -41,6 +46,7 @@ class CheckoutAPITests(TestCase):
         )
         self.client.force_authenticate(self.user)
 
+    @query_budget(3)
     def test_fetching_links_success(self):
         """Test that fetching links works as expected."""
         link = Link.objects.create(
@@ -57,6 +63,20 @@ class CheckoutAPITests(TestCase):
         self.assertEqual(res.data['user']['email'], self.user.email)
         self.assertEqual(res.data['code'], link.code)
 
+    @query_budget(3)
+    def test_fetching_links_counts_clicks(self):
+        """Test that visits of existing links are counted in Redis, not in the database."""
+        Link.objects.create(user=self.user, code='abc123')
+        con = get_redis_connection('default')
+        con.delete(CLICKS_KEY)
+
+        self.client.get(get_links_url('abc123'))
+        self.client.get(get_links_url('abc123'))
+        self.client.get(get_links_url('unknown'))
+
+        self.assertEqual(con.hgetall(CLICKS_KEY), {b'abc123': b'2'})
+        self.assertFalse(LinkClicks.objects.exists())
+
     def test_links_endpoint_only_get_allowed(self):
         """Test that for the links endpoint only get is allowed."""
         url = get_links_url('abc123')
@@ -70,6 +90,7 @@ class CheckoutAPITests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(8)
     def test_place_order_success(self):
         """Test placing an order is successful."""
         link = Link.objects.create(
@@ -114,3 +135,23 @@ class CheckoutAPITests(TestCase):
         self.assertEqual(order_item.ambassador_revenue, 2.0)
         self.assertEqual(order_item.admin_revenue, 18.0)
 
+    @override_settings(ADMIN_EMAIL='admin@example.com')
+    def test_confirm_order(self):
+        """Test that confirming an order completes it and adds it to the daily revenue."""
+        order = Order.objects.create(transaction_id='tx123', user=self.user, code='abc123',
+                                     ambassador_email=self.user.email, first_name='John',
+                                     last_name='Doe', email='johndoe@example.com')
+        OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=2,
+                                 admin_revenue=18, ambassador_revenue=2)
+
+        res = self.client.post(CONFIRM_ORDER_URL, {'source': 'tx123'}, format='json')
+        self.client.post(CONFIRM_ORDER_URL, {'source': 'tx123'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        order.refresh_from_db()
+        self.assertTrue(order.complete)
+        rollup = DailyRevenue.objects.get()
+        self.assertEqual((rollup.user, rollup.code, rollup.orders), (self.user, 'abc123', 1))
+        self.assertEqual(rollup.ambassador_revenue, 2)
+        self.assertEqual(rollup.admin_revenue, 18)
+        self.assertEqual(len(mail.outbox), 4)
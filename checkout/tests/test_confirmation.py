@@ -0,0 +1,170 @@
+"""
+Tests for the batch order confirmation.
+"""
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_redis import get_redis_connection
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from checkout.confirmation import EMAIL_QUEUE_KEY
+from core.models import DailyRevenue, Order, OrderItem
+
+CONFIRM_BATCH_URL = reverse('checkout:confirm-orders-batch')
+
+
+@override_settings(ADMIN_EMAIL='admin@example.com', ORDER_CONFIRM_TOKEN='secret')
+class BatchConfirmOrderTests(TestCase):
+    """Tests for confirming orders in batches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        self.con = get_redis_connection('default')
+        self.con.delete(EMAIL_QUEUE_KEY)
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+
+    def create_orders(self, count, complete=False, start=0, links=None):
+        # the orders are spread over the (user, code) links round robin
+        links = links or [(self.user, 'abc123')]
+        orders = Order.objects.bulk_create(
+            Order(transaction_id=f'tx{i}', user=links[i % len(links)][0],
+                  code=links[i % len(links)][1], ambassador_email=links[i % len(links)][0].email,
+                  first_name='John', last_name='Doe', email='johndoe@example.com',
+                  complete=complete)
+            for i in range(start, start + count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product_title='Product', price=10, quantity=2,
+                      admin_revenue=18, ambassador_revenue=2)
+            for order in Order.objects.filter(transaction_id__in=[o.transaction_id
+                                                                  for o in orders])
+        )
+
+    def confirm(self, sources):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(CONFIRM_BATCH_URL, {'sources': sources}, format='json')
+
+    def test_confirm_orders(self):
+        """Test that only the orders that were not complete are confirmed and returned."""
+        self.create_orders(2)
+        self.create_orders(1, complete=True, start=2)
+
+        res = self.confirm(['tx0', 'tx1', 'tx2', 'unknown'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['confirmed'], ['tx0', 'tx1'])
+        self.assertEqual(Order.objects.filter(complete=True).count(), 3)
+        rollup = DailyRevenue.objects.get()
+        self.assertEqual((rollup.orders, rollup.admin_revenue, rollup.ambassador_revenue),
+                         (2, 36, 4))
+
+    def test_confirm_twice(self):
+        """Test that orders confirmed before are not confirmed or counted again."""
+        self.create_orders(2)
+        self.confirm(['tx0'])
+
+        res = self.confirm(['tx0', 'tx1'])
+
+        self.assertEqual(res.data['confirmed'], ['tx1'])
+        self.assertEqual(DailyRevenue.objects.get().orders, 2)
+
+    def test_emails_queued(self):
+        """Test that the emails are queued and sent by send_order_emails."""
+        self.create_orders(2)
+        self.confirm(['tx0', 'tx1'])
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(self.con.llen(EMAIL_QUEUE_KEY), 2)
+
+        call_command('send_order_emails', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(self.con.llen(EMAIL_QUEUE_KEY), 0)
+        self.assertEqual({tuple(m.to) for m in mail.outbox},
+                         {('admin@example.com',), ('user@example.com',)})
+        self.assertIn('You earned $2 from the link #abc123.', [m.body for m in mail.outbox])
+
+    def test_emails_kept_when_sending_fails(self):
+        """Test that queued emails stay queued when the mail server fails."""
+        self.create_orders(3)
+        self.confirm(['tx0', 'tx1', 'tx2'])
+
+        with mock.patch('checkout.confirmation.send_mass_mail',
+                        side_effect=[2, SMTPException]), self.assertRaises(SMTPException):
+            call_command('send_order_emails', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(self.con.lrange(EMAIL_QUEUE_KEY, 0, -1),
+                         [str(order.id).encode() for order in
+                          Order.objects.filter(transaction_id__in=['tx1', 'tx2']).order_by('id')])
+
+        call_command('send_order_emails', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(self.con.llen(EMAIL_QUEUE_KEY), 0)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_emails_sent_without_redis(self):
+        """Test that the emails are sent right away when the cache is not Redis."""
+        self.create_orders(1)
+        res = self.confirm(['tx0'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_queries_do_not_grow_with_batch(self):
+        """Test that the number of queries does not depend on the number of orders
+           and of the links they were placed with."""
+        users = [self.user] + [
+            get_user_model().objects.create_user(email=f'user{i}@example.com',
+                                                 password='password')
+            for i in range(2)
+        ]
+        links = [(users[i % len(users)], f'code{i}') for i in range(10)]
+        self.create_orders(115, links=links)
+        # creates the daily revenue row of the first link, which both batches update
+        self.confirm(['tx0'])
+        with CaptureQueriesContext(connection) as small:
+            self.confirm([f'tx{i}' for i in range(10, 12)])
+        with CaptureQueriesContext(connection) as large:
+            res = self.confirm([f'tx{i}' for i in range(15, 115)])
+
+        self.assertEqual(len(res.data['confirmed']), 100)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(DailyRevenue.objects.count(), 10)
+        self.assertEqual(DailyRevenue.objects.get(code='code0').orders, 12)
+        self.assertEqual(DailyRevenue.objects.filter(user=users[1]).aggregate(
+            total=Sum('ambassador_revenue'))['total'], 2 * 31)
+
+    def test_unauthorized(self):
+        """Test that batches are not confirmed without the confirmation token."""
+        self.create_orders(1)
+        for authorization in (None, 'Bearer wrong'):
+            self.client.credentials(**({'HTTP_AUTHORIZATION': authorization}
+                                       if authorization else {}))
+            res = self.confirm(['tx0'])
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(ORDER_CONFIRM_TOKEN=None):
+            res = self.confirm(['tx0'])
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Order.objects.filter(complete=True).exists())
+
+    @override_settings(ORDER_CONFIRM_BATCH_MAX_SIZE=2)
+    def test_invalid_batch(self):
+        """Test that empty and too large batches are rejected."""
+        for sources in ([], ['tx0', 'tx1', 'tx2']):
+            res = self.client.post(CONFIRM_BATCH_URL, {'sources': sources}, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,219 @@
+"""
+Tests for the asynchronous order intake.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from checkout import payments
+from checkout.intake import GROUP, STREAM_KEY, ensure_group, read_batch, write_orders
+from checkout.payments import PaymentUnavailable
+from core.models import Link, Order, OrderItem, Product
+
+ORDERS_URL = reverse('checkout:orders')
+CONFIRM_ORDER_URL = reverse('checkout:confirm-order')
+
+
+def get_status_url(transaction_id):
+    """Create and return an order status URL."""
+    return reverse('checkout:order-status', args=[transaction_id])
+
+
+@override_settings(ORDER_INTAKE_QUEUE=True, ADMIN_EMAIL='admin@example.com')
+class OrderIntakeTests(TestCase):
+    """Tests for placing orders through the intake queue."""
+
+    def setUp(self):
+        payments._gateway = None
+        self.client = APIClient()
+        self.con = get_redis_connection('default')
+        self.con.delete(STREAM_KEY)
+
+        user = get_user_model().objects.create_user(email='user@example.com',
+                                                    password='password')
+        Link.objects.create(user=user, code='abc123')
+        self.product = Product.objects.create(title='Product 1', price=10)
+
+    def place_order(self, **params):
+        data = {
+            'code': 'abc123',
+            'first_name': 'John',
+            'last_name': 'Doe',
+            'email': 'johndoe@example.com',
+            'address': '123 Main St',
+            'country': 'USA',
+            'city': 'New York',
+            'zip_code': '10001',
+            'products': [{'product_id': self.product.id, 'quantity': 2}],
+        }
+        data.update(params)
+        return self.client.post(ORDERS_URL, data, format='json')
+
+    @staticmethod
+    def process_orders():
+        call_command('process_order_intake', '--once', stdout=StringIO())
+
+    def test_order_queued(self):
+        """Test that a placed order is queued and not written by the request."""
+        res = self.place_order()
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], 'queued')
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.con.xlen(STREAM_KEY), 1)
+
+        res = self.client.get(get_status_url(res.data['transaction_id']))
+        self.assertEqual(res.data['status'], 'queued')
+
+    def test_invalid_order_rejected(self):
+        """Test that invalid orders are rejected before they are queued."""
+        for params in ({'code': 'invalid'}, {'products': [{'product_id': 999, 'quantity': 1}]},
+                       {'products': []}, {'email': 'invalid'}):
+            res = self.place_order(**params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(self.con.xlen(STREAM_KEY), 0)
+
+    def test_worker_writes_orders(self):
+        """Test that the worker writes queued orders and their items."""
+        transaction_id = self.place_order().data['transaction_id']
+        self.process_orders()
+
+        order = Order.objects.get(transaction_id=transaction_id)
+        self.assertEqual(order.ambassador_email, 'user@example.com')
+        self.assertEqual(order.zip_code, '10001')
+        item = OrderItem.objects.get(order=order)
+        self.assertEqual(item.product_title, 'Product 1')
+        self.assertEqual(item.quantity, 2)
+        self.assertEqual(item.ambassador_revenue, 2)
+        self.assertEqual(item.admin_revenue, 18)
+        self.assertEqual(self.con.xlen(STREAM_KEY), 0)
+
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'created')
+
+        self.client.post(CONFIRM_ORDER_URL, {'source': transaction_id}, format='json')
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'complete')
+
+    def test_worker_creates_payment_sessions(self):
+        """Test that the worker creates the payment sessions of the written orders."""
+        transaction_id = self.place_order().data['transaction_id']
+
+        def create_session(order, line_items):
+            self.assertEqual(order.transaction_id, transaction_id)
+            self.assertEqual(line_items, [{'name': 'Product 1', 'amount': 1000,
+                                           'currency': 'usd', 'quantity': 2}])
+            return 'cs_test'
+
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=create_session) as create:
+            self.process_orders()
+
+        create.assert_called_once()
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'created')
+        self.assertEqual(res.data['session_id'], 'cs_test')
+
+    @override_settings(PAYMENT_CIRCUIT_FAILURES=1)
+    def test_payment_unavailable(self):
+        """Test that orders stay queued while the payment provider is unavailable."""
+        transaction_ids = [self.place_order().data['transaction_id'] for _ in range(2)]
+
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=PaymentUnavailable) as create:
+            self.process_orders()
+
+        # the breaker opened after the first call and the second failed fast
+        create.assert_called_once()
+        self.assertTrue(payments.get_gateway().breaker.is_open)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(self.con.xpending(STREAM_KEY, GROUP)['pending'], 2)
+        for transaction_id in transaction_ids:
+            res = self.client.get(get_status_url(transaction_id))
+            self.assertEqual(res.data['status'], 'queued')
+            self.assertIsNone(res.data['session_id'])
+
+    @override_settings(PAYMENT_CIRCUIT_FAILURES=1, PAYMENT_CIRCUIT_RESET=0)
+    def test_payment_retried(self):
+        """Test that queued orders get their payment session once the provider recovers."""
+        transaction_id = self.place_order().data['transaction_id']
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=PaymentUnavailable):
+            self.process_orders()
+
+        # the entry is claimed again once it was idle long enough
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        return_value='cs_test'), \
+                override_settings(ORDER_INTAKE_RETRY_AFTER=0):
+            self.process_orders()
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.con.xlen(STREAM_KEY), 0)
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'created')
+        self.assertEqual(res.data['session_id'], 'cs_test')
+
+    @override_settings(ORDER_INTAKE_MAX_DELIVERIES=2)
+    def test_payment_unavailable_failed(self):
+        """Test that orders fail after the maximum number of deliveries."""
+        transaction_id = self.place_order().data['transaction_id']
+
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=PaymentUnavailable) as create:
+            self.process_orders()
+            self.assertTrue(Order.objects.exists())
+            with override_settings(ORDER_INTAKE_RETRY_AFTER=0):
+                self.process_orders()
+
+        self.assertEqual(create.call_count, 2)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.con.xlen(STREAM_KEY), 0)
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'failed')
+
+    def test_orders_written_in_bulk(self):
+        """Test that the number of queries does not depend on the number of orders."""
+        for _ in range(5):
+            self.place_order()
+        ensure_group(self.con)
+        entries = read_batch(self.con, 'test', 10)
+
+        with self.assertNumQueries(8):
+            write_orders(entries)
+        self.assertEqual(Order.objects.count(), 5)
+        self.assertEqual(OrderItem.objects.count(), 5)
+
+    def test_order_failed(self):
+        """Test that orders whose link was deleted after they were queued fail."""
+        transaction_id = self.place_order().data['transaction_id']
+        Link.objects.all().delete()
+        self.process_orders()
+
+        self.assertFalse(Order.objects.exists())
+        res = self.client.get(get_status_url(transaction_id))
+        self.assertEqual(res.data['status'], 'failed')
+
+    def test_pending_orders_retried(self):
+        """Test that orders read by a worker that crashed are written by the next run."""
+        transaction_id = self.place_order().data['transaction_id']
+        ensure_group(self.con)
+        read_batch(self.con, 'worker', 10)
+
+        call_command('process_order_intake', '--once', '--consumer', 'worker', stdout=StringIO())
+
+        self.assertTrue(Order.objects.filter(transaction_id=transaction_id).exists())
+
+    def test_status_not_found(self):
+        """Test that the status of unknown orders is not found."""
+        res = self.client.get(get_status_url('unknown'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,161 @@
+"""
+Tests for the payment gateways.
+"""
+from unittest import mock
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from checkout import payments
+from checkout.payments import CircuitBreaker, PaymentUnavailable, StripeGateway
+from core.models import Link, Order, Product
+
+ORDERS_URL = reverse('checkout:orders')
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Tests for CircuitBreaker."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        self.failing = mock.Mock(side_effect=ValueError)
+
+    def test_opens_after_failures(self):
+        """Test that the circuit opens after failures in a row and then fails fast."""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(self.failing)
+
+        self.assertTrue(self.breaker.is_open)
+        with self.assertRaises(PaymentUnavailable):
+            self.breaker.call(self.failing)
+        self.assertEqual(self.failing.call_count, 2)
+
+    def test_success_resets_failures(self):
+        """Test that only failures in a row open the circuit."""
+        with self.assertRaises(ValueError):
+            self.breaker.call(self.failing)
+        self.breaker.call(mock.Mock())
+        with self.assertRaises(ValueError):
+            self.breaker.call(self.failing)
+
+        self.assertFalse(self.breaker.is_open)
+
+    @mock.patch('checkout.payments.time.monotonic')
+    def test_half_open(self, monotonic):
+        """Test that one call is tried after the reset timeout and closes the circuit."""
+        monotonic.return_value = 100
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(self.failing)
+
+        monotonic.return_value = 131
+        self.assertEqual(self.breaker.call(mock.Mock(return_value='ok')), 'ok')
+        self.assertFalse(self.breaker.is_open)
+
+    @mock.patch('checkout.payments.time.monotonic')
+    def test_half_open_failure(self, monotonic):
+        """Test that a failed trial call opens the circuit again."""
+        monotonic.return_value = 100
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(self.failing)
+
+        monotonic.return_value = 131
+        with self.assertRaises(ValueError):
+            self.breaker.call(self.failing)
+        monotonic.return_value = 150
+        with self.assertRaises(PaymentUnavailable):
+            self.breaker.call(self.failing)
+
+
+@override_settings(STRIPE_API_KEY='sk_test', PAYMENT_TIMEOUT=3)
+class StripeGatewayTests(SimpleTestCase):
+    """Tests for StripeGateway."""
+
+    def test_http_client(self):
+        """Test that Stripe is called through a client with the timeout and no retries."""
+        StripeGateway()
+
+        self.assertIsInstance(stripe.default_http_client, stripe.http_client.RequestsClient)
+        self.assertEqual(stripe.default_http_client._timeout, 3)
+        self.assertEqual(stripe.max_network_retries, 0)
+
+    @mock.patch('stripe.checkout.Session.create', return_value={'id': 'cs_test'})
+    def test_create_session(self, create):
+        """Test that the session id is returned."""
+        order = Order(id=1)
+
+        self.assertEqual(StripeGateway().create_session(order, []), 'cs_test')
+        self.assertEqual(create.call_args.kwargs['api_key'], 'sk_test')
+        self.assertEqual(create.call_args.kwargs['idempotency_key'], 'order-1')
+        self.assertTrue(create.call_args.kwargs['success_url']
+                        .endswith('?source={CHECKOUT_SESSION_ID}'))
+
+    @mock.patch('stripe.checkout.Session.create', return_value={'id': 'cs_test'})
+    def test_create_session_queued_order(self, create):
+        """Test that queued orders are confirmed with their transaction id."""
+        StripeGateway().create_session(Order(id=1, transaction_id='queued123'), [])
+
+        self.assertTrue(create.call_args.kwargs['success_url'].endswith('?source=queued123'))
+
+    @mock.patch('stripe.checkout.Session.create', side_effect=stripe.error.APIConnectionError(''))
+    def test_provider_error(self, _):
+        """Test that provider errors are raised as PaymentUnavailable."""
+        with self.assertRaises(PaymentUnavailable):
+            StripeGateway().create_session(Order(id=1), [])
+
+
+class PlaceOrderPaymentTests(TestCase):
+    """Tests for creating the payment session of placed orders."""
+
+    def setUp(self):
+        payments._gateway = None
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(email='user@example.com',
+                                                    password='password')
+        Link.objects.create(user=user, code='abc123')
+        product = Product.objects.create(title='Product 1', price=10)
+        self.data = {
+            'code': 'abc123', 'first_name': 'John', 'last_name': 'Doe',
+            'email': 'johndoe@example.com', 'address': '123 Main St', 'country': 'USA',
+            'city': 'New York', 'zip_code': '10001',
+            'products': [{'product_id': product.id, 'quantity': 2}],
+        }
+
+    def test_session_created_after_commit(self):
+        """Test that the provider is called outside the order transaction."""
+        savepoints = list(connection.savepoint_ids)
+
+        def create_session(order, line_items):
+            # only the transactions of the test case are open
+            self.assertEqual(connection.savepoint_ids, savepoints)
+            self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+            self.assertEqual(line_items[0]['amount'], 1000)
+            return 'cs_test'
+
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=create_session):
+            res = self.client.post(ORDERS_URL, self.data, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, 'cs_test')
+        self.assertEqual(Order.objects.get().transaction_id, 'cs_test')
+
+    @override_settings(PAYMENT_CIRCUIT_FAILURES=1)
+    def test_provider_unavailable(self):
+        """Test that the checkout fails fast while the provider is down."""
+        with mock.patch('checkout.payments.FakeGateway._create_session',
+                        side_effect=PaymentUnavailable) as create_session:
+            for _ in range(2):
+                res = self.client.post(ORDERS_URL, self.data, format='json')
+                self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        create_session.assert_called_once()
+        self.assertFalse(Order.objects.exists())
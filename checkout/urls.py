@@ -1,13 +1,22 @@
 """
 URL mappings for the checkout app.
 """
+from django.conf import settings
 from django.urls import path
-from .views import LinkAPIView, OrderAPIView, ConfirmOrderAPIView
+from .async_views import AsyncLinkView
+from .views import (LinkAPIView, OrderAPIView, OrderStatusAPIView, ConfirmOrderAPIView,
+                    BatchConfirmOrderAPIView)
 
 app_name = 'checkout'
 
+link_view = AsyncLinkView if settings.ASYNC_VIEWS else LinkAPIView
+
 urlpatterns = [
-    path('links/<str:code>/', LinkAPIView.as_view(), name='links'),
+    path('links/<str:code>/', link_view.as_view(), name='links'),
     path('orders/', OrderAPIView.as_view(), name='orders'),
     path('orders/confirm/', ConfirmOrderAPIView.as_view(), name='confirm-order'),
+    path('orders/confirm/batch/', BatchConfirmOrderAPIView.as_view(),
+         name='confirm-orders-batch'),
+    path('orders/<str:transaction_id>/status/', OrderStatusAPIView.as_view(),
+         name='order-status'),
 ]
@@ -2,10 +2,8 @@
 Views for the checkout app.
 """
 import decimal
-import random
-import string
+import hmac
 
-import stripe
 from django.conf import settings
 from django.db import transaction
 from django.core.mail import send_mail
@@ -13,8 +11,15 @@ from rest_framework import status, exceptions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from checkout.serializers import LinkSerializer
+from checkout.confirmation import confirm_orders
+from checkout.intake import enqueue_order, get_order_session, get_order_status
+from checkout.payments import PaymentUnavailable, get_gateway
+from checkout.serializers import (LinkSerializer, OrderIntakeSerializer,
+                                  BatchConfirmSerializer)
+from common.throttling import TokenBucketThrottle
+from core.clicks import record_click
 from core.models import Link, Order, Product, OrderItem
+from core.revenue import record_orders
 
 
 class LinkAPIView(APIView):
@@ -23,16 +28,55 @@ class LinkAPIView(APIView):
 
     def get(self, _, code=''):
         link = Link.objects.filter(code=code).first()
+        if link is not None:
+            record_click(code)
         serializer = self.serializer_class(link)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class OrderAPIView(APIView):
     """API View for placing orders."""
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'checkout'
 
-    @transaction.atomic
     def post(self, request):
-        data = request.data
+        if settings.ORDER_INTAKE_QUEUE:
+            return self.enqueue(request)
+        return self.create(request)
+
+    @staticmethod
+    def enqueue(request):
+        """Validate the order and queue it for the process_order_intake worker."""
+        serializer = OrderIntakeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transaction_id = enqueue_order(serializer.validated_data)
+        return Response({'transaction_id': transaction_id, 'status': 'queued'},
+                        status=status.HTTP_202_ACCEPTED)
+
+    def create(self, request):
+        order, line_items = self.save_order(request.data)
+        if order is None:
+            return Response({
+                'message': 'Error occurred while creating an Order or OrderItem'
+            })
+
+        # the provider is called once the order is committed, so a slow
+        # provider does not hold the transaction open
+        try:
+            transaction_id = get_gateway().create_session(order, line_items)
+        except PaymentUnavailable:
+            # an order without a payment session can never be confirmed
+            order.delete()
+            raise
+        Order.objects.filter(pk=order.pk).update(transaction_id=transaction_id)
+
+        return Response(transaction_id, status=status.HTTP_200_OK)
+
+    @staticmethod
+    @transaction.atomic
+    def save_order(data):
+        """Save the order and its items and return it with the line items
+           of its payment session."""
         link = Link.objects.filter(code=data['code']).first()
 
         if not link:
@@ -77,42 +121,39 @@ class OrderAPIView(APIView):
                     'quantity': quantity
                 })
 
-            stripe.api_key = settings.STRIPE_API_KEY
-
-            # source = stripe.checkout.Session.create(
-            #     success_url=f'{settings.FRONTEND_URL}/checkout/success?source={CHECKOUT_SESSION_ID}',
-            #     cancel_url=f'{settings.FRONTEND_URL}/checkout/error',
-            #     payment_method_types=['card'],
-            #     line_items=line_items
-            # )
-            # order.transaction_id = source['id']
+            return order, line_items
 
-            random_chars = [random.choice(string.ascii_letters + string.digits) for _ in range(20)]
-            random_string = ''.join(random_chars)
+        except Exception:
+            transaction.rollback()
 
-            order.transaction_id = random_string
-            order.save()
+        return None, None
 
-            return Response(random_string, status=status.HTTP_200_OK)
 
-        except Exception:
-            transaction.rollback()
+class OrderStatusAPIView(APIView):
+    """API View for polling the status of placed orders."""
 
-        return Response({
-            'message': 'Error occurred while creating an Order or OrderItem'
-        })
+    def get(self, _, transaction_id=''):
+        order_status = get_order_status(transaction_id)
+        if order_status is None:
+            raise exceptions.NotFound('Order not found.')
+        return Response({'transaction_id': transaction_id, 'status': order_status,
+                         'session_id': get_order_session(transaction_id)},
+                        status=status.HTTP_200_OK)
 
 
 class ConfirmOrderAPIView(APIView):
     """API View for confirming orders."""
 
     def post(self, request):
-        order = Order.objects.filter(transaction_id=request.data['source']).firtst()
+        order = Order.objects.filter(transaction_id=request.data['source']).first()
         if not order:
             raise exceptions.APIException('Order not found.')
 
+        with transaction.atomic():
+            # only the request that completes the order adds it to the revenue
+            if Order.objects.filter(pk=order.pk, complete=False).update(complete=True):
+                record_orders([order.pk])
         order.complete = True
-        order.save()
 
         # To admin
         send_mail(
@@ -133,3 +174,20 @@ class ConfirmOrderAPIView(APIView):
         return Response({
             'message': 'Success!'
         }, status=status.HTTP_200_OK)
+
+
+class BatchConfirmOrderAPIView(APIView):
+    """API View for confirming many orders at once."""
+    serializer_class = BatchConfirmSerializer
+    authentication_classes = ()
+
+    def post(self, request):
+        token = settings.ORDER_CONFIRM_TOKEN
+        authorization = request.headers.get('Authorization', '').encode()
+        if not token or not hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+            raise exceptions.PermissionDenied()
+
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        confirmed = confirm_orders(serializer.validated_data['sources'])
+        return Response({'confirmed': confirmed}, status=status.HTTP_200_OK)
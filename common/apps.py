@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def install_query_wrappers(sender, connection, **kwargs):
+    """Let the request metrics and the profiler see the queries of every
+       connection, including those the async ORM runs in worker threads."""
+    from common import metrics, profiling
+
+    for wrapper in (metrics.query_wrapper, profiling.query_wrapper):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
 
 
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        connection_created.connect(install_query_wrappers)
@@ -0,0 +1,22 @@
+"""
+Asyncio Redis client for the async views.
+"""
+import asyncio
+import weakref
+
+from django.conf import settings
+from redis import asyncio as aioredis
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis():
+    """Return the Redis client of the running event loop.
+       Async connections are bound to the loop that opened them, so every
+       loop gets its own client (under uvicorn there is one loop per worker)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(settings.ASYNC_REDIS_URL, **settings.ASYNC_REDIS_OPTIONS)
+        _clients[loop] = client
+    return client
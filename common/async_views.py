@@ -0,0 +1,38 @@
+"""
+Base view for the async endpoints served under ASGI.
+
+DRF views are synchronous, so the async endpoints are plain Django views.
+They authenticate with JWTAuthentication and render with the renderer of
+the DRF views, so their responses are the same as those of the sync views.
+"""
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+
+from common.authentication import JWTAuthentication
+from common.renderers import CamelCaseJSONRenderer
+
+
+class AsyncAPIView(View):
+    """Async view returning JSON like an APIView.
+       With `authenticated = True` a JWT is required, like IsAuthenticated."""
+    authenticated = False
+    renderer_class = CamelCaseJSONRenderer
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authenticated:
+            try:
+                result = await JWTAuthentication().aauthenticate(request)
+            except AuthenticationFailed as exc:
+                return self.render({'detail': exc.detail}, status.HTTP_403_FORBIDDEN)
+            if result is None:
+                return self.render({'detail': NotAuthenticated.default_detail},
+                                   status.HTTP_403_FORBIDDEN)
+            request.user = result[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        """Return `data` rendered as JSON."""
+        return HttpResponse(self.renderer_class().render(data), status=status_code,
+                            content_type='application/json')
@@ -11,6 +11,30 @@ class JWTAuthentication(BaseAuthentication):
 
     def authenticate(self, request):
         """Authenticates a user."""
+        payload = self.get_payload(request)
+        if payload is None:
+            return None
+
+        user = get_user_model().objects.get(id=payload['user_id'])
+        if user is None:
+            raise AuthenticationFailed('User does not exist.')
+        return user, None
+
+    async def aauthenticate(self, request):
+        """Authenticates a user in async views."""
+        payload = self.get_payload(request)
+        if payload is None:
+            return None
+
+        try:
+            user = await get_user_model().objects.aget(id=payload['user_id'])
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed('User does not exist.')
+        return user, None
+
+    @staticmethod
+    def get_payload(request):
+        """Returns the payload of the JWT cookie, checking its scope."""
         is_ambassador = 'api/ambassador/' in request.path
 
         token = request.COOKIES.get('jwt')
@@ -25,11 +49,7 @@ class JWTAuthentication(BaseAuthentication):
         if ((is_ambassador and payload['scope'] != 'ambassador') or (
                 is_ambassador is False and payload['scope'] != 'admin')):
             raise AuthenticationFailed('Invalid scope!')
-
-        user = get_user_model().objects.get(id=payload['user_id'])
-        if user is None:
-            raise AuthenticationFailed('User does not exist.')
-        return user, None
+        return payload
 
     @staticmethod
     def generate_jwt(user_id, scope):
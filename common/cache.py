@@ -0,0 +1,44 @@
+"""
+Cache backends that report their hits, misses and time to common.metrics.
+"""
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+from common.metrics import track_cache
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Times every cache call and counts the hits and misses of reads."""
+
+    def get(self, key, default=None, *args, **kwargs):
+        with track_cache() as result:
+            value = super().get(key, _MISSING, *args, **kwargs)
+            hit = value is not _MISSING
+            result[0 if hit else 1] += 1
+        return value if hit else default
+
+    def get_many(self, keys, *args, **kwargs):
+        keys = list(keys)
+        with track_cache() as result:
+            values = super().get_many(keys, *args, **kwargs)
+            result[0] += len(values)
+            result[1] += len(keys) - len(values)
+        return values
+
+    def set(self, *args, **kwargs):
+        with track_cache():
+            return super().set(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with track_cache():
+            return super().delete(*args, **kwargs)
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """django-redis cache backend with metrics."""
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    """Local-memory cache backend with metrics."""
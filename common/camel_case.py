@@ -0,0 +1,138 @@
+"""
+Memoized camelCase helpers shared by the renderers, parsers and middleware.
+They produce the same output as djangorestframework_camel_case.util
+but convert every distinct key only once per process.
+"""
+import re
+from functools import lru_cache
+from itertools import islice
+
+from django.http import QueryDict
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.settings import api_settings
+from djangorestframework_camel_case.util import (camelize_re, underscore_to_camel,
+                                                 get_underscoreize_re)
+
+KEY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def camelize_key(key):
+    """Return the camelCase version of a snake_case key."""
+    return re.sub(camelize_re, underscore_to_camel, key)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def underscore_key(key, no_underscore_before_number=False):
+    """Return the snake_case version of a camelCase key."""
+    pattern = get_underscoreize_re({'no_underscore_before_number': no_underscore_before_number})
+    return pattern.sub(r'\1_\2', key).lower()
+
+
+def _convert_key(key):
+    """Convert a single key, skipping the cache when there is nothing to do."""
+    if isinstance(key, Promise):
+        key = force_str(key)
+    if isinstance(key, str) and '_' in key:
+        return key, camelize_key(key)
+    return key, key
+
+
+def camelize(data, ignore_fields=None, ignore_keys=None, **_):
+    """Camelize dictionary keys recursively.
+       Dicts are rebuilt as plain dicts and lists, which every JSON
+       encoder serializes natively."""
+    ignore_fields = ignore_fields or ()
+    ignore_keys = ignore_keys or ()
+
+    def convert(value):
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                key, new_key = _convert_key(key)
+                if ignore_fields and (key in ignore_fields or new_key in ignore_fields):
+                    converted = item
+                else:
+                    converted = convert(item)
+                if ignore_keys and (key in ignore_keys or new_key in ignore_keys):
+                    result[key] = converted
+                else:
+                    result[new_key] = converted
+            return result
+        if isinstance(value, (list, tuple)):
+            return [convert(item) for item in value]
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        if isinstance(value, Promise):
+            return force_str(value)
+        try:
+            iterator = iter(value)
+        except TypeError:
+            return value
+        return [convert(item) for item in iterator]
+
+    return convert(data)
+
+
+def underscoreize(data, no_underscore_before_number=False,
+                  ignore_fields=None, ignore_keys=None, **_):
+    """Underscoreize dictionary keys recursively.
+       Containers whose keys are already snake_case are returned as they are,
+       so payloads sent in snake_case are not copied at all."""
+    ignore_fields = ignore_fields or ()
+    ignore_keys = ignore_keys or ()
+
+    def new_key_for(key):
+        if not isinstance(key, str):
+            return key
+        new_key = underscore_key(key, no_underscore_before_number)
+        if ignore_keys and (key in ignore_keys or new_key in ignore_keys):
+            return key
+        return new_key
+
+    def convert(value):
+        if isinstance(value, QueryDict):
+            return convert_query_dict(value)
+        if isinstance(value, dict):
+            # Only start copying once the first key or value actually changes.
+            result = None if type(value) is dict else {}
+            for index, (key, item) in enumerate(value.items()):
+                new_key = new_key_for(key)
+                if ignore_fields and (key in ignore_fields or new_key in ignore_fields):
+                    converted = item
+                else:
+                    converted = convert(item)
+                if result is None and (new_key != key or converted is not item):
+                    result = dict(islice(value.items(), index))
+                if result is not None:
+                    result[new_key] = converted
+            return value if result is None else result
+        if isinstance(value, list):
+            result = None
+            for index, item in enumerate(value):
+                converted = convert(item)
+                if result is None and converted is not item:
+                    result = value[:index]
+                if result is not None:
+                    result.append(converted)
+            return value if result is None else result
+        if isinstance(value, tuple):
+            return [convert(item) for item in value]
+        return value
+
+    def convert_query_dict(query):
+        new_keys = [(key, new_key_for(key)) for key in query]
+        if all(key == new_key for key, new_key in new_keys):
+            return query
+        result = QueryDict(mutable=True)
+        for key, new_key in new_keys:
+            result.setlist(new_key, query.getlist(key))
+        return result
+
+    return convert(data)
+
+
+def camelize_options():
+    """Return the JSON_CAMEL_CASE options configured for the project."""
+    return api_settings.JSON_UNDERSCOREIZE
@@ -0,0 +1,76 @@
+"""
+Response compression helpers.
+Brotli is used when the `brotli` package is installed, gzip otherwise.
+"""
+import gzip
+import re
+from functools import wraps
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+re_accept_encoding = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q=([0-9.]+))?')
+
+
+def supported_encodings():
+    """Return the supported content encodings, preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(content, encoding):
+    """Compress `content` with the given content encoding."""
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def get_accepted_encoding(request):
+    """Return the best encoding accepted by the client or None."""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = set()
+    for match in re_accept_encoding.finditer(header):
+        encoding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.lower())
+
+    for encoding in supported_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def precompress(response):
+    """Store every compressed variant of a rendered response on it.
+       When the response is cached afterwards, the variants are cached
+       with it and CompressionMiddleware does not compress it again."""
+    content = response.content
+    if response.status_code != 200 or len(content) < settings.COMPRESSION_MIN_SIZE:
+        return response
+    response.compressed_content = {
+        encoding: compress(content, encoding) for encoding in supported_encodings()
+    }
+    return response
+
+
+def precompressed(view_func):
+    """Decorator that precompresses the response of a view once it is rendered.
+       It has to be applied below cache_page, so it runs before the response is cached."""
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        response = view_func(*args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(precompress)
+        else:
+            precompress(response)
+        return response
+
+    return wrapper
@@ -0,0 +1,96 @@
+"""
+Routing of read-only requests to the read replica.
+
+Views that only read mix in ReplicaReadMixin, which makes the ORM read from
+settings.REPLICA_DATABASE for the duration of their safe (GET/HEAD/OPTIONS)
+requests. Everything else, writes, reads in transaction.atomic blocks and
+reads of clients that wrote less than REPLICA_PIN_SECONDS ago (see
+ReplicaPinMiddleware), goes to the primary, as do all reads while the replica
+lags more than REPLICA_MAX_LAG seconds behind it.
+"""
+import contextlib
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Set by responses to writes, reads of clients sending it go to the primary
+PIN_COOKIE = 'pin_primary'
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+_lag_checks = {}
+
+
+def get_replication_lag(alias):
+    """Return how many seconds the replica is behind the primary,
+       or None if it is not replicating."""
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW SLAVE STATUS')
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description or ()]
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    return dict(zip(columns, row)).get('Seconds_Behind_Master')
+
+
+def is_replica_fresh(alias):
+    """Whether the replica lags at most REPLICA_MAX_LAG seconds behind.
+       The lag is checked at most once per REPLICA_LAG_CHECK_INTERVAL seconds."""
+    now = time.monotonic()
+    checked_at, fresh = _lag_checks.get(alias, (None, False))
+    if checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        lag = get_replication_lag(alias)
+        fresh = lag is not None and lag <= settings.REPLICA_MAX_LAG
+        _lag_checks[alias] = (now, fresh)
+    return fresh
+
+
+@contextlib.contextmanager
+def use_replica():
+    """Read from the replica inside the block."""
+    token = read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+def is_pinned(request):
+    """Whether the client wrote recently and must read from the primary."""
+    return PIN_COOKIE in request.COOKIES
+
+
+class ReplicaRouter:
+    """Send the reads of ReplicaReadMixin views to the replica."""
+
+    def db_for_read(self, model, **hints):
+        replica = settings.REPLICA_DATABASE
+        if (replica is None or not read_from_replica.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return replica if is_replica_fresh(replica) else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """Serve the safe requests of a view from the replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_pinned(request):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replica():
+            return super().dispatch(request, *args, **kwargs)
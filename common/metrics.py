@@ -0,0 +1,266 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware collects the metrics of every request in a RequestMetrics
+object, sends them in the Server-Timing header and aggregates them in
+a metrics store shared by all workers. MetricsView exposes the aggregates
+in the Prometheus text format.
+"""
+import glob
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django_redis import get_redis_connection
+from django_redis.cache import RedisCache
+from redis.exceptions import RedisError
+
+from common.async_redis import get_async_redis
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRIC_TYPES = {
+    'http_request_duration_seconds': 'histogram',
+    'http_requests_total': 'counter',
+    'db_queries_total': 'counter',
+    'db_query_duration_seconds_total': 'counter',
+    'cache_hits_total': 'counter',
+    'cache_misses_total': 'counter',
+    'cache_duration_seconds_total': 'counter',
+}
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters collected while a single request is handled."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+
+    def finish(self):
+        """Stop the request timer."""
+        self.duration = time.perf_counter() - self.start
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook that counts and times queries."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+    def server_timing(self):
+        """Return the value of the Server-Timing header."""
+        return ', '.join([
+            f'total;dur={self.duration * 1000:.2f}',
+            f'db;desc="{self.queries} queries";dur={self.query_time * 1000:.2f}',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}";'
+            f'dur={self.cache_time * 1000:.2f}',
+        ])
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper of every database connection (see CommonConfig.ready).
+       Queries are counted in the metrics of the request that runs them."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.query_wrapper(execute, sql, params, many, context)
+
+
+@contextmanager
+def track_cache(hits=0, misses=0):
+    """Time a cache operation of the current request and count hits and misses.
+       The yielded list can be used to report hits and misses found inside the block."""
+    result = [hits, misses]
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.cache_time += time.perf_counter() - start
+            metrics.cache_hits += result[0]
+            metrics.cache_misses += result[1]
+
+
+def format_labels(**labels):
+    """Format Prometheus labels."""
+    values = ','.join(f'{name}="{value}"' for name, value in labels.items())
+    return f'{{{values}}}'
+
+
+def get_samples(view, method, status_code, metrics):
+    """Return the counter increments for one finished request."""
+    samples = Counter()
+    labels = format_labels(view=view, method=method)
+    for bucket in LATENCY_BUCKETS:
+        if metrics.duration <= bucket:
+            samples[f'http_request_duration_seconds_bucket'
+                    f'{format_labels(view=view, method=method, le=bucket)}'] += 1
+    samples[f'http_request_duration_seconds_bucket'
+            f'{format_labels(view=view, method=method, le="+Inf")}'] += 1
+    samples[f'http_request_duration_seconds_sum{labels}'] += metrics.duration
+    samples[f'http_request_duration_seconds_count{labels}'] += 1
+    samples[f'http_requests_total{format_labels(view=view, method=method, status=status_code)}'] += 1
+
+    view_label = format_labels(view=view)
+    samples[f'db_queries_total{view_label}'] += metrics.queries
+    samples[f'db_query_duration_seconds_total{view_label}'] += metrics.query_time
+    samples[f'cache_hits_total{view_label}'] += metrics.cache_hits
+    samples[f'cache_misses_total{view_label}'] += metrics.cache_misses
+    samples[f'cache_duration_seconds_total{view_label}'] += metrics.cache_time
+    return samples
+
+
+class RedisMetricsStore:
+    """Keeps the aggregated samples in a Redis hash shared by all workers."""
+    key = 'metrics'
+
+    def record(self, samples):
+        """Add the samples in a single round trip."""
+        try:
+            pipe = get_redis_connection('default').pipeline(transaction=False)
+            for name, value in samples.items():
+                if value:
+                    pipe.hincrbyfloat(self.key, name, value)
+            pipe.execute()
+        except RedisError:
+            pass
+
+    async def arecord(self, samples):
+        """Add the samples with the async client."""
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            for name, value in samples.items():
+                if value:
+                    pipe.hincrbyfloat(self.key, name, value)
+            await pipe.execute()
+        except RedisError:
+            pass
+
+    def collect(self):
+        """Return all the aggregated samples."""
+        values = get_redis_connection('default').hgetall(self.key)
+        return {name.decode(): float(value) for name, value in values.items()}
+
+
+class MemoryMetricsStore:
+    """Keeps the samples in memory, for a single process without Redis,
+       e.g. the benchmarks with the local-memory cache."""
+
+    def __init__(self):
+        self.samples = Counter()
+
+    def record(self, samples):
+        """Add the samples."""
+        self.samples.update(samples)
+
+    async def arecord(self, samples):
+        """Add the samples."""
+        self.record(samples)
+
+    def collect(self):
+        """Return all the samples."""
+        return dict(self.samples)
+
+
+class FileMetricsStore:
+    """Keeps the samples of each process in memory and writes them to a
+       per-process file in `directory`, which are summed when collected."""
+
+    def __init__(self, directory, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.samples = Counter()
+        self.last_flush = 0.0
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'metrics_{os.getpid()}.json')
+
+    def record(self, samples):
+        """Add the samples and flush them if the interval has passed."""
+        self.samples.update(samples)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    async def arecord(self, samples):
+        """Add the samples, the file is small enough to be written inline."""
+        self.record(samples)
+
+    def flush(self):
+        """Write the samples of this process to its file."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.samples, file)
+        os.replace(tmp_path, self.path)
+        self.last_flush = time.monotonic()
+
+    def collect(self):
+        """Return the samples of all processes."""
+        self.flush()
+        total = Counter()
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            try:
+                with open(path) as file:
+                    total.update(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return dict(total)
+
+
+_store = None
+
+
+def get_store():
+    """Return the metrics store configured in the settings. Without
+       METRICS_MULTIPROC_DIR the samples are shared through the Redis cache,
+       or kept in memory when the cache is not django-redis."""
+    global _store
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory:
+        if not isinstance(_store, FileMetricsStore) or _store.directory != directory:
+            _store = FileMetricsStore(directory)
+        return _store
+    if not isinstance(caches['default'], RedisCache):
+        if not isinstance(_store, MemoryMetricsStore):
+            _store = MemoryMetricsStore()
+        return _store
+    if not isinstance(_store, RedisMetricsStore):
+        _store = RedisMetricsStore()
+    return _store
+
+
+def format_value(value):
+    """Format a sample value, without exponents for whole numbers."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_metrics(samples):
+    """Render samples in the Prometheus text exposition format."""
+    lines = []
+    for family, metric_type in METRIC_TYPES.items():
+        names = sorted(name for name in samples
+                       if name.split('{', 1)[0] in (family, f'{family}_bucket',
+                                                    f'{family}_sum', f'{family}_count'))
+        if not names:
+            continue
+        lines.append(f'# TYPE {family} {metric_type}')
+        lines.extend(f'{name} {format_value(samples[name])}' for name in names)
+    return '\n'.join(lines) + '\n'
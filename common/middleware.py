@@ -0,0 +1,203 @@
+"""
+Middleware shared by all apps.
+
+Every middleware here runs natively under WSGI and ASGI, so the async views
+are not adapted to sync code when the project is served by uvicorn.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.permissions import SAFE_METHODS
+
+from common.camel_case import underscoreize, camelize_options
+from common.db_router import PIN_COOKIE
+from common.compression import compress, get_accepted_encoding
+from common.metrics import RequestMetrics, current_metrics, get_samples, get_store
+from common.profiling import (RequestProfiler, current_profiler, is_profiling_requested,
+                              is_admin_request, save_profile)
+
+
+class SyncAndAsyncMiddleware:
+    """Base class for middleware supporting both modes, like MiddlewareMixin.
+       Subclasses implement sync_call() and async_call()."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, so Django awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        else:
+            self._is_coroutine = None
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.async_call(request)
+        return self.sync_call(request)
+
+    def sync_call(self, request):
+        raise NotImplementedError
+
+    async def async_call(self, request):
+        raise NotImplementedError
+
+
+class CamelCaseMiddleWare(SyncAndAsyncMiddleware):
+    """Convert query parameter names to snake_case.
+       Query strings that are already snake_case are left untouched."""
+
+    def sync_call(self, request):
+        self.process_request(request)
+        return self.get_response(request)
+
+    async def async_call(self, request):
+        self.process_request(request)
+        return await self.get_response(request)
+
+    @staticmethod
+    def process_request(request):
+        if request.GET:
+            request.GET = underscoreize(request.GET, **camelize_options())
+
+
+class CompressionMiddleware(SyncAndAsyncMiddleware):
+    """Compress responses with brotli or gzip, depending on Accept-Encoding.
+       Responses smaller than COMPRESSION_MIN_SIZE are sent as they are and
+       variants precompressed by common.compression.precompressed are reused."""
+
+    def sync_call(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    async def async_call(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    @staticmethod
+    def process_response(request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = get_accepted_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding != 'gzip':
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            content = getattr(response, 'compressed_content', {}).get(encoding)
+            if content is None:
+                content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+
+        return response
+
+
+class ReplicaPinMiddleware(SyncAndAsyncMiddleware):
+    """Pin clients to the primary database for REPLICA_PIN_SECONDS after a write,
+       so they read their own writes while the replica catches up."""
+
+    def sync_call(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    async def async_call(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    @staticmethod
+    def process_response(request, response):
+        if (settings.REPLICA_DATABASE is not None and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True)
+        return response
+
+
+class MetricsMiddleware(SyncAndAsyncMiddleware):
+    """Measure the total time, SQL queries and cache calls of every request.
+       The numbers are sent in the Server-Timing header and aggregated per view
+       for the /metrics endpoint."""
+
+    def sync_call(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        get_store().record(self.process_response(request, response, metrics))
+        return response
+
+    async def async_call(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        await get_store().arecord(self.process_response(request, response, metrics))
+        return response
+
+    @staticmethod
+    def process_response(request, response, metrics):
+        """Add the Server-Timing header and return the samples to record."""
+        metrics.finish()
+        response.headers['Server-Timing'] = metrics.server_timing()
+        match = getattr(request, 'resolver_match', None)
+        view = match.route if match else 'unresolved'
+        return get_samples(view, request.method, response.status_code, metrics)
+
+
+class ProfilerMiddleware(SyncAndAsyncMiddleware):
+    """Profile requests that admins ask to be profiled.
+       The id of the stored profile is returned in the X-Profile-Id header,
+       which is left out when the profile could not be stored."""
+
+    def sync_call(self, request):
+        if not is_profiling_requested(request) or not is_admin_request(request):
+            return self.get_response(request)
+
+        profiler = RequestProfiler()
+        token = current_profiler.set(profiler)
+        try:
+            response = profiler.run(self.get_response, request)
+        finally:
+            current_profiler.reset(token)
+
+        profile = profiler.to_dict(request, response)
+        if save_profile(profile):
+            response.headers['X-Profile-Id'] = profile['id']
+        return response
+
+    async def async_call(self, request):
+        if (not is_profiling_requested(request)
+                or not await sync_to_async(is_admin_request)(request)):
+            return await self.get_response(request)
+
+        profiler = RequestProfiler()
+        token = current_profiler.set(profiler)
+        try:
+            response = await profiler.arun(self.get_response, request)
+        finally:
+            current_profiler.reset(token)
+
+        profile = profiler.to_dict(request, response)
+        if await sync_to_async(save_profile)(profile):
+            response.headers['X-Profile-Id'] = profile['id']
+        return response
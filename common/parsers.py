@@ -0,0 +1,26 @@
+"""
+Parsers shared by all apps.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from common.camel_case import underscoreize, camelize_options
+
+
+class CamelCaseJSONParser(JSONParser):
+    """Drop-in replacement for djangorestframework_camel_case's JSON parser
+       that uses the memoized underscoreize."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the JSON body and convert its keys to snake_case."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read().decode(encoding)
+            return underscoreize(json.loads(data), **camelize_options())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
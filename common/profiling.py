@@ -0,0 +1,158 @@
+"""
+On-demand request profiling for admins.
+
+A request is profiled when it carries the `X-Profile` header or the `profile`
+query parameter and a JWT cookie with the admin scope. The view runs under
+cProfile, and the slowest functions and the SQL statements are kept in
+a capped Redis list that admins can read through /api/admin/profiles/.
+Profiling fails open: when Redis is unavailable or the cache is not
+django-redis, the profile is dropped and the response is returned as is.
+"""
+import cProfile
+import datetime
+import json
+import logging
+import pstats
+import time
+import uuid
+from contextvars import ContextVar
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+PROFILES_KEY = 'profiles'
+
+current_profiler = ContextVar('current_profiler', default=None)
+
+
+def is_profiling_requested(request):
+    """Whether the request asks to be profiled."""
+    return bool(request.headers.get('X-Profile') or request.GET.get('profile'))
+
+
+def is_admin_request(request):
+    """Whether the request carries a valid admin JWT."""
+    token = request.COOKIES.get('jwt')
+    if not token:
+        return False
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return False
+    if payload.get('scope') != 'admin':
+        return False
+    return get_user_model().objects.filter(id=payload.get('user_id'),
+                                           is_ambassador=False).exists()
+
+
+class RequestProfiler:
+    """Runs a callable under cProfile and records the SQL it executes."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = []
+        self.duration = 0.0
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook that records SQL statements."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+    def run(self, func, *args, **kwargs):
+        """Call `func` while profiling it."""
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.profile.disable()
+            self.duration = time.perf_counter() - start
+
+    async def arun(self, func, *args, **kwargs):
+        """Await `func` while profiling it. cProfile follows the event loop
+           thread, so other requests handled meanwhile show up in the profile."""
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self.profile.disable()
+            self.duration = time.perf_counter() - start
+
+    def top_functions(self, limit):
+        """Return the functions with the highest cumulative time."""
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                'function': f'{filename}:{line}({name})',
+                'calls': calls,
+                'total_time_ms': round(total_time * 1000, 3),
+                'cumulative_time_ms': round(cumulative_time * 1000, 3),
+            }
+            for (filename, line, name), (_, calls, total_time, cumulative_time, _)
+            in rows[:limit]
+        ]
+
+    def to_dict(self, request, response):
+        """Return the stored representation of the profile."""
+        return {
+            'id': uuid.uuid4().hex,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'duration_ms': round(self.duration * 1000, 3),
+            'functions': self.top_functions(settings.PROFILER_TOP_FUNCTIONS),
+            'queries': self.queries,
+        }
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper of every database connection (see CommonConfig.ready).
+       Queries are recorded by the profiler of the request that runs them."""
+    profiler = current_profiler.get()
+    if profiler is None:
+        return execute(sql, params, many, context)
+    return profiler.query_wrapper(execute, sql, params, many, context)
+
+
+def save_profile(profile):
+    """Store a profile, keeping only the PROFILER_MAX_PROFILES most recent ones.
+       Returns whether it was stored."""
+    try:
+        pipe = get_redis_connection('default').pipeline()
+        pipe.lpush(PROFILES_KEY, json.dumps(profile))
+        pipe.ltrim(PROFILES_KEY, 0, settings.PROFILER_MAX_PROFILES - 1)
+        pipe.execute()
+    except (RedisError, NotImplementedError):
+        logger.warning('Could not store the profile of %s', profile['path'], exc_info=True)
+        return False
+    return True
+
+
+def get_profiles():
+    """Return the stored profiles, most recent first, or none when they
+       cannot be read."""
+    try:
+        profiles = get_redis_connection('default').lrange(PROFILES_KEY, 0, -1)
+    except (RedisError, NotImplementedError):
+        logger.warning('Could not read the stored profiles', exc_info=True)
+        return []
+    return [json.loads(p) for p in profiles]
+
+
+def get_profile(profile_id):
+    """Return a stored profile or None."""
+    return next((p for p in get_profiles() if p['id'] == profile_id), None)
@@ -0,0 +1,62 @@
+"""
+Renderers shared by all apps.
+"""
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from common.camel_case import camelize, camelize_options
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    """Drop-in replacement for djangorestframework_camel_case's renderer.
+       Keys are converted with a memoized lookup and the result is encoded
+       with orjson when it is installed."""
+    use_orjson = orjson is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Camelize `data` and render it into JSON."""
+        if data is None:
+            return b''
+
+        data = camelize(data, **camelize_options())
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if not self._can_use_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self._encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+        # Same JavaScript-subset escaping as rest_framework's JSONRenderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+    def _can_use_orjson(self, indent):
+        """orjson only produces compact, non-ASCII-escaped output."""
+        return self.use_orjson and indent is None and self.compact and not self.ensure_ascii
+
+    @property
+    def _encoder(self):
+        return self.encoder_class()
+
+
+class CamelCaseBrowsableAPIRenderer(BrowsableAPIRenderer):
+    """Browsable API renderer that uses the memoized camelize."""
+
+    def render(self, data, *args, **kwargs):
+        camelized = camelize(data, **camelize_options())
+        # the browsable API builds its forms from the serializer of the data
+        if isinstance(data, ReturnDict):
+            camelized = ReturnDict(camelized, serializer=data.serializer)
+        elif isinstance(data, ReturnList):
+            camelized = ReturnList(camelized, serializer=data.serializer)
+        return super().render(camelized, *args, **kwargs)
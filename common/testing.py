@@ -0,0 +1,80 @@
+"""
+Test helpers for guarding the number of SQL queries an endpoint runs.
+"""
+from functools import wraps
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+
+
+def format_queries(context):
+    """Return the captured queries as a numbered list."""
+    return '\n'.join(f'{i}. {q["sql"]}' for i, q in enumerate(context.captured_queries, 1))
+
+
+class QueryBudget(CaptureQueriesContext):
+    """Context manager that fails when more than `max_queries` queries run inside it."""
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS, label=''):
+        super().__init__(connections[using])
+        self.max_queries = max_queries
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        if len(self) > self.max_queries:
+            raise AssertionError(
+                f'{self.label or "Block"} ran {len(self)} queries, '
+                f'the budget is {self.max_queries}:\n{format_queries(self)}'
+            )
+
+
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """Decorator for test methods. Every request made with `self.client`
+       inside the test may run at most `max_queries` queries."""
+
+    def decorator(test_method):
+        @wraps(test_method)
+        def wrapper(self, *args, **kwargs):
+            client = self.client
+            request = client.request
+
+            def checked_request(**request_kwargs):
+                label = f'{request_kwargs.get("REQUEST_METHOD")} {request_kwargs.get("PATH_INFO")}'
+                with QueryBudget(max_queries, using, label):
+                    return request(**request_kwargs)
+
+            client.request = checked_request
+            try:
+                return test_method(self, *args, **kwargs)
+            finally:
+                del client.request
+
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetMixin:
+    """TestCase mixin with assertions about the number of queries."""
+
+    def assertMaxQueries(self, max_queries, using=DEFAULT_DB_ALIAS):
+        """Assert that the block runs at most `max_queries` queries."""
+        return QueryBudget(max_queries, using)
+
+    def assertQueriesDoNotScale(self, request, grow, using=DEFAULT_DB_ALIAS):
+        """Assert that `request` runs the same number of queries after `grow`
+           has added more data, i.e. that the endpoint has no N+1 queries."""
+        with CaptureQueriesContext(connections[using]) as small:
+            request()
+        grow()
+        with CaptureQueriesContext(connections[using]) as large:
+            request()
+
+        self.assertEqual(
+            len(small), len(large),
+            f'The number of queries grew from {len(small)} to {len(large)} '
+            f'with more data:\n{format_queries(large)}'
+        )
@@ -0,0 +1,75 @@
+"""
+Tests for the async view base class and the async middleware chain.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, AsyncRequestFactory
+from django.utils.module_loading import import_string
+
+from common.async_views import AsyncAPIView
+from common.authentication import JWTAuthentication
+
+
+class UserView(AsyncAPIView):
+    """View returning the authenticated user."""
+    authenticated = True
+
+    async def get(self, request):
+        return self.render({'user_id': request.user.id, 'first_name': 'a'})
+
+
+class AsyncAPIViewTests(TestCase):
+    """Tests for AsyncAPIView."""
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+
+    async def test_authenticated(self):
+        """Test that the JWT user is set and the data is rendered in camelCase."""
+        self.factory.cookies['jwt'] = JWTAuthentication.generate_jwt(self.user.id, 'admin')
+        res = await UserView.as_view()(self.factory.get('/api/admin/user/'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.content), {'userId': self.user.id, 'firstName': 'a'})
+
+    async def test_not_authenticated(self):
+        """Test that requests without a JWT are rejected like in DRF."""
+        res = await UserView.as_view()(self.factory.get('/api/admin/user/'))
+
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(json.loads(res.content),
+                         {'detail': 'Authentication credentials were not provided.'})
+
+    async def test_unknown_user(self):
+        """Test that a JWT of a deleted user is rejected."""
+        self.factory.cookies['jwt'] = JWTAuthentication.generate_jwt(999, 'admin')
+        res = await UserView.as_view()(self.factory.get('/api/admin/user/'))
+
+        self.assertEqual(res.status_code, 403)
+
+
+class AsyncMiddlewareTests(SimpleTestCase):
+    """Tests that the middleware runs natively in async mode."""
+
+    def test_middleware_async_capable(self):
+        """Test that every middleware is async capable, so async views are not adapted."""
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), 'async_capable', False), path)
+
+    def test_async_middleware_chain(self):
+        """Test that the ASGI middleware chain is a coroutine function."""
+        async def get_response(request):
+            return HttpResponse()
+
+        handler = ASGIHandler()
+        middleware = import_string('common.middleware.MetricsMiddleware')(get_response)
+
+        self.assertTrue(asyncio.iscoroutinefunction(handler._middleware_chain))
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
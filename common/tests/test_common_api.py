@@ -2,6 +2,7 @@
 Tests for the common app.
 """
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -9,6 +10,10 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from common.testing import query_budget
+from core.models import DailyRevenue
+from core.revenue import USER_REVENUE_KEY
+
 REGISTER_URL = reverse('common:register')
 LOGIN_URL = reverse('common:login')
 LOGOUT_URL = reverse('common:logout')
@@ -46,6 +51,7 @@ class RegisterUserApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
 
+    @query_budget(2)
     def test_create_user_success(self):
         """Test creating a user is successful."""
         payload = create_payload(create_confirm_pass=True)
@@ -58,6 +64,7 @@ class RegisterUserApiTests(TestCase):
         # Check that the API is secure and does not send password in plain text in response
         self.assertNotIn('password', res.data)
 
+    @query_budget(1)
     def test_user_with_email_exists_error(self):
         """Test error returned if user with email exists."""
         payload = create_payload(create_confirm_pass=False)
@@ -68,6 +75,7 @@ class RegisterUserApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    @query_budget(1)
     def test_password_too_short_error(self):
         """Test an error is returned if password less than 6 chars."""
         payload = create_payload(create_confirm_pass=True,
@@ -94,6 +102,7 @@ class RegisterUserApiTests(TestCase):
         ).exists()
         self.assertFalse(user_exists)
 
+    @query_budget(2)
     def test_admin_is_not_ambassador(self):
         """Test that new admin user is not an ambassador."""
         payload = create_payload(create_confirm_pass=True)
@@ -128,6 +137,7 @@ class LoginUserApiTests(TestCase):
             'password': payload['password']
         }
 
+    @query_budget(1)
     def test_login_success(self):
         """Test that login is successful."""
         res = self.client.post(LOGIN_URL, self.credentials, format='json')
@@ -136,6 +146,7 @@ class LoginUserApiTests(TestCase):
         self.assertTrue(user.check_password(self.credentials['password']))
         self.assertNotIn('password', res.data)
 
+    @query_budget(1)
     def test_login_wrong_password_error(self):
         """Test login with wrong password raises error.."""
         self.credentials['password'] = 'wrongPassword'
@@ -143,6 +154,7 @@ class LoginUserApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    @query_budget(1)
     def test_login_wrong_email_error(self):
         """Test login with wrong email raises error."""
         self.credentials['email'] = 'wrongEmail'
@@ -174,6 +186,7 @@ class LoginUserApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(1)
     def test_jwt_auth(self):
         """Test JWT authentication."""
         res = self.client.post(LOGIN_URL, self.credentials, format='json')
@@ -181,6 +194,7 @@ class LoginUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('jwt', res.cookies)
 
+    @query_budget(1)
     def test_jwt_auth_wrong_password_error(self):
         """Test JWT authentication with wrong password raises error."""
         self.credentials['password'] = 'wrongPassword'
@@ -189,6 +203,7 @@ class LoginUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertNotIn('jwt', res.cookies)
 
+    @query_budget(1)
     def test_jwt_auth_wrong_email_error(self):
         """Test JWT authentication with wrong email raises error."""
         self.credentials['email'] = 'wrongEmail'
@@ -197,6 +212,7 @@ class LoginUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertNotIn('jwt', res.cookies)
 
+    @query_budget(1)
     def test_jwt_auth_success(self):
         """Test JWT authentication with correct credentials is successful."""
         res = self.client.post(LOGIN_URL, self.credentials, format='json')
@@ -226,6 +242,20 @@ class PrivateUserApiTests(TestCase):
             'is_ambassador': self.user.is_ambassador
         })
 
+    def test_get_ambassador_revenue_cached(self):
+        """Test that the revenue of ambassadors is read from the cache after the first request."""
+        url = '/api/ambassador/user/'
+        cache.delete(USER_REVENUE_KEY.format(self.user.id))
+        DailyRevenue.objects.create(day='2023-01-01', user=self.user, code='abc123', orders=1,
+                                    admin_revenue=9, ambassador_revenue=1)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['revenue'], 1)
+
     def test_post_user_not_allowed(self):
         """Test POST is not allowed for the "user" endpoint."""
         res = self.client.post(USER_URL, {})
@@ -254,6 +284,7 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(1)
     def test_update_profile(self):
         """Test update profile API."""
         payload = {
@@ -299,6 +330,7 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(r3.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(r4.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @query_budget(1)
     def test_update_password_success(self):
         """Test update password API."""
         payload = {
@@ -0,0 +1,90 @@
+"""
+Tests for response compression.
+"""
+import gzip
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from common import compression
+from core.models import Product
+
+PRODUCTS_FRONTEND_URL = reverse('ambassador:products-frontend')
+
+
+def create_products(count):
+    """Create `count` products."""
+    Product.objects.bulk_create(
+        Product(title=f'Product {i}', description='Some description ' * 5,
+                image='https://example.com/image.png', price=10)
+        for i in range(count)
+    )
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(TestCase):
+    """Tests for the compression middleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_large_response_gzipped(self):
+        """Test that a large response is gzipped when the client accepts it."""
+        create_products(30)
+        res = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        body = gzip.decompress(res.content)
+        self.assertIn(b'Product 29', body)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+
+    def test_small_response_not_compressed(self):
+        """Test that responses under the threshold are not compressed."""
+        create_products(1)
+        res = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_not_compressed_without_accept_encoding(self):
+        """Test that responses are not compressed for clients without support."""
+        create_products(30)
+        res = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertIn(b'Product 29', res.content)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli is used when both encodings are accepted."""
+        create_products(30)
+        res = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertIn(b'Product 29', compression.brotli.decompress(res.content))
+
+    def test_cached_response_compressed_once(self):
+        """Test that the cached products are compressed only on the first request."""
+        create_products(30)
+        with patch('common.compression.compress', wraps=compression.compress) as mock, \
+                patch('common.middleware.compress', mock):
+            r1 = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip')
+            calls = mock.call_count
+            r2 = self.client.get(PRODUCTS_FRONTEND_URL, HTTP_ACCEPT_ENCODING='gzip')
+            r3 = self.client.get(PRODUCTS_FRONTEND_URL)
+
+        self.assertEqual(calls, len(compression.supported_encodings()))
+        self.assertEqual(mock.call_count, calls)
+        self.assertEqual(r1.content, r2.content)
+        self.assertEqual(gzip.decompress(r2.content), r3.content)
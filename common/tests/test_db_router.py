@@ -0,0 +1,136 @@
+"""
+Tests for the read replica router.
+"""
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from common import db_router
+from common.authentication import JWTAuthentication
+from common.db_router import PIN_COOKIE, ReplicaRouter, use_replica
+from core.models import Order
+
+# Whether the replica is a separate database and not a test mirror of the primary
+SEPARATE_REPLICA = bool(settings.REPLICA_DATABASE and not
+                        settings.DATABASES[settings.REPLICA_DATABASE].get('TEST', {}).get('MIRROR'))
+
+ORDERS_URL = '/api/admin/orders/'
+PROFILE_URL = '/api/admin/user/info/'
+
+
+@override_settings(REPLICA_DATABASE='replica')
+@mock.patch('common.db_router.get_replication_lag', return_value=0)
+class ReplicaRouterTests(TransactionTestCase):
+    """Tests for ReplicaRouter."""
+
+    def setUp(self):
+        db_router._lag_checks.clear()
+        self.router = ReplicaRouter()
+
+    def test_read_from_replica(self, _):
+        """Test that reads go to the replica only inside use_replica()."""
+        self.assertIsNone(self.router.db_for_read(Order))
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Order), 'replica')
+        self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_write_to_primary(self, _):
+        """Test that writes go to the primary."""
+        with use_replica():
+            self.assertEqual(self.router.db_for_write(Order), 'default')
+
+    def test_atomic_block_reads_from_primary(self, _):
+        """Test that reads in transaction.atomic go to the primary."""
+        with use_replica(), transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_lagging_replica(self, get_replication_lag):
+        """Test that reads go to the primary while the replica lags or is not replicating."""
+        for lag in (settings.REPLICA_MAX_LAG + 1, None):
+            db_router._lag_checks.clear()
+            get_replication_lag.return_value = lag
+            with use_replica():
+                self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_lag_checked_once_per_interval(self, get_replication_lag):
+        """Test that the lag is not checked on every read."""
+        with use_replica():
+            for _ in range(3):
+                self.router.db_for_read(Order)
+
+        get_replication_lag.assert_called_once_with('replica')
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica(self, _):
+        """Test that everything goes to the primary when there is no replica."""
+        with use_replica():
+            self.assertIsNone(self.router.db_for_read(Order))
+
+
+class ReplicaPinMiddlewareTests(TestCase):
+    """Tests for ReplicaPinMiddleware."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='admin@example.com',
+                                                         password='password')
+        self.client = APIClient()
+        self.client.cookies['jwt'] = JWTAuthentication.generate_jwt(self.user.id, 'admin')
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_write_pins_to_primary(self):
+        """Test that a successful write sets the pin cookie."""
+        res = self.client.put(PROFILE_URL, {'first_name': 'New'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_read_does_not_pin(self):
+        """Test that reads and failed writes do not set the pin cookie."""
+        self.assertNotIn(PIN_COOKIE, self.client.get(ORDERS_URL).cookies)
+        self.assertNotIn(PIN_COOKIE, self.client.put(PROFILE_URL, {'email': 'x'}).cookies)
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica(self):
+        """Test that writes do not set the pin cookie when there is no replica."""
+        self.assertNotIn(PIN_COOKIE, self.client.put(PROFILE_URL, {'first_name': 'New'}).cookies)
+
+
+@skipUnless(SEPARATE_REPLICA,
+            'Needs a separate replica database, see ambassador_drf.settings_replica.')
+class ReplicaReadTests(TransactionTestCase):
+    """Tests that read-only views read from the replica, with two databases
+       that are not replicated, so rows created on the primary only are missing
+       from the replica."""
+    databases = {'default', settings.REPLICA_DATABASE} if SEPARATE_REPLICA else {'default'}
+
+    def setUp(self):
+        db_router._lag_checks.clear()
+        for alias in ('default', 'replica'):
+            get_user_model().objects.db_manager(alias).create_user(
+                id=1, email='admin@example.com', password='password')
+        Order.objects.create(transaction_id='txn', code='abc', complete=True)
+
+        self.client = APIClient()
+        self.client.cookies['jwt'] = JWTAuthentication.generate_jwt(1, 'admin')
+
+    def test_read_from_replica(self):
+        """Test that the orders are read from the replica."""
+        res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data, [])
+
+    def test_read_own_writes(self):
+        """Test that a client reads from the primary after it writes."""
+        self.client.put(PROFILE_URL, {'first_name': 'New'})
+        res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(get_user_model().objects.get().first_name, 'New')
+        self.assertEqual(get_user_model().objects.using('replica').get().first_name, '')
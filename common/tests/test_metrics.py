@@ -0,0 +1,138 @@
+"""
+Tests for the request metrics.
+"""
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from ambassador_drf import settings_benchmark
+from common import metrics
+from common.metrics import (FileMetricsStore, MemoryMetricsStore, RequestMetrics, get_samples,
+                            render_metrics)
+from core.models import Product
+
+PRODUCTS_BACKEND_URL = reverse('ambassador:products-backend')
+METRICS_URL = reverse('metrics')
+METRICS_TOKEN = 'metrics-token'
+
+
+def parse_server_timing(header):
+    """Return the Server-Timing header as {name: {param: value}}."""
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(METRICS_TOKEN=METRICS_TOKEN)
+class MetricsMiddlewareTests(TestCase):
+    """Tests for the metrics middleware and endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        get_redis_connection('default').delete('metrics')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+        Product.objects.create(title='Product', description='Description', price=10)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Test that queries and cache calls are reported in Server-Timing."""
+        r1 = self.client.get(PRODUCTS_BACKEND_URL)
+        r2 = self.client.get(PRODUCTS_BACKEND_URL)
+
+        self.assertEqual(r1.status_code, status.HTTP_200_OK)
+        first = parse_server_timing(r1['Server-Timing'])
+        second = parse_server_timing(r2['Server-Timing'])
+        self.assertIn('total', first)
+        self.assertEqual(first['db']['desc'], '"1 queries"')
+        self.assertEqual(first['cache']['desc'], '"hits=0 misses=1"')
+        self.assertEqual(second['db']['desc'], '"0 queries"')
+        self.assertEqual(second['cache']['desc'], '"hits=1 misses=0"')
+
+    def test_metrics_endpoint(self):
+        """Test that the metrics are aggregated per view."""
+        self.client.get(PRODUCTS_BACKEND_URL)
+        self.client.get(PRODUCTS_BACKEND_URL)
+
+        res = self.client.get(METRICS_URL)
+        body = res.content.decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        view = 'view="api/ambassador/products/backend/"'
+        self.assertIn(f'http_request_duration_seconds_count{{{view},method="GET"}} 2', body)
+        self.assertIn(f'http_requests_total{{{view},method="GET",status="200"}} 2', body)
+        self.assertIn(f'db_queries_total{{{view}}} 1', body)
+        self.assertIn(f'cache_hits_total{{{view}}} 1', body)
+        self.assertIn(f'cache_misses_total{{{view}}} 1', body)
+
+    def test_metrics_endpoint_requires_token(self):
+        """Test that the metrics are not served without the token."""
+        for authorization in ('', 'Bearer wrong', f'Token {METRICS_TOKEN}'):
+            self.client.credentials(HTTP_AUTHORIZATION=authorization)
+            res = self.client.get(METRICS_URL)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_endpoint_closed_without_token_setting(self):
+        """Test that the metrics are not served when no token is configured."""
+        self.client.credentials()
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CACHES=settings_benchmark.CACHES, METRICS_TOKEN=METRICS_TOKEN)
+class BenchmarkSettingsMetricsTests(TestCase):
+    """Tests for the metrics with the local-memory cache of the benchmark settings."""
+
+    def setUp(self):
+        metrics._store = None
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+        Product.objects.create(title='Product', description='Description', price=10)
+
+    def tearDown(self):
+        metrics._store = None
+
+    def test_request_without_redis(self):
+        """Test that requests succeed and their metrics are kept in memory."""
+        res = self.client.get(PRODUCTS_BACKEND_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(metrics.get_store(), MemoryMetricsStore)
+        body = self.client.get(METRICS_URL).content.decode()
+        self.assertIn('db_queries_total{view="api/ambassador/products/backend/"} 1', body)
+
+
+class FileMetricsStoreTests(TestCase):
+    """Tests for the multiprocess file store."""
+
+    def test_samples_summed_across_processes(self):
+        """Test that the files of all processes are added up."""
+        metrics = RequestMetrics()
+        metrics.queries = 3
+        metrics.finish()
+        samples = get_samples('view/', 'GET', 200, metrics)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileMetricsStore(directory)
+            store.record(samples)
+            with open(f'{directory}/metrics_other.json', 'w') as file:
+                file.write('{"db_queries_total{view=\\"view/\\"}": 3}')
+
+            body = render_metrics(store.collect())
+
+        self.assertIn('db_queries_total{view="view/"} 6', body)
+        self.assertIn('http_requests_total{view="view/",method="GET",status="200"} 1', body)
@@ -0,0 +1,104 @@
+"""
+Tests for the camelCase JSON parser and middleware.
+"""
+import io
+import json
+
+from django.http import QueryDict
+from django.test import SimpleTestCase, RequestFactory
+from djangorestframework_camel_case.util import underscoreize as library_underscoreize
+
+from common.camel_case import underscoreize, underscore_key
+from common.middleware import CamelCaseMiddleWare
+from common.parsers import CamelCaseJSONParser
+
+ORDER_PAYLOAD = {
+    'code': 'abc123',
+    'firstName': 'John',
+    'zipCode': '10001',
+    'addressLine1': 'Main St',
+    'HTMLBody': 'x',
+    'products': [
+        {'productId': 1, 'quantity': 2},
+        {'productId': 2, 'quantity': 1},
+    ],
+}
+
+
+class UnderscoreizeTests(SimpleTestCase):
+    """Tests for the memoized underscoreize."""
+
+    def test_matches_library(self):
+        """Test that the output matches djangorestframework_camel_case."""
+        for options in ({}, {'no_underscore_before_number': True}):
+            with self.subTest(options=options):
+                self.assertEqual(
+                    underscoreize(ORDER_PAYLOAD, **options),
+                    library_underscoreize(ORDER_PAYLOAD, **options)
+                )
+
+    def test_snake_case_payload_not_copied(self):
+        """Test that snake_case input is returned without being rebuilt."""
+        payload = {'first_name': 'John', 'products': [{'product_id': 1}]}
+        res = underscoreize(payload)
+
+        self.assertIs(res, payload)
+        self.assertIs(res['products'][0], payload['products'][0])
+
+    def test_partially_converted_list(self):
+        """Test that only the changed part of a list forces a copy."""
+        payload = [{'product_id': 1}, {'productId': 2}]
+        res = underscoreize(payload)
+
+        self.assertIsNot(res, payload)
+        self.assertIs(res[0], payload[0])
+        self.assertEqual(res, [{'product_id': 1}, {'product_id': 2}])
+
+    def test_ignore_keys_and_fields(self):
+        """Test that ignore_fields and ignore_keys are respected."""
+        payload = {'metaData': {'innerKey': 1}, 'keepMe': {'innerKey': 2}}
+        options = {'ignore_fields': ('meta_data',), 'ignore_keys': ('keepMe',)}
+
+        self.assertEqual(underscoreize(payload, **options),
+                         library_underscoreize(payload, **options))
+
+    def test_key_conversion_is_memoized(self):
+        """Test that each key is converted only once."""
+        underscore_key.cache_clear()
+        underscoreize([{'productId': 1}, {'productId': 2}])
+
+        self.assertEqual(underscore_key.cache_info().misses, 1)
+
+
+class CamelCaseParserTests(SimpleTestCase):
+    """Tests for the camelCase JSON parser."""
+
+    def test_parse(self):
+        """Test parsing a camelCase body."""
+        stream = io.BytesIO(json.dumps(ORDER_PAYLOAD).encode())
+        res = CamelCaseJSONParser().parse(stream)
+
+        self.assertEqual(res, library_underscoreize(ORDER_PAYLOAD))
+
+
+class CamelCaseMiddlewareTests(SimpleTestCase):
+    """Tests for the camelCase query parameters middleware."""
+
+    def setUp(self):
+        self.middleware = CamelCaseMiddleWare(lambda request: request)
+        self.factory = RequestFactory()
+
+    def test_query_params_converted(self):
+        """Test that camelCase query parameters are converted."""
+        request = self.middleware(self.factory.get('/?lastPage=2&sort=price-asc&lastPage=3'))
+
+        expected = library_underscoreize(QueryDict('lastPage=2&sort=price-asc&lastPage=3'))
+        self.assertEqual(list(request.GET.lists()), list(expected.lists()))
+
+    def test_snake_case_query_params_untouched(self):
+        """Test that snake_case query parameters are not copied."""
+        request = self.factory.get('/?search=abc&page=2')
+        query = request.GET
+        self.middleware(request)
+
+        self.assertIs(request.GET, query)
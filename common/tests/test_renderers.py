@@ -0,0 +1,95 @@
+"""
+Tests for the camelCase JSON renderer.
+"""
+import json
+from collections import OrderedDict
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer as LibraryRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from common.camel_case import camelize, camelize_key
+from common.renderers import CamelCaseJSONRenderer, CamelCaseBrowsableAPIRenderer
+
+
+def get_sample_data():
+    """Return nested data with the shapes the serializers produce."""
+    return [
+        OrderedDict([
+            ('id', 1),
+            ('first_name', 'John'),
+            ('zip_code', '10001'),
+            ('order_items', [
+                {'product_title': 'Product', 'price': Decimal('10.50'), 'ambassador_revenue': 1},
+            ]),
+            ('meta', {'last_page': 2, 'a_1': None, 'title': 'Page'}),
+        ])
+    ]
+
+
+class CamelCaseRendererTests(SimpleTestCase):
+    """Tests for the camelCase JSON renderer."""
+
+    def test_output_matches_library_renderer(self):
+        """Test that the renderer produces the same JSON as the library."""
+        data = get_sample_data()
+        expected = LibraryRenderer().render(data)
+        res = CamelCaseJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(res), json.loads(expected))
+
+    def test_output_matches_without_orjson(self):
+        """Test that the stdlib fallback produces identical bytes."""
+        data = get_sample_data()
+        expected = LibraryRenderer().render(data)
+
+        with patch.object(CamelCaseJSONRenderer, 'use_orjson', False):
+            res = CamelCaseJSONRenderer().render(data)
+
+        self.assertEqual(res, expected)
+
+    def test_line_separators_escaped(self):
+        """Test that U+2028 and U+2029 are escaped."""
+        res = CamelCaseJSONRenderer().render({'text': '\u2028\u2029'})
+
+        self.assertEqual(res, b'{"text":"\\u2028\\u2029"}')
+
+    def test_render_none(self):
+        """Test that rendering None returns an empty body."""
+        self.assertEqual(CamelCaseJSONRenderer().render(None), b'')
+
+    def test_key_conversion_is_memoized(self):
+        """Test that each key is converted only once."""
+        camelize_key.cache_clear()
+        camelize([{'first_name': 1}, {'first_name': 2}, {'first_name': 3}])
+
+        info = camelize_key.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 2)
+
+    def test_ignore_keys(self):
+        """Test that ignore_fields and ignore_keys are respected."""
+        data = {'first_name': {'last_name': 1}, 'zip_code': {'last_name': 2}}
+        res = camelize(data, ignore_fields=('first_name',), ignore_keys=('zip_code',))
+
+        self.assertEqual(res, {'firstName': {'last_name': 1}, 'zip_code': {'lastName': 2}})
+
+
+class CamelCaseBrowsableAPIRendererTests(SimpleTestCase):
+    """Tests for the camelCase browsable API renderer."""
+
+    @patch.object(BrowsableAPIRenderer, 'render')
+    def test_serializer_kept(self, render):
+        """Test that camelized serializer data keeps its serializer for the forms."""
+        serializer = object()
+        for data in (ReturnDict({'first_name': 'John'}, serializer=serializer),
+                     ReturnList([{'first_name': 'John'}], serializer=serializer)):
+            CamelCaseBrowsableAPIRenderer().render(data)
+
+            rendered = render.call_args.args[0]
+            self.assertIsInstance(rendered, type(data))
+            self.assertIs(rendered.serializer, serializer)
+            self.assertIn('firstName', str(rendered))
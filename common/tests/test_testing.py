@@ -0,0 +1,51 @@
+"""
+Tests for the query budget helpers.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from common.testing import QueryBudget, QueryBudgetMixin, query_budget
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Tests for the query budget helpers."""
+
+    def test_within_budget(self):
+        """Test that a block within the budget passes."""
+        with QueryBudget(1):
+            get_user_model().objects.count()
+
+    def test_over_budget(self):
+        """Test that exceeding the budget fails and lists the queries."""
+        with self.assertRaises(AssertionError) as ctx:
+            with QueryBudget(1):
+                get_user_model().objects.count()
+                get_user_model().objects.count()
+
+        self.assertIn('ran 2 queries, the budget is 1', str(ctx.exception))
+        self.assertIn('COUNT', str(ctx.exception))
+
+    def test_decorator_checks_every_request(self):
+        """Test that the decorator checks each request made with the test client."""
+
+        @query_budget(0)
+        def run(test_case):
+            test_case.client.post('/api/admin/login/', {'email': 'a@example.com',
+                                                        'password': 'password'})
+
+        with self.assertRaises(AssertionError) as ctx:
+            run(self)
+        self.assertIn('POST /api/admin/login/', str(ctx.exception))
+
+    def test_queries_scaling_detected(self):
+        """Test that a growing number of queries fails the scaling assertion."""
+        def request():
+            for user in get_user_model().objects.all():
+                get_user_model().objects.filter(id=user.id).exists()
+
+        def grow():
+            get_user_model().objects.create_user(email='user2@example.com', password='password')
+
+        get_user_model().objects.create_user(email='user1@example.com', password='password')
+        with self.assertRaises(AssertionError):
+            self.assertQueriesDoNotScale(request, grow)
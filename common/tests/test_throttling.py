@@ -0,0 +1,126 @@
+"""
+Tests for the token bucket throttle.
+"""
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from common.throttling import TokenBucketThrottle, parse_rate
+
+LOGIN_URL = reverse('common:login')
+ORDERS_URL = reverse('checkout:orders')
+
+RATES = {
+    'login': {'ip': '3/min', 'email': '2/min'},
+    'checkout': {'code': '2/min'},
+}
+
+
+@override_settings(THROTTLE_RATES=RATES)
+class TokenBucketThrottleTests(TestCase):
+    """Tests for TokenBucketThrottle."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.con = get_redis_connection('default')
+        for key in self.con.scan_iter('throttle:*'):
+            self.con.delete(key)
+
+    def login(self, email='user@example.com'):
+        return self.client.post(LOGIN_URL, {'email': email, 'password': 'password'})
+
+    def test_parse_rate(self):
+        """Test that rates are parsed to the capacity and tokens per second."""
+        self.assertEqual(parse_rate('5/min'), (5, 5 / 60))
+        self.assertEqual(parse_rate('10/s'), (10, 10))
+        self.assertEqual(parse_rate('24/day'), (24, 24 / 86400))
+
+    def test_throttled_per_field(self):
+        """Test that requests are throttled once the bucket of the email is empty."""
+        for _ in range(2):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+
+    def test_throttled_per_ip(self):
+        """Test that requests are throttled once the bucket of the IP is empty."""
+        for i in range(3):
+            self.assertEqual(self.login(f'user{i}@example.com').status_code,
+                             status.HTTP_401_UNAUTHORIZED)
+        res = self.login('other@example.com')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_ignored(self):
+        """Test that clients cannot get new IP buckets with X-Forwarded-For."""
+        for i in range(3):
+            res = self.client.post(LOGIN_URL, {'email': f'user{i}@example.com',
+                                               'password': 'password'},
+                                   HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(LOGIN_URL, {'email': 'other@example.com', 'password': 'password'},
+                               HTTP_X_FORWARDED_FOR='10.0.0.9')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttled_request_consumes_no_tokens(self):
+        """Test that a throttled request does not take tokens from the other buckets."""
+        for _ in range(3):
+            self.login()
+
+        res = self.login('other@example.com')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bucket_refills(self):
+        """Test that tokens are added back over time."""
+        with mock.patch('common.throttling.time.time', return_value=1000):
+            for _ in range(2):
+                self.login()
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch('common.throttling.time.time', return_value=1030):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttled_per_code(self):
+        """Test that checkout orders are throttled per link code."""
+        for _ in range(2):
+            self.client.post(ORDERS_URL, {'code': 'abc'}, format='json')
+
+        res = self.client.post(ORDERS_URL, {'code': 'abc'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self.client.post(ORDERS_URL, {'code': 'def'}, format='json')
+        self.assertNotEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_one_round_trip(self):
+        """Test that a request checks all its buckets with a single Redis command."""
+        self.login()
+        with mock.patch.object(self.con, 'execute_command',
+                               wraps=self.con.execute_command) as execute_command:
+            self.login()
+
+        execute_command.assert_called_once()
+        self.assertEqual(execute_command.call_args.args[0], 'EVALSHA')
+
+    def test_redis_unavailable(self):
+        """Test that requests are let through when Redis is down."""
+        throttle = TokenBucketThrottle()
+        request = mock.Mock(data={'email': 'user@example.com'}, META={'REMOTE_ADDR': '1.2.3.4'})
+        view = mock.Mock(throttle_scope='login')
+
+        with mock.patch('common.throttling.get_redis_connection', side_effect=RedisError):
+            self.assertTrue(throttle.allow_request(request, view))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_not_redis(self):
+        """Test that requests are let through when the cache is not django-redis."""
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
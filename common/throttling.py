@@ -0,0 +1,119 @@
+"""
+Token bucket throttling backed by Redis.
+
+Every bucket holds up to N tokens and is refilled at N tokens per period,
+so a rate of '5/min' allows bursts of 5 requests and 5 requests a minute on
+average. All buckets of a request are checked and consumed by one Lua
+script, so a throttled request costs a single Redis round trip, where DRF's
+cache throttles read and write the whole request history.
+"""
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.throttling import BaseThrottle
+
+from common.metrics import track_cache
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# KEYS are the buckets, ARGV the current time followed by the capacity and the
+# refill rate (tokens per second) of every bucket. Returns {1, 0} and consumes
+# a token from every bucket if all of them have one, else {0, seconds to wait}.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    available = math.min(capacity, available + elapsed * rate)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return {0, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', ARGV[1])
+    redis.call('EXPIRE', key, math.ceil(capacity / rate))
+end
+return {1, '0'}
+"""
+
+
+def parse_rate(rate):
+    """Return the capacity and the refill rate per second of a rate like '5/min'."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle the requests of views with a `throttle_scope` by token buckets.
+
+       settings.THROTTLE_RATES maps every scope to the rates of its buckets,
+       keyed by what they are counted per: 'ip' for the client IP, any other
+       name for that field of the request data, e.g. {'ip': '20/min',
+       'email': '5/min'}. Requests missing a field skip its bucket. The client
+       IP is only read from X-Forwarded-For when REST_FRAMEWORK['NUM_PROXIES']
+       is set, as clients can send the header themselves."""
+    key_prefix = 'throttle'
+    script = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_buckets(self, request, view):
+        """Return the (key, capacity, rate) of every bucket the request counts against."""
+        scope = getattr(view, 'throttle_scope', None)
+        rates = settings.THROTTLE_RATES.get(scope, {})
+        data = request.data if hasattr(request.data, 'get') else {}
+
+        buckets = []
+        for name, rate in rates.items():
+            ident = self.get_ident(request) if name == 'ip' else data.get(name)
+            if not ident:
+                continue
+            if isinstance(ident, str):
+                ident = ident.strip().lower()
+            buckets.append((f'{self.key_prefix}:{scope}:{name}:{ident}', *parse_rate(rate)))
+        return buckets
+
+    @classmethod
+    def get_script(cls, con):
+        if cls.script is None:
+            cls.script = con.register_script(TOKEN_BUCKET_SCRIPT)
+        return cls.script
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+
+        args = [time.time()]
+        for _, capacity, rate in buckets:
+            args += [capacity, rate]
+        try:
+            con = get_redis_connection('default')
+            with track_cache():
+                allowed, wait = self.get_script(con)(keys=[key for key, _, _ in buckets],
+                                                     args=args, client=con)
+        except (RedisError, NotImplementedError):
+            # let requests through rather than fail them while Redis is down
+            # or the cache is not django-redis
+            return True
+
+        self.wait_seconds = float(wait)
+        return bool(allowed)
+
+    def wait(self):
+        return self.wait_seconds
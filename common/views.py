@@ -1,16 +1,26 @@
+import hmac
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
 from rest_framework import exceptions, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from common.authentication import JWTAuthentication
+from common.metrics import get_store, render_metrics
 from common.serializers import UserSerializer
+from common.throttling import TokenBucketThrottle
+from core.revenue import get_user_revenue
 
 
 class RegisterAPIView(APIView):
     """API view for registering users."""
     serializer_class = UserSerializer
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'register'
 
     def post(self, request):
         """Register a new user."""
@@ -31,6 +41,8 @@ class RegisterAPIView(APIView):
 class LoginAPIView(APIView):
     """API view for logging in users."""
     serializer_class = UserSerializer
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'login'
 
     def post(self, request):
         """Login a user."""
@@ -75,7 +87,7 @@ class UserAPIView(APIView):
         data = self.serializer_class(user).data
 
         if 'api/ambassador/' in request.path:
-            data['revenue'] = user.revenue
+            data['revenue'] = get_user_revenue(user.id)
 
         return Response(data, status=status.HTTP_200_OK)
 
@@ -131,3 +143,17 @@ class UpdatePasswordAPIView(APIView):
         user.set_password(data['password'])
         user.save()
         return Response(self.serializer_class(user).data, status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """View exposing the aggregated request metrics in the Prometheus format."""
+
+    def get(self, request):
+        """Return the metrics of all workers to clients sending the
+           METRICS_TOKEN bearer token."""
+        authorization = request.headers.get('Authorization', '').encode()
+        if not settings.METRICS_TOKEN or not hmac.compare_digest(
+                authorization, f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponseForbidden()
+        return HttpResponse(render_metrics(get_store().collect()),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from core.models import User, Product, Order, OrderItem, Link
+from core.models import (User, Product, Order, OrderItem, Link, DailyRevenue, ArchivedOrder,
+                         ArchivedOrderItem, LinkClicks)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -12,3 +13,7 @@ admin.site.register(Product)
 admin.site.register(Link)
 admin.site.register(Order)
 admin.site.register(OrderItem)
+admin.site.register(DailyRevenue)
+admin.site.register(ArchivedOrder)
+admin.site.register(ArchivedOrderItem)
+admin.site.register(LinkClicks)
@@ -0,0 +1,44 @@
+"""
+Archiving of old completed orders.
+
+archive_orders() moves completed orders and their items to the ArchivedOrder
+and ArchivedOrderItem tables, one chunk per transaction, so the Order and
+OrderItem tables only hold recent orders. The per day, link and ambassador
+summary rows of the archived orders stay in DailyRevenue, which all revenue
+totals are read from, and rebuild_daily_revenue() aggregates the archive too.
+"""
+from django.db import transaction
+
+from core.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ORDER_COLUMNS = [field.attname for field in Order._meta.concrete_fields]
+ITEM_COLUMNS = [field.attname for field in OrderItem._meta.concrete_fields]
+
+
+def archive_chunk(order_ids):
+    """Move the orders with the given ids and their items to the archive."""
+    ArchivedOrder.objects.bulk_create(
+        ArchivedOrder(**row) for row in Order.objects.filter(id__in=order_ids)
+        .values(*ORDER_COLUMNS)
+    )
+    ArchivedOrderItem.objects.bulk_create(
+        ArchivedOrderItem(**row) for row in OrderItem.objects.filter(order_id__in=order_ids)
+        .values(*ITEM_COLUMNS)
+    )
+    OrderItem.objects.filter(order_id__in=order_ids).delete()
+    Order.objects.filter(id__in=order_ids).delete()
+
+
+def archive_orders(before, batch_size=1000):
+    """Archive the completed orders created before the `before` datetime and
+       return their number."""
+    orders = Order.objects.filter(complete=True, created_at__lt=before).order_by('id')
+    archived = 0
+    while True:
+        with transaction.atomic():
+            order_ids = list(orders.select_for_update().values_list('id', flat=True)[:batch_size])
+            if order_ids:
+                archive_chunk(order_ids)
+        archived += len(order_ids)
+        if len(order_ids) < batch_size:
+            return archived
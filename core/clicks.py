@@ -0,0 +1,60 @@
+"""
+Link click counters.
+
+Visits of a link are counted with HINCRBY in a Redis hash of codes, so the
+storefront does not write to the database per visit. The flush_link_clicks
+command, meant to run periodically, e.g. from cron, adds the counters to the
+LinkClicks table with bulk upserts. Clicks are seen by the stats once flushed.
+Run one flush at a time.
+"""
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from core.models import LinkClicks
+
+CLICKS_KEY = 'link_clicks'
+FLUSH_KEY = 'link_clicks:flushing'
+
+
+def record_click(code):
+    """Count a visit of the link with the given code. Visits are not counted
+       while Redis is unavailable or when the cache is not django-redis."""
+    try:
+        get_redis_connection('default').hincrby(CLICKS_KEY, code, 1)
+    except (RedisError, NotImplementedError):
+        pass
+
+
+@transaction.atomic
+def save_clicks(clicks, batch_size=1000):
+    """Add the clicks of every code in `clicks` to the LinkClicks table."""
+    codes = list(clicks)
+    for i in range(0, len(codes), batch_size):
+        batch = codes[i:i + batch_size]
+        current = dict(LinkClicks.objects.select_for_update().filter(code__in=batch)
+                       .values_list('code', 'clicks'))
+        LinkClicks.objects.bulk_create(
+            [LinkClicks(code=code, clicks=current.get(code, 0) + clicks[code]) for code in batch],
+            update_conflicts=True,
+            # MySQL upserts on any unique key and does not take the fields
+            unique_fields=(['code'] if connection.features.supports_update_conflicts_with_target
+                           else None),
+            update_fields=['clicks', 'updated_at'],
+        )
+
+
+def flush_clicks(batch_size=1000):
+    """Move the counted clicks to the database and return their number.
+       The hash is renamed first, so clicks counted during the flush are kept
+       for the next one. A hash left by a failed flush is flushed again."""
+    con = get_redis_connection('default')
+    if not con.exists(FLUSH_KEY):
+        if not con.exists(CLICKS_KEY):
+            return 0
+        con.rename(CLICKS_KEY, FLUSH_KEY)
+
+    clicks = {code.decode('utf-8'): int(count) for code, count in con.hgetall(FLUSH_KEY).items()}
+    save_clicks(clicks, batch_size)
+    con.delete(FLUSH_KEY)
+    return sum(clicks.values())
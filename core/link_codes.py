@@ -0,0 +1,94 @@
+"""
+Pool of pre-generated link codes.
+
+The refill_link_codes command fills a Redis set with random codes that are
+not used by any link, so creating a link only needs a single SPOP instead of
+retrying inserts until a random code does not collide. When the pool is
+empty or Redis is unavailable, or the cache is not django-redis, a code is
+generated and checked in the database.
+"""
+import random
+import string
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from core.models import Link
+
+POOL_KEY = 'link_codes'
+CODE_ALPHABET = string.ascii_lowercase + string.digits
+
+
+def generate_code():
+    """Return a random link code."""
+    return ''.join(random.choices(CODE_ALPHABET, k=settings.LINK_CODE_LENGTH))
+
+
+def generate_unused_code():
+    """Return a random code that is not used by any link."""
+    while True:
+        code = generate_code()
+        if not Link.objects.filter(code=code).exists():
+            return code
+
+
+def discard_from_pool(codes):
+    """Remove generated codes from the pool, where refill_pool() may have put
+       them, so they are not handed out again once used."""
+    try:
+        get_redis_connection('default').srem(POOL_KEY, *codes)
+    except (RedisError, NotImplementedError):
+        pass
+
+
+def take_code():
+    """Pop an unused code from the pool, falling back to generate_unused_code()."""
+    try:
+        code = get_redis_connection('default').spop(POOL_KEY)
+    except (RedisError, NotImplementedError):
+        code = None
+    if code is None:
+        code = generate_unused_code()
+        discard_from_pool([code])
+        return code
+    return code.decode('utf-8')
+
+
+def take_codes(count):
+    """Pop `count` unused codes from the pool, generating the missing ones."""
+    try:
+        codes = [c.decode('utf-8') for c in get_redis_connection('default').spop(POOL_KEY, count)]
+    except (RedisError, NotImplementedError):
+        codes = []
+
+    generated = []
+    while len(codes) + len(generated) < count:
+        candidates = ({generate_code() for _ in range(count - len(codes) - len(generated))}
+                      - set(codes) - set(generated))
+        candidates -= set(Link.objects.filter(code__in=candidates).values_list('code', flat=True))
+        generated.extend(candidates)
+    if generated:
+        discard_from_pool(generated)
+    return codes + generated
+
+
+def pool_size():
+    """Return the number of codes in the pool."""
+    return get_redis_connection('default').scard(POOL_KEY)
+
+
+def refill_pool(size=None, batch_size=1000):
+    """Add unused codes to the pool until it holds `size` codes.
+       Returns the number of codes added."""
+    size = size or settings.LINK_CODE_POOL_SIZE
+    con = get_redis_connection('default')
+    added = 0
+    missing = size - con.scard(POOL_KEY)
+    while missing > 0:
+        candidates = {generate_code() for _ in range(min(missing, batch_size))}
+        candidates -= set(Link.objects.filter(code__in=candidates).values_list('code', flat=True))
+        if candidates:
+            added += con.sadd(POOL_KEY, *candidates)
+        missing = size - con.scard(POOL_KEY)
+    return added
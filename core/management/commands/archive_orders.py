@@ -0,0 +1,34 @@
+"""
+Django command to move old completed orders to the archive tables.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from core.archive import archive_orders
+
+
+class Command(BaseCommand):
+    """Django command to archive completed orders older than a cutoff.
+       Meant to run periodically, e.g. from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=datetime.date.fromisoformat, default=None,
+                            help='Archive orders created before this day (YYYY-MM-DD), '
+                                 'defaults to ORDER_ARCHIVE_AFTER_DAYS days ago.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of orders moved per transaction.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        before = options['before']
+        if before is None:
+            days = settings.ORDER_ARCHIVE_AFTER_DAYS
+            before = timezone.localdate() - datetime.timedelta(days=days)
+        cutoff = timezone.make_aware(datetime.datetime.combine(before, datetime.time.min))
+        archived = archive_orders(cutoff, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} orders created before {before.isoformat()}.'
+        ))
@@ -0,0 +1,99 @@
+"""
+Django command to benchmark the hot read endpoints of running servers under concurrent load.
+
+Start the app with a WSGI and an ASGI server on the same database, e.g.
+    python manage.py runserver 8000
+    uvicorn ambassador_drf.asgi:application --port 8001 --workers 4
+and compare them:
+    python manage.py benchmark_concurrency --target wsgi=http://localhost:8000 \
+        --target asgi=http://localhost:8001 --concurrency 50
+"""
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+
+from common.authentication import JWTAuthentication
+from core.management.commands.benchmark_endpoints import percentile
+from core.models import Link
+
+
+def get_requests():
+    """Return the (name, path, cookie) of the benchmarked endpoints."""
+    ambassador = get_user_model().objects.filter(is_ambassador=True).order_by('id').first()
+    link = Link.objects.order_by('id').first()
+    if ambassador is None or link is None:
+        raise CommandError('Seed the database first, e.g. with populate_orders.')
+
+    jwt = JWTAuthentication.generate_jwt(ambassador.id, 'ambassador')
+    return [
+        ('products-frontend', '/api/ambassador/products/frontend/', None),
+        ('products-backend', '/api/ambassador/products/backend/?search=product&sort=price-asc',
+         None),
+        ('rankings', '/api/ambassador/rankings/', f'jwt={jwt}'),
+        ('checkout-link', f'/api/checkout/links/{link.code}/', None),
+    ]
+
+
+def timed_request(url, cookie):
+    """Return the status code and the latency in ms of a GET request."""
+    request = urllib.request.Request(url, headers={'Cookie': cookie} if cookie else {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as res:
+            res.read()
+            status = res.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - start) * 1000
+
+
+def run_load(url, cookie, requests, concurrency):
+    """Send `requests` requests with `concurrency` threads and return the statistics."""
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: timed_request(url, cookie), range(requests)))
+        elapsed = time.perf_counter() - start
+
+    timings = [timing for _, timing in results]
+    return {
+        'status': sorted({status for status, _ in results}),
+        'rps': requests / elapsed,
+        'p50_ms': percentile(timings, 50),
+        'p99_ms': percentile(timings, 99),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark running servers under concurrent load."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help='name=base URL of a running server, can be repeated.')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Number of timed requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=10)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep:
+                raise CommandError(f'Invalid target "{target}", use name=url.')
+            targets.append((name, url.rstrip('/')))
+
+        self.stdout.write(f'{"target":<10}{"endpoint":<20}{"status":>10}{"req/s":>10}'
+                          f'{"p50 ms":>10}{"p99 ms":>10}')
+        for endpoint, path, cookie in get_requests():
+            for name, url in targets:
+                for _ in range(options['warmup']):
+                    timed_request(url + path, cookie)
+                result = run_load(url + path, cookie, options['requests'], options['concurrency'])
+                status = ','.join(str(s) for s in result['status'])
+                self.stdout.write(f'{name:<10}{endpoint:<20}{status:>10}{result["rps"]:>10.1f}'
+                                  f'{result["p50_ms"]:>10.2f}{result["p99_ms"]:>10.2f}')
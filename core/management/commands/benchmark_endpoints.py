@@ -0,0 +1,338 @@
+"""
+Django command to benchmark every API endpoint against a seeded dataset.
+
+Run it with the benchmark settings to use SQLite and the local-memory cache:
+    python manage.py benchmark_endpoints --settings=ambassador_drf.settings_benchmark
+"""
+import datetime
+import itertools
+import json
+import math
+import random
+import time
+from typing import Callable, NamedTuple, Optional, Union
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_databases, teardown_databases,
+                               setup_test_environment, teardown_test_environment)
+from django_redis.cache import RedisCache
+from rest_framework.test import APIClient
+
+from common.authentication import JWTAuthentication
+from core.models import Product, Link, Order, OrderItem
+from core.rankings import rebuild_rankings
+from core.revenue import rebuild_daily_revenue
+
+BENCHMARK_PASSWORD = 'benchmark123'
+
+
+class Dataset(NamedTuple):
+    """Objects of the seeded dataset the endpoints are called with."""
+    admin: object
+    ambassador: object
+    product_ids: list
+    link_codes: list
+
+
+class Endpoint(NamedTuple):
+    """A single benchmarked request."""
+    name: str
+    method: str
+    path: Union[str, Callable]
+    scope: Optional[str] = None
+    payload: Union[dict, Callable, None] = None
+    requires_redis: bool = False
+
+
+def seed_dataset(ambassadors=50, products=100, links=200, orders=2000,
+                 items_per_order=3, seed=0):
+    """Seed the database and return the objects the endpoints need."""
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+    user_model = get_user_model()
+
+    admin = user_model.objects.create(email='admin@benchmark.test', password=password,
+                                      first_name='Admin', last_name='Benchmark',
+                                      is_ambassador=False, is_staff=True)
+    user_model.objects.bulk_create(
+        user_model(email=f'ambassador{i}@benchmark.test', password=password,
+                   first_name=f'Ambassador{i}', last_name='Benchmark', is_ambassador=True)
+        for i in range(ambassadors)
+    )
+    ambassador_ids = list(user_model.objects.filter(is_ambassador=True)
+                          .order_by('id').values_list('id', flat=True))
+
+    Product.objects.bulk_create(
+        Product(title=f'Product {i}', description=f'Description of product {i}',
+                image='https://example.com/image.png', price=rng.randrange(10, 100))
+        for i in range(products)
+    )
+    product_rows = list(Product.objects.order_by('id').values_list('id', 'title', 'price'))
+    product_ids = [row[0] for row in product_rows]
+
+    Link.objects.bulk_create(
+        Link(code=f'bench{i:06d}', user_id=ambassador_ids[i % len(ambassador_ids)])
+        for i in range(links)
+    )
+    link_rows = list(Link.objects.order_by('id').values_list('id', 'code', 'user_id'))
+    Link.products.through.objects.bulk_create(
+        Link.products.through(link_id=link_id, product_id=product_id)
+        for link_id, _, _ in link_rows
+        for product_id in rng.sample(product_ids, min(3, len(product_ids)))
+    )
+
+    emails = dict(user_model.objects.filter(id__in=ambassador_ids).values_list('id', 'email'))
+    Order.objects.bulk_create(
+        Order(transaction_id=f'txn{i:012d}', user_id=user_id, code=code,
+              ambassador_email=emails[user_id], first_name='John', last_name='Doe',
+              email='john@example.com', complete=i % 10 != 0)
+        for i, (_, code, user_id) in zip(range(orders), itertools.cycle(link_rows))
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order_id=order_id, product_title=title, price=price, quantity=quantity,
+                  admin_revenue=price * quantity * 9 / 10,
+                  ambassador_revenue=price * quantity / 10)
+        for order_id in Order.objects.order_by('id').values_list('id', flat=True)
+        for _, title, price in rng.sample(product_rows, min(items_per_order, len(product_rows)))
+        for quantity in [rng.randrange(1, 5)]
+    )
+    # stats and revenue endpoints read the rollup, not the orders
+    rebuild_daily_revenue()
+
+    return Dataset(
+        admin=admin,
+        ambassador=user_model.objects.get(id=ambassador_ids[0]),
+        product_ids=product_ids,
+        link_codes=[row[1] for row in link_rows],
+    )
+
+
+def get_endpoints(dataset):
+    """Return the benchmarked endpoints of every app."""
+    counter = itertools.count()
+    product_id = dataset.product_ids[0]
+    link_code = dataset.link_codes[0]
+
+    def register_payload():
+        return {'first_name': 'New', 'last_name': 'User',
+                'email': f'new{next(counter)}@benchmark.test',
+                'password': BENCHMARK_PASSWORD, 'confirm_password': BENCHMARK_PASSWORD}
+
+    def new_product_path():
+        product = Product.objects.create(title='Temporary', price=10)
+        return f'/api/admin/products/{product.id}/'
+
+    def unconfirmed_order_payload():
+        order = Order.objects.filter(complete=False).order_by('id').first()
+        return {'source': order.transaction_id if order else ''}
+
+    order_payload = {
+        'code': link_code, 'first_name': 'John', 'last_name': 'Doe',
+        'email': 'john@example.com', 'address': '123 Main St', 'country': 'USA',
+        'city': 'New York', 'zip_code': '10001',
+        'products': [{'product_id': pk, 'quantity': 2} for pk in dataset.product_ids[:3]],
+    }
+
+    endpoints = []
+    for scope, prefix, user in (('admin', '/api/admin/', dataset.admin),
+                                ('ambassador', '/api/ambassador/', dataset.ambassador)):
+        login_payload = {'email': user.email, 'password': BENCHMARK_PASSWORD}
+        endpoints += [
+            Endpoint(f'{scope}:register', 'post', f'{prefix}register/', payload=register_payload),
+            Endpoint(f'{scope}:login', 'post', f'{prefix}login/', payload=login_payload),
+            Endpoint(f'{scope}:logout', 'post', f'{prefix}logout/', scope),
+            Endpoint(f'{scope}:user', 'get', f'{prefix}user/', scope),
+            Endpoint(f'{scope}:profile', 'put', f'{prefix}user/info/', scope,
+                     payload={'first_name': user.first_name}),
+            Endpoint(f'{scope}:password', 'put', f'{prefix}user/password/', scope,
+                     payload={'password': BENCHMARK_PASSWORD,
+                              'confirm_password': BENCHMARK_PASSWORD}),
+        ]
+
+    endpoints += [
+        Endpoint('admin:ambassadors', 'get', '/api/admin/ambassadors/', 'admin'),
+        Endpoint('admin:products', 'get', '/api/admin/products/', 'admin'),
+        Endpoint('admin:product', 'get', f'/api/admin/products/{product_id}/', 'admin'),
+        Endpoint('admin:product-create', 'post', '/api/admin/products/', 'admin',
+                 payload={'title': 'New product', 'price': 10}, requires_redis=True),
+        Endpoint('admin:product-update', 'put', f'/api/admin/products/{product_id}/', 'admin',
+                 payload={'price': 20}, requires_redis=True),
+        Endpoint('admin:product-delete', 'delete', new_product_path, 'admin',
+                 requires_redis=True),
+        Endpoint('admin:links', 'get', f'/api/admin/users/{dataset.ambassador.id}/links/',
+                 'admin'),
+        Endpoint('admin:orders', 'get', '/api/admin/orders/', 'admin'),
+        Endpoint('ambassador:products-frontend', 'get', '/api/ambassador/products/frontend/'),
+        Endpoint('ambassador:products-backend', 'get',
+                 '/api/ambassador/products/backend/?search=product&sort=price-asc&page=2'),
+        Endpoint('ambassador:links', 'post', '/api/ambassador/links/', 'ambassador',
+                 payload={'products': dataset.product_ids[:3]}),
+        Endpoint('ambassador:stats', 'get', '/api/ambassador/stats/', 'ambassador'),
+        Endpoint('ambassador:rankings', 'get', '/api/ambassador/rankings/', 'ambassador',
+                 requires_redis=True),
+        Endpoint('checkout:links', 'get', f'/api/checkout/links/{link_code}/'),
+        Endpoint('checkout:orders', 'post', '/api/checkout/orders/', payload=order_payload),
+        Endpoint('checkout:confirm-order', 'post', '/api/checkout/orders/confirm/',
+                 payload=unconfirmed_order_payload),
+    ]
+    return endpoints
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    index = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class QueryTimer:
+    """Execute wrapper counting the queries run through a connection and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def is_success(status_code):
+    """Whether a status code is 2xx."""
+    return 200 <= status_code < 300
+
+
+def benchmark_endpoint(client, endpoint, tokens, requests=20, warmup=1):
+    """Call an endpoint repeatedly and return its timing and query statistics."""
+    timings, query_counts, query_times, statuses = [], [], [], set()
+
+    for iteration in range(warmup + requests):
+        path = endpoint.path() if callable(endpoint.path) else endpoint.path
+        payload = endpoint.payload() if callable(endpoint.payload) else endpoint.payload
+        client.cookies.clear()
+        if endpoint.scope:
+            client.cookies['jwt'] = tokens[endpoint.scope]
+
+        queries = QueryTimer()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            res = getattr(client, endpoint.method)(path, payload, format='json')
+            elapsed = time.perf_counter() - start
+
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        query_counts.append(queries.count)
+        query_times.append(queries.seconds * 1000)
+        statuses.add(res.status_code)
+
+    return {
+        'name': endpoint.name,
+        'method': endpoint.method.upper(),
+        'path': path,
+        'status': sorted(statuses),
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(query_counts),
+        'query_time_ms': round(sum(query_times) / len(query_times), 3),
+    }
+
+
+def uses_redis():
+    """Whether the default cache is a django-redis one."""
+    return isinstance(caches['default'], RedisCache)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark every API endpoint."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ambassadors', type=int, default=50)
+        parser.add_argument('--products', type=int, default=100)
+        parser.add_argument('--links', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Number of timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--only', nargs='*', default=None,
+                            help='Names of the endpoints to run, e.g. admin:orders.')
+        parser.add_argument('--output', default='benchmark_results.json',
+                            help='Path of the JSON report.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = self.run_benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+
+        failed = [result['name'] for result in report['endpoints']
+                  if not all(is_success(s) for s in result.get('status', []))]
+        if failed:
+            raise CommandError(f'Endpoints without a 2xx status: {", ".join(failed)}')
+
+    def run_benchmark(self, options):
+        """Seed the database, call every endpoint and return the report."""
+        self.stdout.write('Seeding the database...')
+        dataset = seed_dataset(options['ambassadors'], options['products'], options['links'],
+                               options['orders'], options['items_per_order'])
+        cache.clear()
+        if uses_redis():
+            rebuild_rankings()
+
+        tokens = {
+            'admin': JWTAuthentication.generate_jwt(dataset.admin.id, 'admin'),
+            'ambassador': JWTAuthentication.generate_jwt(dataset.ambassador.id, 'ambassador'),
+        }
+        client = APIClient(raise_request_exception=False)
+        results = []
+
+        self.stdout.write(f'{"endpoint":<32}{"status":>10}{"p50 ms":>10}{"p99 ms":>10}'
+                          f'{"queries":>9}{"sql ms":>9}')
+        for endpoint in get_endpoints(dataset):
+            if options['only'] and endpoint.name not in options['only']:
+                continue
+            if endpoint.requires_redis and not uses_redis():
+                self.stdout.write(f'{endpoint.name:<32}{"skipped, needs django-redis":>48}')
+                results.append({'name': endpoint.name, 'skipped': 'requires django-redis cache'})
+                continue
+
+            result = benchmark_endpoint(client, endpoint, tokens,
+                                        options['requests'], options['warmup'])
+            results.append(result)
+            status = ','.join(str(s) for s in result['status'])
+            self.stdout.write(f'{result["name"]:<32}{status:>10}{result["p50_ms"]:>10.2f}'
+                              f'{result["p99_ms"]:>10.2f}{result["queries"]:>9}'
+                              f'{result["query_time_ms"]:>9.2f}')
+            if not all(is_success(s) for s in result['status']):
+                self.stdout.write(self.style.WARNING(
+                    f'{result["name"]} returned {status}, its timings are not comparable'
+                ))
+
+        return {
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'dataset': {key: options[key] for key in ('ambassadors', 'products', 'links',
+                                                      'orders', 'items_per_order')},
+            'endpoints': results,
+        }
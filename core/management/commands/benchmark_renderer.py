@@ -0,0 +1,86 @@
+"""
+Django command to benchmark the camelCase JSON renderer
+against djangorestframework_camel_case's one.
+"""
+import json
+import time
+from collections import OrderedDict
+
+from django.core.management import BaseCommand
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer as LibraryRenderer
+
+from common.renderers import CamelCaseJSONRenderer
+
+
+def build_orders_payload(orders, items_per_order=3):
+    """Build data shaped like administrator.serializers.OrderSerializer output."""
+    payload = []
+    for order_id in range(1, orders + 1):
+        order_items = [
+            OrderedDict([
+                ('id', order_id * items_per_order + i),
+                ('product_title', f'Product {i}'),
+                ('price', '19.99'),
+                ('quantity', 2),
+                ('admin_revenue', '35.98'),
+                ('ambassador_revenue', '4.00'),
+                ('created_at', '2023-01-01T12:00:00Z'),
+                ('updated_at', '2023-01-01T12:00:00Z'),
+                ('order', order_id),
+            ])
+            for i in range(items_per_order)
+        ]
+        payload.append(OrderedDict([
+            ('id', order_id),
+            ('order_items', order_items),
+            ('total', '119.94'),
+            ('transaction_id', f'txn_{order_id:020d}'),
+            ('code', 'abc123'),
+            ('ambassador_email', 'ambassador@example.com'),
+            ('first_name', 'John'),
+            ('last_name', 'Doe'),
+            ('email', 'john@example.com'),
+            ('address', '123 Main St'),
+            ('city', 'New York'),
+            ('country', 'USA'),
+            ('zip_code', '10001'),
+            ('complete', True),
+            ('created_at', '2023-01-01T12:00:00Z'),
+            ('updated_at', '2023-01-01T12:00:00Z'),
+            ('user', 1),
+        ]))
+    return payload
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the camelCase JSON renderer."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        data = build_orders_payload(options['orders'])
+        renderers = [
+            ('djangorestframework_camel_case', LibraryRenderer()),
+            ('common.renderers', CamelCaseJSONRenderer()),
+        ]
+
+        outputs = {}
+        for name, renderer in renderers:
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                outputs[name] = renderer.render(data)
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{name}: best {min(timings) * 1000:.1f} ms, '
+                f'{len(outputs[name])} bytes'
+            )
+
+        expected, actual = (json.loads(o) for o in outputs.values())
+        if expected != actual:
+            self.stderr.write(self.style.ERROR('Rendered payloads differ!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Rendered payloads are identical.'))
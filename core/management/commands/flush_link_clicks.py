@@ -0,0 +1,20 @@
+"""
+Django command to move the link clicks counted in Redis to the database.
+"""
+from django.core.management import BaseCommand
+
+from core.clicks import flush_clicks
+
+
+class Command(BaseCommand):
+    """Django command to flush the link click counters.
+       Meant to run periodically, e.g. from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of links upserted per query.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        flushed = flush_clicks(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} clicks.'))
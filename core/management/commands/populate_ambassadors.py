@@ -1,25 +1,48 @@
 """
 Django command to populate the database with ambassadors.
 """
+import random
+
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management import BaseCommand, CommandError
 
-from faker import Faker
+from core.seeding import generate_ambassadors, generate_batches
 
 
 class Command(BaseCommand):
     """Django command to populate the database with ambassadors."""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes generating fake data.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--password', default='123456')
+        parser.add_argument('--hasher', default='default',
+                            help='Password hasher algorithm, e.g. md5 for cheap '
+                                 'load-test fixtures with the benchmark settings.')
+
     def handle(self, *args, **options):
-        faker = Faker()
-
-        for _ in range(30):
-            user = get_user_model().objects.create(
-                first_name=faker.first_name(),
-                last_name=faker.last_name(),
-                email=faker.email(),
-                password='',
-                is_ambassador=True
+        """Entrypoint for command."""
+        seed = options['seed'] if options['seed'] is not None else random.getrandbits(32)
+        try:
+            hasher = get_hasher(options['hasher'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        # Every ambassador gets the same password, so it is hashed only once.
+        password = make_password(options['password'], hasher=hasher)
+        user_model = get_user_model()
+        created = 0
+
+        for rows in generate_batches(generate_ambassadors, options['count'],
+                                     options['batch_size'], options['workers'], seed):
+            user_model.objects.bulk_create(
+                user_model(first_name=first_name, last_name=last_name, email=email,
+                           password=password, is_ambassador=True)
+                for first_name, last_name, email in rows
             )
-            user.set_password('123456')
-            user.save()
+            created += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} ambassadors.'))
@@ -1,45 +1,124 @@
 """
 Django command to populate the database with orders.
 """
-from random import randrange
+import random
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
 
-from faker import Faker
+from core.models import Link, Order, OrderItem, Product
+from core.revenue import rebuild_daily_revenue
+from core.seeding import generate_orders, generate_batches, random_code, zipf_cum_weights
 
-from core.models import Order, OrderItem
+CENT = Decimal('0.01')
 
 
 class Command(BaseCommand):
-    """Django command to populate the database with orders."""
+    """Django command to populate the database with orders.
+       Orders are placed with existing links, picked with a skewed popularity.
+       The daily revenue of the days the orders were created on is rebuilt."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes generating fake data.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--links', type=int, default=None,
+                            help='Number of links to create first '
+                                 '(default: 10 when there are no links yet).')
 
     def handle(self, *args, **options):
-        faker = Faker()
-        user = get_user_model().objects.create_user(
-            email=faker.email(),
-            password=faker.password()
-        )
-
-        for _ in range(3):
-            order = Order.objects.create(
-                user_id=user.id,
-                code='code',
-                ambassador_email='amb@example.com',
-                first_name=faker.first_name(),
-                last_name=faker.last_name(),
-                email=faker.email(),
-                complete=True
+        """Entrypoint for command."""
+        seed = options['seed'] if options['seed'] is not None else random.getrandbits(32)
+        rng = random.Random(seed)
+
+        products = list(Product.objects.order_by('id').values_list('id', 'title', 'price'))
+        if not products:
+            raise CommandError('No products found, run populate_products first.')
+
+        links_count = options['links']
+        if links_count is None:
+            links_count = 0 if Link.objects.exists() else 10
+        if links_count:
+            self.create_links(links_count, [p[0] for p in products], rng)
+
+        links = list(Link.objects.values_list('code', 'user_id'))
+        rng.shuffle(links)
+        emails = dict(get_user_model().objects
+                      .filter(id__in={user_id for _, user_id in links})
+                      .values_list('id', 'email'))
+
+        next_id = (Order.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        start = timezone.localdate()
+        created = 0
+        for rows in generate_batches(generate_orders, options['count'], options['batch_size'],
+                                     options['workers'], seed,
+                                     link_cum_weights=zipf_cum_weights(len(links)),
+                                     product_count=len(products)):
+            orders, items = [], []
+            for link_index, customer, complete, order_items in rows:
+                code, user_id = links[link_index]
+                orders.append(Order(id=next_id, code=code, user_id=user_id,
+                                    ambassador_email=emails[user_id], complete=complete,
+                                    **customer))
+                for product_index, quantity in order_items:
+                    _, title, price = products[product_index]
+                    total = price * quantity
+                    items.append(OrderItem(
+                        order_id=next_id,
+                        product_title=title,
+                        price=price,
+                        quantity=quantity,
+                        admin_revenue=(total * Decimal('0.9')).quantize(CENT),
+                        ambassador_revenue=(total * Decimal('0.1')).quantize(CENT)
+                    ))
+                next_id += 1
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders, batch_size=options['batch_size'])
+                OrderItem.objects.bulk_create(items, batch_size=options['batch_size'])
+            created += len(orders)
+
+        self.reset_sequences()
+        # the orders are bulk inserted without going through the confirmation
+        if created:
+            rebuild_daily_revenue(start, timezone.localdate(), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} orders.'))
+
+    @staticmethod
+    def create_links(count, product_ids, rng):
+        """Create links owned by random ambassadors, each with 1-5 products."""
+        ambassador_ids = list(get_user_model().objects.filter(is_ambassador=True)
+                              .values_list('id', flat=True))
+        if not ambassador_ids:
+            raise CommandError('No ambassadors found, run populate_ambassadors first.')
+
+        existing = set(Link.objects.values_list('code', flat=True))
+        codes = set()
+        while len(codes) < count:
+            code = random_code(rng)
+            if code not in existing:
+                codes.add(code)
+
+        with transaction.atomic():
+            Link.objects.bulk_create(
+                Link(code=code, user_id=rng.choice(ambassador_ids)) for code in codes
+            )
+            Link.products.through.objects.bulk_create(
+                Link.products.through(link_id=link_id, product_id=product_id)
+                for link_id in Link.objects.filter(code__in=codes).values_list('id', flat=True)
+                for product_id in rng.sample(product_ids, min(rng.randint(1, 5), len(product_ids)))
             )
 
-            for i in range(randrange(1, 5)):
-                price = randrange(10, 100)
-                quantity = randrange(1, 5)
-                OrderItem.objects.create(
-                    order_id=order.id,
-                    product_title=faker.name(),
-                    price=price,
-                    quantity=quantity,
-                    admin_revenue=.9 * price * quantity,
-                    ambassador_revenue=.1 * price * quantity
-                )
+    @staticmethod
+    def reset_sequences():
+        """Move the id sequences past the explicitly assigned order ids."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Order]):
+                cursor.execute(sql)
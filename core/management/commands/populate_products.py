@@ -1,22 +1,35 @@
 """
 Django command to populate the database with products.
 """
+import random
+
 from django.core.management import BaseCommand
-from faker import Faker
-from random import randrange
+
 from core.models import Product
+from core.seeding import generate_products, generate_batches
 
 
 class Command(BaseCommand):
-    """Django command to populate the database with ambassadors."""
+    """Django command to populate the database with products."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes generating fake data.')
+        parser.add_argument('--seed', type=int, default=None)
 
     def handle(self, *args, **options):
-        faker = Faker()
-
-        for _ in range(30):
-            Product.objects.create(
-                title=faker.name(),
-                description=faker.text(),
-                image=faker.image_url(),
-                price=randrange(10, 100),
+        """Entrypoint for command."""
+        seed = options['seed'] if options['seed'] is not None else random.getrandbits(32)
+        created = 0
+
+        for rows in generate_batches(generate_products, options['count'],
+                                     options['batch_size'], options['workers'], seed):
+            Product.objects.bulk_create(
+                Product(title=title, description=description, image=image, price=price)
+                for title, description, image, price in rows
             )
+            created += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} products.'))
@@ -0,0 +1,65 @@
+"""
+Django command to write the orders queued by the checkout in bulk.
+"""
+import socket
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django_redis import get_redis_connection
+
+from checkout.intake import (FAILED, QUEUED, claim_batch, ensure_group, process_batch,
+                             read_batch)
+
+
+class Command(BaseCommand):
+    """Django command to drain the order intake stream.
+       Runs until stopped, or until the stream is empty with --once."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_INTAKE_BATCH_SIZE)
+        parser.add_argument('--block', type=int, default=5000,
+                            help='Milliseconds to wait for new orders.')
+        parser.add_argument('--consumer', default=socket.gethostname(),
+                            help='Name of this worker in the consumer group, keep it '
+                                 'stable so orders it did not finish are retried.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the stream is empty.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        con = get_redis_connection('default')
+        ensure_group(con)
+        batch_size, consumer = options['batch_size'], options['consumer']
+        block = None if options['once'] else options['block']
+
+        # orders read before a crash are written first, then the orders
+        # waiting for the payment provider are retried before new ones
+        pending = '0'
+        written = failed = retried = 0
+        while True:
+            if pending:
+                entries = read_batch(con, consumer, batch_size, pending=True, after=pending)
+                if not entries:
+                    pending = None
+                    continue
+                pending = entries[-1][0]
+            else:
+                entries = (claim_batch(con, consumer, batch_size)
+                           or read_batch(con, consumer, batch_size, block))
+                if not entries:
+                    if options['once']:
+                        break
+                    continue
+
+            statuses = list(process_batch(con, entries).values())
+            batch_failed, batch_retried = statuses.count(FAILED), statuses.count(QUEUED)
+            batch_written = len(statuses) - batch_failed - batch_retried
+            written, failed, retried = (written + batch_written, failed + batch_failed,
+                                        retried + batch_retried)
+            self.stdout.write(f'Wrote {batch_written} orders, {batch_failed} failed, '
+                              f'{batch_retried} waiting for the payment provider.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} orders, {failed} failed, '
+            f'{retried} waiting for the payment provider.'
+        ))
@@ -0,0 +1,24 @@
+"""
+Django command to rebuild the daily revenue rollup (core.models.DailyRevenue).
+"""
+import datetime
+
+from django.core.management import BaseCommand
+
+from core.revenue import rebuild_daily_revenue
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the daily revenue for a date range."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat, default=None,
+                            help='First day to rebuild (YYYY-MM-DD), all days when omitted.')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, default=None,
+                            help='Last day to rebuild (YYYY-MM-DD), all days when omitted.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        created = rebuild_daily_revenue(options['start'], options['end'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} daily revenue rows.'))
@@ -0,0 +1,24 @@
+"""
+Django command to refill the pool of pre-generated link codes.
+"""
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from core.link_codes import refill_pool, pool_size
+
+
+class Command(BaseCommand):
+    """Django command to refill the link code pool.
+       Meant to run periodically, e.g. from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=settings.LINK_CODE_POOL_SIZE,
+                            help='Number of codes the pool should hold.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        added = refill_pool(options['size'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {added} codes, the pool holds {pool_size()} codes.'
+        ))
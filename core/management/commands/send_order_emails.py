@@ -0,0 +1,20 @@
+"""
+Django command to send the queued order confirmation emails.
+"""
+from django.core.management import BaseCommand
+
+from checkout.confirmation import send_queued_emails
+
+
+class Command(BaseCommand):
+    """Django command to send the confirmation emails of batch confirmed orders.
+       Meant to run periodically, e.g. from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of orders whose emails are sent over one connection.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        sent = send_queued_emails(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sent the emails of {sent} orders.'))
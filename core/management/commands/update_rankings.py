@@ -1,18 +1,15 @@
 """
 Django command to update rankings (ambassador.views.RankingsAPIView).
 """
-from django.contrib.auth import get_user_model
 from django.core.management import BaseCommand
-from django_redis import get_redis_connection
+
+from core.rankings import rebuild_rankings
 
 
 class Command(BaseCommand):
-    """Django command to update rankings"""
+    """Django command to update rankings.
+       Confirmed orders update them as well, this recomputes them from the
+       daily revenue, e.g. after rebuild_revenue or a Redis outage."""
 
     def handle(self, *args, **options):
-        con = get_redis_connection('default')
-
-        ambassadors = get_user_model().objects.filter(is_ambassador=True)
-
-        for ambassador in ambassadors:
-            con.zadd('rankings', {ambassador.name: float(ambassador.revenue)})
+        rebuild_rankings()
@@ -0,0 +1,62 @@
+# Generated by Django 4.1.5 on 2026-10-19 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncDate
+import django.db.models.deletion
+
+
+def fill_daily_revenue(apps, schema_editor):
+    """Roll up the orders completed before the table existed."""
+    Order = apps.get_model('core', 'Order')
+    DailyRevenue = apps.get_model('core', 'DailyRevenue')
+    zero = models.Value(0, output_field=models.DecimalField())
+    rows = (Order.objects.filter(complete=True)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'user_id', 'code')
+            .annotate(order_count=models.Count('id', distinct=True),
+                      admin_total=Coalesce(models.Sum('order_items__admin_revenue'), zero),
+                      ambassador_total=Coalesce(models.Sum('order_items__ambassador_revenue'), zero))
+            .order_by())
+    DailyRevenue.objects.bulk_create(
+        (DailyRevenue(day=row['day'], user_id=row['user_id'], code=row['code'],
+                      orders=row['order_count'], admin_revenue=row['admin_total'],
+                      ambassador_revenue=row['ambassador_total'])
+         for row in rows.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_order_zip_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('code', models.CharField(max_length=255)),
+                ('orders', models.IntegerField(default=0)),
+                ('admin_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ambassador_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailyrevenue',
+            index=models.Index(fields=['user', 'day'], name='core_dailyr_user_id_0f3fb2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrevenue',
+            index=models.Index(fields=['code', 'day'], name='core_dailyr_code_443137_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(fields=('day', 'user', 'code'), name='unique_daily_revenue'),
+        ),
+        migrations.RunPython(fill_daily_revenue, migrations.RunPython.noop),
+    ]
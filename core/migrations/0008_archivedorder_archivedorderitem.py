@@ -0,0 +1,50 @@
+# Generated by Django 4.1.5 on 2026-10-19 00:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_id', models.CharField(max_length=255, null=True)),
+                ('code', models.CharField(max_length=255)),
+                ('ambassador_email', models.EmailField(max_length=255)),
+                ('first_name', models.CharField(max_length=255)),
+                ('last_name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=255)),
+                ('address', models.CharField(max_length=255, null=True)),
+                ('city', models.CharField(max_length=255, null=True)),
+                ('country', models.CharField(max_length=255, null=True)),
+                ('zip_code', models.CharField(max_length=10, null=True)),
+                ('complete', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('product_title', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.IntegerField()),
+                ('admin_revenue', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('ambassador_revenue', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='core.archivedorder')),
+            ],
+        ),
+    ]
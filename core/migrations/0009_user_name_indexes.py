@@ -0,0 +1,21 @@
+# Generated by Django 4.1.5 on 2026-10-19 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_archivedorder_archivedorderitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['first_name'], name='core_user_first_n_9988cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name'], name='core_user_last_na_cc993d_idx'),
+        ),
+    ]
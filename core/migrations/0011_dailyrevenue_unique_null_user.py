@@ -0,0 +1,40 @@
+# Generated by Django 4.1.5 on 2026-10-19 01:41
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+def merge_null_user_rows(apps, schema_editor):
+    """Merge the rows of deleted users that the old constraint let through twice."""
+    DailyRevenue = apps.get_model('core', 'DailyRevenue')
+    kept = {}
+    for row in DailyRevenue.objects.filter(user__isnull=True).order_by('id'):
+        key = (row.day, row.code)
+        if key not in kept:
+            kept[key] = row
+            continue
+        first = kept[key]
+        first.orders += row.orders
+        first.admin_revenue += row.admin_revenue
+        first.ambassador_revenue += row.ambassador_revenue
+        first.save(update_fields=['orders', 'admin_revenue', 'ambassador_revenue'])
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_linkclicks'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_null_user_rows, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='dailyrevenue',
+            name='unique_daily_revenue',
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(models.F('day'), django.db.models.functions.comparison.Coalesce('user', 0), models.F('code'), name='unique_daily_revenue'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.5 on 2026-10-19 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_dailyrevenue_unique_null_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='transaction_id',
+            field=models.CharField(max_length=255, null=True, unique=True),
+        ),
+    ]
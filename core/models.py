@@ -4,6 +4,7 @@ Database models for the project.
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Coalesce
 
 
 class UserManager(BaseUserManager):
@@ -51,14 +52,21 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # prefix search of the admin ambassador list
+            models.Index(fields=['first_name']),
+            models.Index(fields=['last_name']),
+        ]
+
     @property
     def name(self):
         return f'{self.first_name} {self.last_name}'
 
     @property
     def revenue(self):
-        orders = Order.objects.filter(user__id=self.pk, complete=True)
-        return sum(o.ambassador_revenue for o in orders)
+        return (DailyRevenue.objects.filter(user_id=self.pk)
+                .aggregate(revenue=models.Sum('ambassador_revenue'))['revenue'] or 0)
 
 
 class Product(models.Model):
@@ -81,9 +89,20 @@ class Link(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class LinkClicks(models.Model):
+    """Number of visits of a link. Visits are counted in Redis and added here
+       in batches by the flush_link_clicks command (core.clicks)."""
+    code = models.CharField(max_length=255, unique=True)
+    clicks = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Clicks {self.code}'
+
+
 class Order(models.Model):
     """Order model."""
-    transaction_id = models.CharField(max_length=255, null=True)
+    transaction_id = models.CharField(max_length=255, null=True, unique=True)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     code = models.CharField(max_length=255)
     ambassador_email = models.EmailField(max_length=255)
@@ -115,7 +134,7 @@ class Order(models.Model):
     @property
     def admin_revenue(self):
         items = OrderItem.objects.filter(order__id=self.pk)
-        return sum(i.aadmin_revenue for i in items)
+        return sum(i.admin_revenue for i in items)
 
 
 class OrderItem(models.Model):
@@ -131,3 +150,69 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f'Order Item {self.id}'
+
+
+class DailyRevenue(models.Model):
+    """Completed orders and revenue of a link on a day.
+       Maintained by core.revenue when orders are confirmed."""
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    code = models.CharField(max_length=255)
+    orders = models.IntegerField(default=0)
+    admin_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ambassador_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # the user is null once deleted, and nulls never conflict in a unique key
+            models.UniqueConstraint('day', Coalesce('user', 0), 'code',
+                                    name='unique_daily_revenue'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day']),
+            models.Index(fields=['code', 'day']),
+        ]
+
+    def __str__(self):
+        return f'Revenue {self.day} {self.code}'
+
+
+class ArchivedOrder(models.Model):
+    """Completed order moved out of the Order table by the archive_orders command.
+       It keeps the id and the fields of the order, its revenue stays in DailyRevenue."""
+    id = models.BigIntegerField(primary_key=True)
+    transaction_id = models.CharField(max_length=255, null=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    code = models.CharField(max_length=255)
+    ambassador_email = models.EmailField(max_length=255)
+    first_name = models.CharField(max_length=255)
+    last_name = models.CharField(max_length=255)
+    email = models.EmailField(max_length=255)
+    address = models.CharField(max_length=255, null=True)
+    city = models.CharField(max_length=255, null=True)
+    country = models.CharField(max_length=255, null=True)
+    zip_code = models.CharField(max_length=10, null=True)
+    complete = models.BooleanField(default=True)
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Archived order: {self.transaction_id}'
+
+
+class ArchivedOrderItem(models.Model):
+    """Item of an ArchivedOrder."""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE,
+                              related_name='order_items')
+    product_title = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.IntegerField()
+    admin_revenue = models.DecimalField(max_digits=10, decimal_places=2)
+    ambassador_revenue = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'Archived order item {self.id}'
@@ -0,0 +1,140 @@
+"""
+Ambassador rankings per time window.
+
+Every window has a Redis sorted set of ambassador names scored by their
+revenue: one per day, week (starting on Monday) and month, and the all-time
+`rankings` set. record_revenue() adds confirmed orders to the sets of the
+windows their day falls in, so RankingsAPIView reads a window with a single
+ZREVRANGE. The day, week and month sets expire RANKINGS_EXPIRE_AFTER seconds
+after their window ends. rebuild_rankings() recomputes the current windows
+from the daily revenue, building the week and month sets as the ZUNIONSTORE
+of their day sets.
+"""
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from core.models import DailyRevenue
+
+ALL_TIME_KEY = 'rankings'
+WINDOWS = ['day', 'week', 'month', 'all']
+
+
+def window_bounds(window, day):
+    """Return the first day of the `window` containing `day` and the day after its last."""
+    if window == 'day':
+        start = day
+        return start, start + datetime.timedelta(days=1)
+    if window == 'week':
+        start = day - datetime.timedelta(days=day.weekday())
+        return start, start + datetime.timedelta(days=7)
+    start = day.replace(day=1)
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def ranking_key(window, day=None):
+    """Return the key of the sorted set of the `window` containing `day` (default today)."""
+    if window == 'all':
+        return ALL_TIME_KEY
+    start, _ = window_bounds(window, day or timezone.localdate())
+    return f'rankings:{window}:{start.isoformat()}'
+
+
+def expires_at(window, day):
+    """Return when the sorted set of the `window` containing `day` expires."""
+    _, end = window_bounds(window, day)
+    end = timezone.make_aware(datetime.datetime.combine(end, datetime.time()))
+    return end + datetime.timedelta(seconds=settings.RANKINGS_EXPIRE_AFTER)
+
+
+def ambassador_name(row):
+    """Return the ranked name of the ambassador of a daily revenue values() row."""
+    return f'{row["user__first_name"]} {row["user__last_name"]}'
+
+
+def get_rankings(window='all'):
+    """Return the names and revenues of the ambassadors in the current `window`,
+       highest revenue first."""
+    con = get_redis_connection('default')
+    rankings = con.zrevrange(ranking_key(window), 0, -1, withscores=True)
+    return {name.decode('utf-8'): score for name, score in rankings}
+
+
+def record_revenue(revenue):
+    """Add ambassador revenue to the rankings. `revenue` maps (day, user id)
+       to the revenue the user earned with the orders of that day.
+       Called by record_orders() once the orders are committed. Only
+       ambassadors are ranked, as by rebuild_rankings(). Nothing is recorded
+       when the cache is not django-redis."""
+    try:
+        pipe = get_redis_connection('default').pipeline()
+    except NotImplementedError:
+        return
+    names = {user.id: user.name for user in
+             get_user_model().objects.filter(id__in={user_id for _, user_id in revenue},
+                                             is_ambassador=True)
+             .only('first_name', 'last_name')}
+    now = timezone.now()
+
+    for (day, user_id), amount in revenue.items():
+        name = names.get(user_id)
+        if name is None:
+            continue
+        pipe.zincrby(ALL_TIME_KEY, float(amount), name)
+        for window in WINDOWS[:-1]:
+            expiry = expires_at(window, day)
+            # the set of a window that ended long ago expired and is not recreated
+            if expiry > now:
+                key = ranking_key(window, day)
+                pipe.zincrby(key, float(amount), name)
+                pipe.expireat(key, expiry)
+    try:
+        pipe.execute()
+    except RedisError:
+        # the orders are committed already, rebuild_rankings() catches up
+        pass
+
+
+def rebuild_rankings(today=None):
+    """Recompute the all-time rankings and the rankings of the current day,
+       week and month from the daily revenue."""
+    today = today or timezone.localdate()
+    start = min(window_bounds('week', today)[0], window_bounds('month', today)[0])
+    revenues = DailyRevenue.objects.filter(user__is_ambassador=True)
+
+    days = {start + datetime.timedelta(days=i): {} for i in range((today - start).days + 1)}
+    rows = (revenues.filter(day__gte=start, day__lte=today)
+            .values('day', 'user__first_name', 'user__last_name')
+            .annotate(total=Sum('ambassador_revenue'))
+            .order_by())
+    for row in rows:
+        days[row['day']][ambassador_name(row)] = float(row['total'])
+
+    rows = (revenues.values('user__first_name', 'user__last_name')
+            .annotate(total=Sum('ambassador_revenue'))
+            .order_by())
+    all_time = {ambassador_name(row): float(row['total']) for row in rows}
+
+    pipe = get_redis_connection('default').pipeline()
+    pipe.delete(ALL_TIME_KEY)
+    if all_time:
+        pipe.zadd(ALL_TIME_KEY, all_time)
+    for day, scores in days.items():
+        key = ranking_key('day', day)
+        pipe.delete(key)
+        if scores:
+            pipe.zadd(key, scores)
+    for window in ('week', 'month'):
+        window_start = window_bounds(window, today)[0]
+        pipe.zunionstore(ranking_key(window, today),
+                         [ranking_key('day', day) for day in days if day >= window_start])
+        pipe.expireat(ranking_key(window, today), expires_at(window, today))
+    # set last, an expiry in the past deletes the day set right away
+    for day in days:
+        pipe.expireat(ranking_key('day', day), expires_at('day', day))
+    pipe.execute()
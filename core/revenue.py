@@ -0,0 +1,185 @@
+"""
+Daily revenue rollup.
+
+DailyRevenue holds the completed orders and the revenue of every link per day,
+so stats and rankings sum a few rollup rows instead of all the order items.
+record_orders() adds confirmed orders to the locked rollup rows in bulk and
+rebuild_daily_revenue() recomputes any date range from the orders and the
+archived orders and revenue_time_series() buckets the rollup for the admin
+analytics. Confirmed orders are also added to the Redis rankings (core.rankings)
+and invalidate the cached revenue of their ambassador (get_user_revenue()) once
+their transaction commits.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+
+from core.models import ArchivedOrder, DailyRevenue, Order
+from core.rankings import record_revenue
+
+USER_REVENUE_KEY = 'user_revenue:{}'
+USER_REVENUE_VERSION_KEY = 'user_revenue_version:{}'
+REVENUE_VERSION_KEY = 'user_revenue_version'
+
+PERIODS = {
+    'day': F('day'),
+    'week': TruncWeek('day'),
+    'month': TruncMonth('day'),
+}
+
+
+def aggregate_orders(orders):
+    """Return the orders and their revenue summed per day, ambassador and code."""
+    zero = Value(0, output_field=DecimalField())
+    return (orders.annotate(day=TruncDate('created_at'))
+            .values('day', 'user_id', 'code')
+            .annotate(order_count=Count('id', distinct=True),
+                      admin_total=Coalesce(Sum('order_items__admin_revenue'), zero),
+                      ambassador_total=Coalesce(Sum('order_items__ambassador_revenue'), zero))
+            .order_by())
+
+
+def record_orders(order_ids):
+    """Add newly confirmed orders to the daily revenue, with the same queries
+       for any number of orders, days and links.
+       Call it in the transaction that completes the orders, once per order."""
+    rows = {(row['day'], row['user_id'], row['code']): row
+            for row in aggregate_orders(Order.objects.filter(id__in=order_ids))}
+    if not rows:
+        return
+
+    try:
+        with transaction.atomic():
+            add_daily_revenue(rows)
+    except IntegrityError:
+        # another transaction created some of the rows first, they are updated now
+        add_daily_revenue(rows)
+
+    revenue = defaultdict(int)
+    for (day, user_id, _), row in rows.items():
+        revenue[day, user_id] += row['ambassador_total']
+    transaction.on_commit(lambda: record_revenue(revenue))
+    transaction.on_commit(
+        lambda: invalidate_user_revenue({user_id for _, user_id in revenue})
+    )
+
+
+def add_daily_revenue(rows):
+    """Add the aggregated orders in `rows` by (day, user id, code) to their
+       rollup rows, updating the existing rows in one query and creating the
+       missing ones in another."""
+    existing = {(rollup.day, rollup.user_id, rollup.code): rollup
+                for rollup in DailyRevenue.objects.select_for_update()
+                .filter(day__in={day for day, _, _ in rows},
+                        code__in={code for _, _, code in rows})}
+    updated, created = [], []
+    for key, row in rows.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            day, user_id, code = key
+            created.append(DailyRevenue(day=day, user_id=user_id, code=code,
+                                        orders=row['order_count'],
+                                        admin_revenue=row['admin_total'],
+                                        ambassador_revenue=row['ambassador_total']))
+            continue
+        rollup.orders += row['order_count']
+        rollup.admin_revenue += row['admin_total']
+        rollup.ambassador_revenue += row['ambassador_total']
+        updated.append(rollup)
+
+    if updated:
+        DailyRevenue.objects.bulk_update(updated, ['orders', 'admin_revenue',
+                                                   'ambassador_revenue'])
+    if created:
+        DailyRevenue.objects.bulk_create(created)
+
+
+@transaction.atomic
+def rebuild_daily_revenue(start=None, end=None, batch_size=1000):
+    """Recompute the daily revenue between the `start` and `end` days (inclusive)
+       from the orders and the archived orders. Returns the number of rollup rows created."""
+    querysets = [Order.objects.filter(complete=True), ArchivedOrder.objects.all()]
+    rollups = DailyRevenue.objects.all()
+    if start:
+        querysets = [qs.filter(created_at__date__gte=start) for qs in querysets]
+        rollups = rollups.filter(day__gte=start)
+    if end:
+        querysets = [qs.filter(created_at__date__lte=end) for qs in querysets]
+        rollups = rollups.filter(day__lte=end)
+
+    # orders of a day can be split between the tables when some were archived
+    rows = {}
+    for orders in querysets:
+        for row in aggregate_orders(orders).iterator():
+            key = (row['day'], row['user_id'], row['code'])
+            if key in rows:
+                rollup = rows[key]
+                rollup.orders += row['order_count']
+                rollup.admin_revenue += row['admin_total']
+                rollup.ambassador_revenue += row['ambassador_total']
+            else:
+                rows[key] = DailyRevenue(day=row['day'], user_id=row['user_id'],
+                                         code=row['code'], orders=row['order_count'],
+                                         admin_revenue=row['admin_total'],
+                                         ambassador_revenue=row['ambassador_total'])
+
+    rollups.delete()
+    created = DailyRevenue.objects.bulk_create(rows.values(), batch_size=batch_size)
+    # every cached user revenue was computed before the rebuild
+    transaction.on_commit(lambda: cache.set(REVENUE_VERSION_KEY, uuid.uuid4().hex, None))
+    return len(created)
+
+
+def get_user_revenue(user_id):
+    """Return the revenue the user earned, cached in cents for
+       USER_REVENUE_CACHE_TIMEOUT seconds. The cached value is stored with the
+       versions read before it was computed, so a value computed while a
+       confirmation or a rebuild committed is not served after it."""
+    key, version_key = USER_REVENUE_KEY.format(user_id), USER_REVENUE_VERSION_KEY.format(user_id)
+    values = cache.get_many([key, version_key, REVENUE_VERSION_KEY])
+    version = (values.get(version_key), values.get(REVENUE_VERSION_KEY))
+    cached = values.get(key)
+    if cached is not None and cached[0] == version:
+        return Decimal(cached[1]).scaleb(-2)
+
+    revenue = (DailyRevenue.objects.filter(user_id=user_id)
+               .aggregate(revenue=Sum('ambassador_revenue'))['revenue'] or 0)
+    cents = int(revenue * 100)
+    cache.set(key, (version, cents), settings.USER_REVENUE_CACHE_TIMEOUT)
+    return Decimal(cents).scaleb(-2)
+
+
+def invalidate_user_revenue(user_ids):
+    """Give the users a new revenue version, so their cached revenue is
+       computed again. Called by record_orders() once the orders are committed."""
+    cache.set_many({USER_REVENUE_VERSION_KEY.format(user_id): uuid.uuid4().hex
+                    for user_id in user_ids}, None)
+
+
+def revenue_time_series(start, end, period='day', group_by_ambassador=False):
+    """Return the orders and revenue between the `start` and `end` days (inclusive)
+       bucketed by day, week or month, optionally per ambassador."""
+    fields = ['period', 'user_id', 'user__email'] if group_by_ambassador else ['period']
+    rows = (DailyRevenue.objects.filter(day__gte=start, day__lte=end)
+            .annotate(period=PERIODS[period])
+            .values(*fields)
+            .annotate(orders_count=Sum('orders'),
+                      admin_total=Sum('admin_revenue'),
+                      ambassador_total=Sum('ambassador_revenue'))
+            .order_by(*fields))
+
+    results = []
+    for row in rows:
+        result = {'period': row['period']}
+        if group_by_ambassador:
+            result.update(ambassador=row['user_id'], ambassador_email=row['user__email'])
+        result.update(orders=row['orders_count'], admin_revenue=row['admin_total'],
+                      ambassador_revenue=row['ambassador_total'])
+        results.append(result)
+    return results
@@ -0,0 +1,134 @@
+"""
+Fake data generation for the populate_* commands.
+
+The generators only use Faker and random, so batches can be built in worker
+processes while the command inserts the previous ones with bulk_create.
+Each batch takes a small pool of Faker values and combines them randomly,
+which is much faster than calling Faker for every field of every row.
+"""
+import itertools
+import multiprocessing
+import random
+import string
+from functools import partial
+
+from faker import Faker
+
+POOL_SIZE = 200
+
+
+def get_faker(seed):
+    """Return a Faker instance seeded for a batch."""
+    faker = Faker()
+    faker.seed_instance(seed)
+    return faker
+
+
+def generate_ambassadors(count, seed):
+    """Return `count` (first_name, last_name, email) tuples with unique emails."""
+    faker = get_faker(seed)
+    rng = random.Random(seed)
+    first_names = [faker.first_name() for _ in range(POOL_SIZE)]
+    last_names = [faker.last_name() for _ in range(POOL_SIZE)]
+    domains = [faker.free_email_domain() for _ in range(10)]
+
+    rows = []
+    for i in range(count):
+        first_name, last_name = rng.choice(first_names), rng.choice(last_names)
+        email = clean_email(f'{first_name}.{last_name}.{seed}.{i}@{rng.choice(domains)}')
+        rows.append((first_name, last_name, email))
+    return rows
+
+
+def generate_products(count, seed):
+    """Return `count` (title, description, image, price) tuples."""
+    faker = get_faker(seed)
+    rng = random.Random(seed)
+    titles = [faker.name() for _ in range(POOL_SIZE)]
+    descriptions = [faker.text() for _ in range(POOL_SIZE)]
+    images = [faker.image_url() for _ in range(POOL_SIZE)]
+    return [
+        (rng.choice(titles), rng.choice(descriptions), rng.choice(images), rng.randrange(10, 100))
+        for _ in range(count)
+    ]
+
+
+def generate_orders(count, seed, link_cum_weights, product_count,
+                    items_per_order=(1, 4), complete_ratio=0.9):
+    """Return `count` orders as (link_index, customer, complete, items) tuples.
+       Links are picked with the cumulative `link_cum_weights`, items are
+       (product_index, quantity) pairs and customer is a dict of Order fields."""
+    faker = get_faker(seed)
+    rng = random.Random(seed)
+    first_names = [faker.first_name() for _ in range(POOL_SIZE)]
+    last_names = [faker.last_name() for _ in range(POOL_SIZE)]
+    addresses = [faker.street_address() for _ in range(POOL_SIZE)]
+    cities = [faker.city() for _ in range(POOL_SIZE)]
+    countries = [faker.country() for _ in range(POOL_SIZE)]
+    zip_codes = [faker.postcode()[:10] for _ in range(POOL_SIZE)]
+
+    link_indexes = rng.choices(range(len(link_cum_weights)), cum_weights=link_cum_weights, k=count)
+    rows = []
+    for link_index in link_indexes:
+        first_name, last_name = rng.choice(first_names), rng.choice(last_names)
+        customer = {
+            'transaction_id': random_code(rng, 20, string.ascii_letters + string.digits),
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': clean_email(f'{first_name}.{last_name}@example.com'),
+            'address': rng.choice(addresses),
+            'city': rng.choice(cities),
+            'country': rng.choice(countries),
+            'zip_code': rng.choice(zip_codes),
+        }
+        items = [(rng.randrange(product_count), rng.randrange(1, 5))
+                 for _ in range(rng.randint(*items_per_order))]
+        rows.append((link_index, customer, rng.random() < complete_ratio, items))
+    return rows
+
+
+def clean_email(email):
+    """Lowercase an email and drop characters such as spaces and apostrophes."""
+    return ''.join(c for c in email.lower() if c.isalnum() or c in '.@-')
+
+
+def random_code(rng, length=6, alphabet=string.ascii_lowercase + string.digits):
+    """Return a random code like the ones LinkAPIView generates."""
+    return ''.join(rng.choices(alphabet, k=length))
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """Return cumulative weights giving a skewed, Zipf-like popularity:
+       the first items are picked far more often than the last ones."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+_generator = None
+
+
+def _init_worker(generator):
+    global _generator
+    _generator = generator
+
+
+def _call(args):
+    return _generator(*args)
+
+
+def generate_batches(generator, count, batch_size, workers=1, seed=0, **kwargs):
+    """Yield lists of rows built by `generator(batch_count, batch_seed, **kwargs)`.
+       Batch seeds are unique strings derived from `seed`. With more than one
+       worker the batches are built in a process pool, which receives the
+       keyword arguments only once."""
+    generator = partial(generator, **kwargs)
+    batches = [
+        (min(batch_size, count - start), f'{seed}-{number}')
+        for number, start in enumerate(range(0, count, batch_size))
+    ]
+    if workers <= 1:
+        for batch_count, batch_seed in batches:
+            yield generator(batch_count, batch_seed)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(generator,)) as pool:
+        yield from pool.imap(_call, batches)
@@ -0,0 +1,90 @@
+"""
+Tests for archiving old orders.
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.archive import archive_orders
+from core.models import ArchivedOrder, ArchivedOrderItem, DailyRevenue, Order, OrderItem
+from core.revenue import rebuild_daily_revenue, record_orders
+
+CUTOFF = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class ArchiveOrdersTests(TestCase):
+    """Tests for archive_orders."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+
+    def create_order(self, created_at, complete=True, code='abc123'):
+        """Create a confirmed order with two items, created at `created_at`."""
+        order = Order.objects.create(user=self.user, code=code, ambassador_email=self.user.email,
+                                     first_name='First', last_name='Last',
+                                     email='customer@example.com', complete=complete)
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=1,
+                                     admin_revenue=9, ambassador_revenue=1)
+        if complete:
+            record_orders([order.pk])
+        return order
+
+    def test_archive_old_completed_orders(self):
+        """Test that only completed orders created before the cutoff are archived."""
+        old = [self.create_order(CUTOFF - datetime.timedelta(days=i + 1)) for i in range(5)]
+        incomplete = self.create_order(CUTOFF - datetime.timedelta(days=1), complete=False)
+        recent = self.create_order(CUTOFF + datetime.timedelta(days=1))
+
+        self.assertEqual(archive_orders(CUTOFF, batch_size=2), 5)
+
+        self.assertEqual(set(Order.objects.values_list('id', flat=True)),
+                         {incomplete.id, recent.id})
+        self.assertEqual(OrderItem.objects.count(), 4)
+        self.assertEqual(set(ArchivedOrder.objects.values_list('id', flat=True)),
+                         {order.id for order in old})
+        self.assertEqual(ArchivedOrderItem.objects.count(), 10)
+
+        archived = ArchivedOrder.objects.get(id=old[0].id)
+        self.assertEqual(archived.created_at, CUTOFF - datetime.timedelta(days=1))
+        self.assertEqual((archived.code, archived.user), ('abc123', self.user))
+
+    def test_revenue_unchanged(self):
+        """Test that the revenue totals are the same after archiving and rebuilding."""
+        day = CUTOFF - datetime.timedelta(days=1)
+        self.create_order(day)
+        self.create_order(day, code='other')
+        # completed after the others were archived, on the same day
+        late = self.create_order(day, complete=False)
+        self.create_order(CUTOFF)
+        rollup = list(DailyRevenue.objects.order_by('day', 'code')
+                      .values('day', 'code', 'orders', 'admin_revenue', 'ambassador_revenue'))
+        revenue = self.user.revenue
+
+        archive_orders(CUTOFF)
+        Order.objects.filter(pk=late.pk).update(complete=True)
+        record_orders([late.pk])
+        self.assertEqual(self.user.revenue, revenue + 2)
+
+        rebuild_daily_revenue()
+        rebuilt = list(DailyRevenue.objects.order_by('day', 'code')
+                       .values('day', 'code', 'orders', 'admin_revenue', 'ambassador_revenue'))
+        rollup[0].update(orders=2, admin_revenue=36, ambassador_revenue=4)
+        self.assertEqual(rebuilt, rollup)
+
+    def test_archive_orders_command(self):
+        """Test that the command archives orders created before the given day."""
+        self.create_order(CUTOFF - datetime.timedelta(days=1))
+        self.create_order(CUTOFF)
+        out = StringIO()
+
+        call_command('archive_orders', '--before', '2023-01-01', stdout=out)
+
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertIn('Archived 1 orders', out.getvalue())
@@ -0,0 +1,82 @@
+"""
+Tests for the link click counters.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from core.clicks import CLICKS_KEY, FLUSH_KEY, flush_clicks, record_click
+from core.models import LinkClicks
+
+
+class LinkClicksTests(TestCase):
+    """Tests for counting and flushing link clicks."""
+
+    def setUp(self):
+        self.con = get_redis_connection('default')
+        self.con.delete(CLICKS_KEY, FLUSH_KEY)
+        get_user_model().objects.create_user(email='user@example.com', password='password')
+
+    def test_record_click(self):
+        """Test that clicks are counted per code in Redis."""
+        with self.assertNumQueries(0):
+            for code in ('abc123', 'abc123', 'other'):
+                record_click(code)
+
+        self.assertEqual(self.con.hgetall(CLICKS_KEY), {b'abc123': b'2', b'other': b'1'})
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_record_click_cache_not_redis(self):
+        """Test that clicks are not counted when the cache is not django-redis."""
+        record_click('abc123')
+
+        self.assertEqual(self.con.hgetall(CLICKS_KEY), {})
+
+    def test_flush_clicks(self):
+        """Test that flushes add the counted clicks to the table and reset the counters."""
+        LinkClicks.objects.create(code='abc123', clicks=5)
+        for code in ('abc123', 'abc123', 'other'):
+            record_click(code)
+
+        self.assertEqual(flush_clicks(), 3)
+
+        self.assertEqual(dict(LinkClicks.objects.values_list('code', 'clicks')),
+                         {'abc123': 7, 'other': 1})
+        self.assertFalse(self.con.exists(CLICKS_KEY, FLUSH_KEY))
+        self.assertEqual(flush_clicks(), 0)
+
+    def test_flush_batches(self):
+        """Test that the upserts run one batch of codes at a time."""
+        for i in range(5):
+            record_click(f'code{i}')
+
+        # a select and an upsert per batch, in a savepoint
+        with self.assertNumQueries(3 * 2 + 2):
+            flush_clicks(batch_size=2)
+
+        self.assertEqual(LinkClicks.objects.count(), 5)
+
+    def test_failed_flush_retried(self):
+        """Test that the clicks of a failed flush are flushed by the next one,
+           with the clicks counted in the meantime."""
+        self.con.hset(FLUSH_KEY, 'abc123', 4)
+        record_click('abc123')
+
+        flush_clicks()
+        self.assertEqual(LinkClicks.objects.get(code='abc123').clicks, 4)
+        flush_clicks()
+        self.assertEqual(LinkClicks.objects.get(code='abc123').clicks, 5)
+
+    def test_flush_link_clicks_command(self):
+        """Test that the command flushes the clicks."""
+        record_click('abc123')
+        out = StringIO()
+
+        call_command('flush_link_clicks', stdout=out)
+
+        self.assertEqual(LinkClicks.objects.get().clicks, 1)
+        self.assertIn('Flushed 1 clicks', out.getvalue())
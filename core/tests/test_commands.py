@@ -3,12 +3,19 @@ Tests custom Django management commands.
 """
 from unittest.mock import patch
 
-from django.core.management import call_command
-from django.test import SimpleTestCase, TestCase
+from django.core.management import call_command, CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.db.models import Count
 from django.db.utils import OperationalError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework.test import APIClient
 
-from core.models import Product
+from ambassador_drf import settings_benchmark
+from common.authentication import JWTAuthentication
+from core.management.commands.benchmark_endpoints import (seed_dataset, get_endpoints,
+                                                           benchmark_endpoint, percentile)
+from core.models import Product, Link, Order, DailyRevenue
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -53,3 +60,128 @@ class PopulateCommandsTests(TestCase):
         self.assertEqual(Product.objects.all().count(), 0)
         call_command('populate_products')
         self.assertEqual(Product.objects.all().count(), 30)
+
+    def test_populate_count_option(self):
+        """Test that --count and --batch-size control the number of rows."""
+        call_command('populate_ambassadors', count=25, batch_size=10, seed=1)
+        call_command('populate_products', count=7, batch_size=3, seed=1)
+
+        self.assertEqual(get_user_model().objects.filter(is_ambassador=True).count(), 25)
+        self.assertEqual(Product.objects.count(), 7)
+
+    def test_populate_orders_use_existing_links(self):
+        """Test that populated orders point at real links and their owners."""
+        call_command('populate_ambassadors', count=5, seed=1)
+        call_command('populate_products', count=5, seed=1)
+        call_command('populate_orders', count=50, batch_size=20, links=8, seed=1)
+
+        links = dict(Link.objects.values_list('code', 'user_id'))
+        self.assertEqual(len(links), 8)
+        self.assertEqual(Order.objects.count(), 50)
+        for order in Order.objects.all():
+            self.assertEqual(order.user_id, links[order.code])
+            self.assertTrue(order.order_items.exists())
+
+    def test_populate_orders_rebuild_daily_revenue(self):
+        """Test that the completed orders are rolled up in the daily revenue."""
+        call_command('populate_ambassadors', count=3, seed=1)
+        call_command('populate_products', count=3, seed=1)
+        call_command('populate_orders', count=40, links=4, seed=1)
+
+        completed = Order.objects.filter(complete=True).count()
+        self.assertGreater(completed, 0)
+        self.assertEqual(sum(DailyRevenue.objects.values_list('orders', flat=True)), completed)
+
+    def test_populate_orders_skewed_popularity(self):
+        """Test that some links get far more orders than others."""
+        call_command('populate_ambassadors', count=2, seed=1)
+        call_command('populate_products', count=2, seed=1)
+        call_command('populate_orders', count=500, links=20, seed=1)
+
+        counts = sorted(Order.objects.values('code').annotate(n=Count('id'))
+                        .values_list('n', flat=True), reverse=True)
+        self.assertGreater(counts[0], 5 * counts[-1])
+
+    def test_populate_orders_without_products(self):
+        """Test that populating orders without products fails."""
+        with self.assertRaises(CommandError):
+            call_command('populate_orders')
+
+    def test_populate_ambassadors_hash_password_once(self):
+        """Test that ambassadors share one hash of the seed password."""
+        with patch('core.management.commands.populate_ambassadors.make_password',
+                   wraps=make_password) as patched_make_password:
+            call_command('populate_ambassadors', count=5, seed=1)
+
+        patched_make_password.assert_called_once()
+        users = get_user_model().objects.filter(is_ambassador=True)
+        self.assertEqual(len({user.password for user in users}), 1)
+        self.assertTrue(users[0].check_password('123456'))
+
+    @override_settings(PASSWORD_HASHERS=settings_benchmark.PASSWORD_HASHERS)
+    def test_populate_ambassadors_cheap_hasher(self):
+        """Test seeding ambassadors with the md5 hasher of the benchmark settings."""
+        call_command('populate_ambassadors', count=3, hasher='md5', password='secret123')
+
+        user = get_user_model().objects.filter(is_ambassador=True).first()
+        self.assertTrue(user.password.startswith('md5$'))
+        self.assertTrue(user.check_password('secret123'))
+
+    def test_md5_not_accepted_by_default(self):
+        """Test that the md5 hasher is neither used nor accepted by the base settings."""
+        with self.assertRaises(CommandError):
+            call_command('populate_ambassadors', count=1, hasher='md5')
+
+        user = get_user_model().objects.create(email='md5@example.com', is_ambassador=True,
+                                               password='md5$salt$0123456789abcdef')
+        self.assertFalse(user.check_password('secret123'))
+
+    def test_populate_ambassadors_unknown_hasher(self):
+        """Test that an unknown hasher is rejected."""
+        with self.assertRaises(CommandError):
+            call_command('populate_ambassadors', count=1, hasher='rot13')
+
+    def test_populate_with_workers(self):
+        """Test generating the fake data in worker processes."""
+        call_command('populate_ambassadors', count=20, batch_size=5, workers=2, seed=1)
+
+        self.assertEqual(get_user_model().objects.filter(is_ambassador=True).count(), 20)
+
+
+class BenchmarkEndpointsCommandTests(TestCase):
+    """Tests for the benchmark_endpoints command helpers."""
+
+    def test_seed_dataset(self):
+        """Test seeding a dataset with the requested sizes."""
+        dataset = seed_dataset(ambassadors=3, products=5, links=4, orders=10, items_per_order=2)
+
+        self.assertEqual(get_user_model().objects.filter(is_ambassador=True).count(), 3)
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(Link.objects.count(), 4)
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertTrue(set(Order.objects.values_list('code', flat=True))
+                        <= set(dataset.link_codes))
+        self.assertEqual(sum(DailyRevenue.objects.values_list('orders', flat=True)),
+                         Order.objects.filter(complete=True).count())
+
+    def test_benchmark_endpoint(self):
+        """Test that an endpoint is timed and its queries counted."""
+        dataset = seed_dataset(ambassadors=2, products=3, links=2, orders=4, items_per_order=1)
+        endpoint = next(e for e in get_endpoints(dataset) if e.name == 'admin:orders')
+        tokens = {'admin': JWTAuthentication.generate_jwt(dataset.admin.id, 'admin')}
+
+        result = benchmark_endpoint(APIClient(), endpoint, tokens, requests=3, warmup=0)
+
+        self.assertEqual(result['status'], [200])
+        self.assertEqual(result['requests'], 3)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['query_time_ms'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 99), 5)
@@ -0,0 +1,120 @@
+"""
+Tests for the link code pool.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+from redis.exceptions import ConnectionError
+
+from core.link_codes import POOL_KEY, take_code, take_codes, refill_pool, pool_size
+from core.models import Link
+
+
+class LinkCodePoolTests(TestCase):
+    """Tests for the pre-generated link codes."""
+
+    def setUp(self):
+        self.con = get_redis_connection('default')
+        self.con.delete(POOL_KEY)
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+
+    def tearDown(self):
+        self.con.delete(POOL_KEY)
+
+    def test_refill_pool(self):
+        """Test that the pool is filled up to the requested size."""
+        added = refill_pool(50, batch_size=20)
+
+        self.assertEqual(added, 50)
+        self.assertEqual(pool_size(), 50)
+        self.assertEqual(refill_pool(50), 0)
+
+    def test_refill_pool_skips_used_codes(self):
+        """Test that codes used by links are not added to the pool."""
+        Link.objects.create(code='used01', user=self.user)
+
+        with patch('core.link_codes.generate_code', side_effect=['used01', 'free01']):
+            refill_pool(1)
+
+        self.assertEqual(self.con.smembers(POOL_KEY), {b'free01'})
+
+    def test_take_code_from_pool(self):
+        """Test that taking a code removes it from the pool."""
+        self.con.sadd(POOL_KEY, 'abc123')
+
+        self.assertEqual(take_code(), 'abc123')
+        self.assertEqual(pool_size(), 0)
+
+    @override_settings(LINK_CODE_LENGTH=8)
+    def test_take_code_empty_pool(self):
+        """Test that an unused code is generated when the pool is empty."""
+        Link.objects.create(code='used0001', user=self.user)
+
+        with patch('core.link_codes.generate_code', side_effect=['used0001', 'free0001']):
+            self.assertEqual(take_code(), 'free0001')
+
+    @override_settings(LINK_CODE_LENGTH=8)
+    def test_generated_code_removed_from_pool(self):
+        """Test that a generated code is not handed out again by the pool."""
+        with patch.object(self.con, 'spop', side_effect=ConnectionError):
+            with patch('core.link_codes.generate_code', return_value='gen00001'):
+                self.con.sadd(POOL_KEY, 'gen00001')
+                self.assertEqual(take_code(), 'gen00001')
+
+        self.assertFalse(self.con.sismember(POOL_KEY, 'gen00001'))
+
+    def test_take_code_redis_unavailable(self):
+        """Test that a code is generated when Redis is unavailable."""
+        with patch('core.link_codes.get_redis_connection', side_effect=ConnectionError):
+            code = take_code()
+
+        self.assertEqual(len(code), 6)
+        self.assertFalse(Link.objects.filter(code=code).exists())
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_take_code_cache_not_redis(self):
+        """Test that a code is generated when the cache is not django-redis."""
+        code = take_code()
+
+        self.assertEqual(len(code), 6)
+        self.assertFalse(Link.objects.filter(code=code).exists())
+
+    def test_take_codes(self):
+        """Test taking many codes, generating those missing from the pool."""
+        self.con.sadd(POOL_KEY, 'abc123', 'def456')
+
+        codes = take_codes(5)
+
+        self.assertEqual(len(set(codes)), 5)
+        self.assertTrue({'abc123', 'def456'} <= set(codes))
+        self.assertEqual(pool_size(), 0)
+
+    def test_take_codes_generated_removed_from_pool(self):
+        """Test that generated codes are not handed out again by the pool."""
+        self.con.sadd(POOL_KEY, 'abc123', 'def456')
+
+        with patch.object(self.con, 'spop', side_effect=ConnectionError):
+            with patch('core.link_codes.generate_code', side_effect=['abc123', 'ghi789']):
+                codes = take_codes(2)
+
+        self.assertEqual(sorted(codes), ['abc123', 'ghi789'])
+        self.assertEqual(self.con.smembers(POOL_KEY), {b'def456'})
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_take_codes_cache_not_redis(self):
+        """Test that all codes are generated when the cache is not django-redis."""
+        codes = take_codes(3)
+
+        self.assertEqual(len(set(codes)), 3)
+
+    def test_refill_link_codes_command(self):
+        """Test the refill_link_codes command."""
+        call_command('refill_link_codes', size=30)
+
+        self.assertEqual(pool_size(), 30)
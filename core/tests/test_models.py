@@ -254,6 +254,15 @@ class RequireUserModelTests(TestCase):
 
         self.assertEqual(str(order), f'Order: {order.transaction_id}')
 
+    def test_order_transaction_id_unique(self):
+        """Test that orders cannot share a transaction id, unless they have none."""
+        Order.objects.create(transaction_id='T12345', code='12345')
+        Order.objects.create(code='12345')
+        Order.objects.create(code='12345')
+
+        with self.assertRaises(IntegrityError):
+            Order.objects.create(transaction_id='T12345', code='12345')
+
     def test_order_item_created(self):
         """Test if the order item was created successfully."""
         order, order_item = create_order_and_order_item(self.user)
@@ -0,0 +1,136 @@
+"""
+Tests for the ambassador rankings.
+"""
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from core.models import DailyRevenue, Order, OrderItem
+from core.rankings import get_rankings, ranking_key, rebuild_rankings
+from core.revenue import record_orders
+
+
+class RankingsTests(TestCase):
+    """Tests for recording and rebuilding the rankings."""
+
+    def setUp(self):
+        self.con = get_redis_connection('default')
+        keys = self.con.keys('rankings*')
+        if keys:
+            self.con.delete(*keys)
+        self.today = timezone.localdate()
+        self.john = get_user_model().objects.create_user(email='john@example.com',
+                                                         password='password',
+                                                         first_name='John', last_name='Doe')
+        self.jane = get_user_model().objects.create_user(email='jane@example.com',
+                                                         password='password',
+                                                         first_name='Jane', last_name='Doe')
+        get_user_model().objects.update(is_ambassador=True)
+
+    def confirm_order(self, user, day, revenue=1):
+        """Create an order of `day` with two items and record it like a confirmation."""
+        order = Order.objects.create(user=user, code='abc123', ambassador_email=user.email,
+                                     first_name='First', last_name='Last',
+                                     email='customer@example.com', complete=True)
+        Order.objects.filter(pk=order.pk).update(
+            created_at=datetime.datetime(day.year, day.month, day.day, 12,
+                                         tzinfo=datetime.timezone.utc)
+        )
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=1,
+                                     admin_revenue=9, ambassador_revenue=revenue)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_orders([order.id])
+
+    def test_confirmed_orders_update_every_window(self):
+        """Test that confirmed orders are added to the windows of their day, which expire."""
+        self.confirm_order(self.john, self.today)
+        self.confirm_order(self.jane, self.today, revenue=5)
+        self.confirm_order(self.john, self.today)
+
+        for window in ('day', 'week', 'month', 'all'):
+            self.assertEqual(list(get_rankings(window).items()),
+                             [('Jane Doe', 10.0), ('John Doe', 4.0)])
+        self.assertEqual(self.con.ttl(ranking_key('all')), -1)
+        for window in ('day', 'week', 'month'):
+            self.assertGreater(self.con.ttl(ranking_key(window)), 0)
+
+    def test_old_windows_not_recreated(self):
+        """Test that orders of long gone windows only count all-time."""
+        self.confirm_order(self.john, datetime.date(2023, 1, 1))
+
+        self.assertEqual(get_rankings('all'), {'John Doe': 2.0})
+        self.assertEqual(self.con.keys('rankings:*'), [])
+
+    def test_non_ambassadors_not_ranked(self):
+        """Test that orders of users who are not ambassadors are not ranked, like
+           in rebuilt rankings."""
+        get_user_model().objects.filter(pk=self.jane.pk).update(is_ambassador=False)
+        self.confirm_order(self.john, self.today)
+        self.confirm_order(self.jane, self.today)
+
+        for window in ('day', 'all'):
+            self.assertEqual(get_rankings(window), {'John Doe': 2.0})
+        rebuild_rankings()
+        for window in ('day', 'all'):
+            self.assertEqual(get_rankings(window), {'John Doe': 2.0})
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_not_redis(self):
+        """Test that confirmed orders are not ranked when the cache is not django-redis."""
+        self.confirm_order(self.john, self.today)
+
+        self.assertEqual(self.con.keys('rankings*'), [])
+
+    def scores(self, window, day):
+        """Return the rankings stored for the `window` containing `day`."""
+        rankings = self.con.zrevrange(ranking_key(window, day), 0, -1, withscores=True)
+        return {name.decode('utf-8'): score for name, score in rankings}
+
+    def create_revenue(self):
+        """Create daily revenue around the first week of 2023."""
+        for day, user, revenue in [(datetime.date(2023, 1, 4), self.john, 1),
+                                   (datetime.date(2023, 1, 1), self.jane, 2),
+                                   (datetime.date(2023, 1, 2), self.jane, 4),
+                                   (datetime.date(2022, 12, 31), self.john, 8)]:
+            DailyRevenue.objects.create(day=day, user=user, code='abc123', orders=1,
+                                        admin_revenue=10, ambassador_revenue=revenue)
+
+    @override_settings(RANKINGS_EXPIRE_AFTER=60 * 60 * 24 * 365 * 100)
+    def test_rebuild_rankings(self):
+        """Test that the windows are rebuilt from the daily revenue."""
+        self.create_revenue()
+        self.con.zadd(ranking_key('all'), {'Former Ambassador': 100})
+        day = datetime.date(2023, 1, 4)
+
+        rebuild_rankings(day)
+
+        self.assertEqual(self.scores('day', day), {'John Doe': 1.0})
+        self.assertEqual(self.scores('week', day), {'Jane Doe': 4.0, 'John Doe': 1.0})
+        self.assertEqual(self.scores('month', day), {'Jane Doe': 6.0, 'John Doe': 1.0})
+        self.assertEqual(self.scores('all', day), {'John Doe': 9.0, 'Jane Doe': 6.0})
+        self.assertGreater(self.con.ttl(ranking_key('week', day)), 0)
+
+    def test_rebuild_ended_windows_expire(self):
+        """Test that the sets of windows that ended are not kept by the rebuild."""
+        self.create_revenue()
+
+        rebuild_rankings(datetime.date(2023, 1, 4))
+
+        self.assertEqual(self.con.keys('rankings:*'), [])
+        self.assertEqual(get_rankings('all'), {'John Doe': 9.0, 'Jane Doe': 6.0})
+
+    def test_update_rankings_command(self):
+        """Test that the command rebuilds the current windows."""
+        DailyRevenue.objects.create(day=self.today, user=self.john, code='abc123', orders=1,
+                                    admin_revenue=10, ambassador_revenue=3)
+
+        call_command('update_rankings', stdout=StringIO())
+
+        self.assertEqual(get_rankings('week'), {'John Doe': 3.0})
@@ -0,0 +1,206 @@
+"""
+Tests for the daily revenue rollup.
+"""
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from core.models import Order, OrderItem, DailyRevenue
+from core.revenue import (USER_REVENUE_KEY, get_user_revenue, record_orders,
+                          rebuild_daily_revenue)
+
+
+class DailyRevenueTests(TestCase):
+    """Tests for recording and rebuilding the daily revenue."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+
+    def create_order(self, code='abc123', day=None, complete=True, revenue=1):
+        """Create an order with two items."""
+        order = Order.objects.create(user=self.user, code=code, ambassador_email=self.user.email,
+                                     first_name='First', last_name='Last',
+                                     email='customer@example.com', complete=complete)
+        if day:
+            Order.objects.filter(pk=order.pk).update(
+                created_at=datetime.datetime(day.year, day.month, day.day, 12,
+                                             tzinfo=datetime.timezone.utc)
+            )
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=1,
+                                     admin_revenue=9 * revenue, ambassador_revenue=revenue)
+        return order
+
+    def test_record_orders(self):
+        """Test that recorded orders are added to the row of their day and link."""
+        record_orders([self.create_order().id])
+        record_orders([self.create_order().id, self.create_order(code='other').id])
+
+        rollup = DailyRevenue.objects.get(code='abc123')
+        self.assertEqual(rollup.user, self.user)
+        self.assertEqual(rollup.orders, 2)
+        self.assertEqual(rollup.ambassador_revenue, Decimal('4'))
+        self.assertEqual(rollup.admin_revenue, Decimal('36'))
+        self.assertEqual(DailyRevenue.objects.get(code='other').orders, 1)
+
+    def test_unique_without_user(self):
+        """Test that the rows of deleted users cannot be duplicated."""
+        day = datetime.date(2023, 1, 1)
+        DailyRevenue.objects.create(day=day, user=None, code='abc123', orders=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyRevenue.objects.create(day=day, user=None, code='abc123', orders=1)
+
+    def test_record_orders_without_user(self):
+        """Test that orders of deleted users are added to a single row."""
+        record_orders([self.create_order().id])
+        self.user.delete()
+        record_orders([self.create_order_without_user().id])
+
+        rollup = DailyRevenue.objects.get()
+        self.assertIsNone(rollup.user)
+        self.assertEqual(rollup.orders, 2)
+
+    def create_order_without_user(self):
+        """Create an order of a deleted user with two items."""
+        order = Order.objects.create(user=None, code='abc123', ambassador_email='user@example.com',
+                                     first_name='First', last_name='Last',
+                                     email='customer@example.com', complete=True)
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=1,
+                                     admin_revenue=9, ambassador_revenue=1)
+        return order
+
+    def test_record_orders_runs_few_queries(self):
+        """Test that recording orders updates existing rows in bulk."""
+        record_orders([self.create_order().id])
+        order = self.create_order()
+
+        # the aggregate, the locked select and the update in a savepoint
+        with self.assertNumQueries(5):
+            record_orders([order.id])
+
+    def test_rebuild_daily_revenue(self):
+        """Test rebuilding a date range from the completed orders."""
+        day1, day2 = datetime.date(2023, 1, 1), datetime.date(2023, 1, 2)
+        self.create_order(day=day1)
+        self.create_order(day=day2, revenue=2)
+        self.create_order(day=day2, complete=False)
+        DailyRevenue.objects.create(day=day2, user=self.user, code='abc123', orders=99)
+        DailyRevenue.objects.create(day=day1, user=self.user, code='abc123', orders=99)
+
+        created = rebuild_daily_revenue(start=day2, end=day2)
+
+        self.assertEqual(created, 1)
+        rollup = DailyRevenue.objects.get(day=day2)
+        self.assertEqual(rollup.orders, 1)
+        self.assertEqual(rollup.ambassador_revenue, Decimal('4'))
+        self.assertEqual(DailyRevenue.objects.get(day=day1).orders, 99)
+
+    def test_rebuild_revenue_command(self):
+        """Test the rebuild_revenue command."""
+        self.create_order(day=datetime.date(2023, 1, 1))
+        self.create_order(day=datetime.date(2023, 2, 1))
+
+        call_command('rebuild_revenue', start='2023-01-01', end='2023-01-31')
+
+        self.assertEqual(DailyRevenue.objects.get().day, datetime.date(2023, 1, 1))
+
+    def test_user_revenue(self):
+        """Test that the revenue of a user is read from the daily revenue."""
+        record_orders([self.create_order().id, self.create_order(code='other').id])
+
+        self.assertEqual(self.user.revenue, Decimal('4'))
+
+
+class UserRevenueCacheTests(TestCase):
+    """Tests for the cached revenue of users."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='user@example.com',
+                                                         password='password')
+        cache.delete(USER_REVENUE_KEY.format(self.user.id))
+
+    def confirm_order(self, revenue='1.25', record=True):
+        """Create an order with two items and record it like a confirmation."""
+        order = Order.objects.create(user=self.user, code='abc123',
+                                     ambassador_email=self.user.email, first_name='First',
+                                     last_name='Last', email='customer@example.com',
+                                     complete=True)
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product_title='Product', price=10, quantity=1,
+                                     admin_revenue=9, ambassador_revenue=Decimal(revenue))
+        if record:
+            with self.captureOnCommitCallbacks(execute=True):
+                record_orders([order.id])
+
+    def test_revenue_cached(self):
+        """Test that the revenue is computed once and then read from the cache."""
+        self.confirm_order()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_revenue(self.user.id), Decimal('2.50'))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_revenue(self.user.id), Decimal('2.50'))
+
+    def test_confirmed_orders_invalidate_cache(self):
+        """Test that confirmed orders invalidate the cached revenue."""
+        self.assertEqual(get_user_revenue(self.user.id), 0)
+
+        self.confirm_order()
+        self.confirm_order(revenue='0.10')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_revenue(self.user.id), Decimal('2.70'))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_revenue(self.user.id), Decimal('2.70'))
+
+    def test_revenue_computed_before_commit(self):
+        """Test that a revenue computed while a confirmation commits is computed again."""
+        self.confirm_order(record=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_orders([Order.objects.get().id])
+            self.assertEqual(get_user_revenue(self.user.id), Decimal('2.50'))
+
+        self.assertEqual(get_user_revenue(self.user.id), Decimal('2.50'))
+
+    def test_uncached_revenue_not_created(self):
+        """Test that confirmations do not cache a partial revenue."""
+        self.confirm_order()
+        cache.delete(USER_REVENUE_KEY.format(self.user.id))
+        self.confirm_order()
+
+        self.assertIsNone(cache.get(USER_REVENUE_KEY.format(self.user.id)))
+        self.assertEqual(get_user_revenue(self.user.id), Decimal('5.00'))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_rebuild_invalidates_cache_not_redis(self):
+        """Test that the rebuild invalidates the cached revenue with any cache backend."""
+        self.confirm_order()
+        get_user_revenue(self.user.id)
+        self.confirm_order(record=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_daily_revenue()
+
+        self.assertEqual(get_user_revenue(self.user.id), Decimal('5.00'))
+
+    def test_rebuild_invalidates_cache(self):
+        """Test that rebuilding the daily revenue drops the cached revenue."""
+        self.confirm_order()
+        get_user_revenue(self.user.id)
+        # completed by hand, without recording it
+        self.confirm_order(record=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_daily_revenue()
+
+        self.assertEqual(get_user_revenue(self.user.id), Decimal('5.00'))